@@ -5,6 +5,8 @@ from components.aanmeldingen import aanmeldingen_overzicht
 from components.periode_beheer import periode_beheer
 from components.auth import check_admin_access, login_form, show_admin_header, show_auth_log
 from components.ronde_planning import ronde_planning_systeem
+from components.registration_form_simple import compact_registrations
+from components.upload import upload_registrations
 
 st.set_page_config(page_title="Tennis Training Inplanner - Admin Dashboard", layout="wide")
 
@@ -13,6 +15,9 @@ if not check_admin_access():
     login_form()
     st.stop()
 
+# Bring the registration files up to date with new submissions
+compact_registrations()
+
 # Show admin header with logout option
 show_admin_header()
 
@@ -22,7 +27,7 @@ st.sidebar.markdown("**Alleen voor Technische Commissie**")
 st.sidebar.markdown("---")
 st.sidebar.success("✅ Ingelogd als Admin")
 
-pagina = st.sidebar.radio("📂 Kies een pagina", ["📋 Aanmeldingen", "🎯 Ronde Planning", "📅 Periode Beheer", "📅 Trainingsbeheer", "🔍 Login Geschiedenis"])
+pagina = st.sidebar.radio("📂 Kies een pagina", ["📋 Aanmeldingen", "🎯 Ronde Planning", "📅 Periode Beheer", "📅 Trainingsbeheer", "📤 Importeren", "🔍 Login Geschiedenis"])
 
 if pagina == "📋 Aanmeldingen":
     aanmeldingen_overzicht()
@@ -36,6 +41,9 @@ elif pagina == "📅 Periode Beheer":
 elif pagina == "📅 Trainingsbeheer":
     beheer.trainingsbeheer_tab()
 
+elif pagina == "📤 Importeren":
+    upload_registrations()
+
 elif pagina == "🔍 Login Geschiedenis":
     st.title("🔍 Login Geschiedenis & Beveiliging")
     st.markdown("""
@@ -0,0 +1,155 @@
+"""Seeded synthetic club generator for the planning benchmarks.
+
+Writes trainings.csv and training1/2/3_inschrijvingen.csv in the same layout
+as the public registration form, e.g.:
+
+    python -m benchmarks.generator --registraties 5000 --trainingen 120 --out /tmp/club
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.resolver import optie_tekst
+
+DAGEN = ["Maandag", "Dinsdag", "Woensdag", "Donderdag", "Vrijdag", "Zaterdag"]
+VOORNAMEN = ["Emma", "Lucas", "Sophie", "Milan", "Anna", "Lisa", "Tom", "Mila", "David", "Robin",
+             "Sanne", "Daan", "Julia", "Sem", "Tess", "Finn", "Noor", "Levi", "Eva", "Jesse"]
+ACHTERNAMEN = ["de Vries", "Janssen", "van der Berg", "Bakker", "Smit", "van Dijk", "de Groot",
+               "Visser", "Hendriks", "Peters", "Mulder", "de Jong", "Bos", "Vos", "Meijer"]
+TRAINERS = ["Robin", "Sander", "Marije", "Joeke", "Tijmen", "Viggo", "Renee", "Ben", ""]
+
+# Club members are mostly recreational: KNLTB levels 6-9 dominate
+NIVEAU_GEWICHTEN = np.array([1, 2, 3, 5, 8, 12, 18, 25, 26], dtype=float)
+FREQUENTIE = ["1x per week", "2x per week", "3x per week"]
+FREQUENTIE_GEWICHTEN = np.array([0.70, 0.25, 0.05])
+# Places per registration (all rounds): clubs size their groups to roughly fit
+CAPACITEIT_FACTOR = 1.15
+
+def genereer_trainingen(n_trainingen, rng):
+    """Training slots spread over the week, with level bands and base group sizes of 4-8 (see schaal_capaciteit)"""
+    rijen = []
+    zonder_trainer = set()  # (dag, tijd) of the slots without a trainer, whose label is just that
+    for i in range(n_trainingen):
+        start = 9 * 60 + int(rng.integers(0, 13 * 4)) * 15
+        eind = start + 75
+        min_niveau = int(rng.choice(np.arange(1, 10), p=NIVEAU_GEWICHTEN / NIVEAU_GEWICHTEN.sum()))
+        min_niveau = max(1, min_niveau - int(rng.integers(0, 2)))
+        dag = DAGEN[i % len(DAGEN)] if n_trainingen >= len(DAGEN) else str(rng.choice(DAGEN))
+        tijd = f"{start // 60:02d}:{start % 60:02d} - {eind // 60:02d}:{eind % 60:02d}"
+        rij = {
+            "Dag": dag,
+            "Tijd": tijd,
+            "MinNiveau": min_niveau,
+            "MaxNiveau": min(9, min_niveau + int(rng.integers(0, 3))),
+            "Capaciteit": int(rng.integers(4, 9)),
+        }
+        if rng.random() < 0.9:
+            trainer = f"{rng.choice(TRAINERS)} {i}".strip()
+        elif (dag, tijd) in zonder_trainer:
+            # Labels identify trainings, so a slot without a trainer can't repeat
+            trainer = str(i)
+        else:
+            zonder_trainer.add((dag, tijd))
+            trainer = ""
+        rij["Trainer"] = trainer
+        rijen.append(rij)
+    return pd.DataFrame(rijen)
+
+def _voorkeuren(niveau, opties, min_niveaus, max_niveaus, populariteit, rng):
+    """Three distinct preferences, mostly within the player's level band"""
+    past = (min_niveaus <= niveau) & (niveau <= max_niveaus)
+    kandidaten = np.flatnonzero(past) if past.any() and rng.random() > 0.1 else np.arange(len(opties))
+    gewichten = populariteit[kandidaten] / populariteit[kandidaten].sum()
+    aantal = min(3, len(kandidaten))
+    gekozen = rng.choice(kandidaten, size=aantal, replace=False, p=gewichten)
+    keuzes = [opties[t] for t in gekozen] + [""] * (3 - aantal)
+    if rng.random() < 0.3:
+        keuzes[2] = ""
+    return keuzes
+
+def schaal_capaciteit(trainingen, opties, rondes, factor=CAPACITEIT_FACTOR):
+    """Size the groups to the registrations of all rounds, as a club does from the previous period.
+
+    Every training gets places in proportion to how often it is a first
+    choice (plus a tenth of the average, so quiet slots still run), times its
+    base group size for some variation; together they hold factor places per
+    registration.
+    """
+    eerste = pd.concat([df["Voorkeur_1"] for df in rondes.values()]).value_counts()
+    vraag = np.array([eerste.get(optie, 0) for optie in opties], dtype=float)
+    gewichten = (vraag + 0.1 * vraag.mean()) * trainingen["Capaciteit"].to_numpy(dtype=float)
+    plekken = sum(len(df) for df in rondes.values()) * factor
+    capaciteit = np.ceil(gewichten / gewichten.sum() * plekken).astype(int)
+    return trainingen.assign(Capaciteit=np.maximum(capaciteit, 4))
+
+def genereer_club(n_registraties, n_trainingen, seed=42, capaciteit_factor=CAPACITEIT_FACTOR):
+    """Return (trainingen, {ronde: inschrijvingen}) for a synthetic club.
+
+    The groups are sized to the registrations of all rounds, with about
+    capaciteit_factor places per registration; who can't be placed is then
+    down to levels and crowded slots, as in a real period.
+    """
+    rng = np.random.default_rng(seed)
+    trainingen = genereer_trainingen(n_trainingen, rng)
+    opties = [optie_tekst(rij) for _, rij in trainingen.iterrows()]
+    min_niveaus = trainingen["MinNiveau"].to_numpy()
+    max_niveaus = trainingen["MaxNiveau"].to_numpy()
+    # Some slots (evenings, popular trainers) are much more in demand than others
+    populariteit = rng.zipf(1.6, size=n_trainingen).clip(max=50).astype(float)
+
+    niveaus = rng.choice(np.arange(1, 10), size=n_registraties, p=NIVEAU_GEWICHTEN / NIVEAU_GEWICHTEN.sum())
+    frequenties = rng.choice(3, size=n_registraties, p=FREQUENTIE_GEWICHTEN)
+    # Registrations arrive in a burst right after opening, then trail off
+    seconden = np.sort(rng.exponential(2 * 24 * 3600, size=n_registraties)).astype(np.int64)
+    datums = (pd.Timestamp("2025-06-01 09:00") + pd.to_timedelta(seconden, unit="s")).strftime("%Y-%m-%d %H:%M")
+
+    rondes = {1: [], 2: [], 3: []}
+    for i in range(n_registraties):
+        voornaam = VOORNAMEN[i % len(VOORNAMEN)]
+        achternaam = f"{ACHTERNAMEN[(i // len(VOORNAMEN)) % len(ACHTERNAMEN)]} {i}"
+        basis = {
+            "Naam": f"{voornaam} {achternaam}",
+            "Voornaam": voornaam,
+            "Achternaam": achternaam,
+            "Telefoon": f"06-{10000000 + i:08d}",
+            "Niveau": int(niveaus[i]),
+            "Trainingen_per_week": FREQUENTIE[frequenties[i]],
+            "Extra_bericht": "",
+            "Inschrijfdatum": datums[i],
+            "Toestemming_hoger_niveau": "Nee",
+        }
+        for ronde in range(1, frequenties[i] + 2):
+            v1, v2, v3 = _voorkeuren(niveaus[i], opties, min_niveaus, max_niveaus, populariteit, rng)
+            rij = dict(basis, Voorkeur_1=v1, Voorkeur_2=v2, Voorkeur_3=v3)
+            rondes[ronde].append(rij)
+
+    kolommen = ["Naam", "Voornaam", "Achternaam", "Telefoon", "Niveau", "Trainingen_per_week",
+                "Voorkeur_1", "Voorkeur_2", "Voorkeur_3", "Extra_bericht", "Inschrijfdatum", "Toestemming_hoger_niveau"]
+    rondes = {r: pd.DataFrame(rijen, columns=kolommen) for r, rijen in rondes.items()}
+    return schaal_capaciteit(trainingen, opties, rondes, capaciteit_factor), rondes
+
+def schrijf_club(map_pad, trainingen, rondes):
+    """Write the generated club in the data/ layout"""
+    map_pad = Path(map_pad)
+    os.makedirs(map_pad, exist_ok=True)
+    trainingen.to_csv(map_pad / "trainings.csv", index=False)
+    for ronde, df in rondes.items():
+        df.to_csv(map_pad / f"training{ronde}_inschrijvingen.csv", index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Genereer een synthetische club voor benchmarks")
+    parser.add_argument("--registraties", type=int, default=1000)
+    parser.add_argument("--trainingen", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="Map waarin de CSV bestanden komen")
+    args = parser.parse_args()
+
+    trainingen, rondes = genereer_club(args.registraties, args.trainingen, args.seed)
+    schrijf_club(args.out, trainingen, rondes)
+    print(f"{len(trainingen)} trainingen, {sum(len(df) for df in rondes.values())} inschrijvingen naar {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Planner benchmarks on seeded synthetic clubs.
+
+Measures wall time, peak memory and the number of manual cases for the
+planning hot paths and compares them with benchmarks/baseline.json:
+
+    python -m benchmarks.run                    # compare with the baseline
+    python -m benchmarks.run --update-baseline  # record a new baseline
+    python -m benchmarks.run --groot            # include the 100k scenario
+
+Exits with status 1 when a function got slower than the tolerance allows or
+its manual count changed.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.generator import genereer_club
+from components.ronde_planning import (
+    build_round_result,
+    filter_people_for_available_trainings,
+    get_people_already_assigned_to_trainings,
+    plan_single_round,
+)
+from utils.logic import plan_spelers
+
+BASELINE_PAD = Path(__file__).parent / "baseline.json"
+
+# (registraties, trainingen) per scenario
+SCENARIOS = {
+    "klein": (100, 10),
+    "middel": (1000, 40),
+    "groot": (10000, 200),
+}
+ZEER_GROOT = {"zeer_groot": (100000, 500)}
+
+BENCH_PERIODE = {"name": "benchmark", "type": "synthetic"}
+
+def _meet(functie, herhalingen):
+    """Best wall time over herhalingen runs, then one traced run for peak memory"""
+    tijden = []
+    for _ in range(herhalingen):
+        start = time.perf_counter()
+        resultaat = functie()
+        tijden.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        functie()
+        _, piek = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultaat, min(tijden), piek
+
+def _status_na_ronde_1(trainingen, rondes):
+    """Planning status with round 1 planned, so round 2 sees earlier assignments"""
+    status = {"planning_history": [], "manual_assignments": {}}
+    planning, handmatig = plan_single_round(rondes[1].copy(), trainingen, 1, status)
+    status["planning_history"].append(build_round_result(1, dict(planning), handmatig, BENCH_PERIODE, "greedy"))
+    return status
+
+def benchmark_scenario(naam, n_registraties, n_trainingen, seed, herhalingen):
+    """Benchmark every hot path on one synthetic club: {"scenario/functie": meting}"""
+    trainingen, rondes = genereer_club(n_registraties, n_trainingen, seed)
+    status = _status_na_ronde_1(trainingen, rondes)
+    mapping = get_people_already_assigned_to_trainings(status, 2)
+    ronde_2 = rondes[2]
+
+    functies = {
+        "plan_spelers": lambda: plan_spelers(rondes[1].copy(), trainingen),
+        "plan_single_round": lambda: plan_single_round(ronde_2.copy(), trainingen, 2, status),
+        "filter_people_for_available_trainings": lambda: filter_people_for_available_trainings(ronde_2, trainingen, mapping),
+        "get_people_already_assigned_to_trainings": lambda: get_people_already_assigned_to_trainings(status, 2),
+    }
+
+    metingen = {}
+    for functie_naam, functie in functies.items():
+        resultaat, tijd, piek = _meet(functie, herhalingen)
+        meting = {
+            "registraties": n_registraties,
+            "trainingen": n_trainingen,
+            "wall_s": round(tijd, 5),
+            "peak_mb": round(piek / 1024 / 1024, 3),
+        }
+        if functie_naam in ("plan_spelers", "plan_single_round"):
+            meting["handmatig"] = len(resultaat[1])
+        metingen[f"{naam}/{functie_naam}"] = meting
+    return metingen
+
+def vergelijk(metingen, baseline, tolerantie, min_verschil=0.02):
+    """Regressions against the baseline as readable lines.
+
+    A slowdown only counts when it exceeds both the relative tolerance and
+    min_verschil seconds, so timer noise on tiny scenarios is ignored.
+    """
+    regressies = []
+    for sleutel, meting in metingen.items():
+        basis = baseline.get(sleutel)
+        if basis is None:
+            continue
+        verschil = meting["wall_s"] - basis["wall_s"]
+        if verschil > basis["wall_s"] * tolerantie and verschil > min_verschil:
+            regressies.append(f"{sleutel}: {basis['wall_s']:.4f}s -> {meting['wall_s']:.4f}s")
+        if meting.get("handmatig") != basis.get("handmatig"):
+            regressies.append(f"{sleutel}: handmatig {basis.get('handmatig')} -> {meting.get('handmatig')}")
+    return regressies
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de planning op synthetische clubs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--herhalingen", type=int, default=5)
+    parser.add_argument("--tolerantie", type=float, default=0.5, help="Toegestane vertraging, 0.5 = 50%%")
+    parser.add_argument("--min-verschil", type=float, default=0.02, help="Minimale vertraging in seconden")
+    parser.add_argument("--groot", action="store_true", help="Ook het scenario met 100k inschrijvingen draaien")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PAD)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS, **(ZEER_GROOT if args.groot else {}))
+    metingen = {}
+    for naam, (n_registraties, n_trainingen) in scenarios.items():
+        resultaat = benchmark_scenario(naam, n_registraties, n_trainingen, args.seed, args.herhalingen)
+        for sleutel, meting in resultaat.items():
+            handmatig = f"  handmatig={meting['handmatig']}" if "handmatig" in meting else ""
+            print(f"{sleutel:<60} {meting['wall_s']:>9.4f}s {meting['peak_mb']:>9.2f} MB{handmatig}")
+        metingen.update(resultaat)
+
+    if args.update_baseline or not args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(metingen)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline opgeslagen in {args.baseline}")
+        return 0
+
+    regressies = vergelijk(metingen, json.loads(args.baseline.read_text()), args.tolerantie, args.min_verschil)
+    for regressie in regressies:
+        print(f"REGRESSIE {regressie}")
+    return 1 if regressies else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,9 @@
 import streamlit as st
 import pandas as pd
-import os
-from pathlib import Path
+from utils.opslag import lees_inschrijvingen, inschrijvingen_aanwezig, bewerk_inschrijvingen, werkperiode_map, aantal_inschrijvingen
+from utils.overzicht import (PRIORITEITEN, PRIORITEIT_ICONEN, SORTERINGEN, voorbereid, gecombineerd, filter_rijen, pagina,
+                             aantal_paginas, vandaag, zonder_hulpkolommen)
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-TRAINING1_PATH = BASE_DIR / "data" / "training1_inschrijvingen.csv"
-TRAINING2_PATH = BASE_DIR / "data" / "training2_inschrijvingen.csv"
-TRAINING3_PATH = BASE_DIR / "data" / "training3_inschrijvingen.csv"
 
 def clean_duplicates_manually():
     """Admin tool to manually clean duplicates based on phone number"""
@@ -17,17 +14,17 @@ def clean_duplicates_manually():
     """)
     
     training_files = [
-        (TRAINING1_PATH, "Training 1 (Eerste keuze)"),
-        (TRAINING2_PATH, "Training 2 (Tweede keuze)"),
-        (TRAINING3_PATH, "Training 3 (Derde keuze)")
+        (1, "Training 1 (Eerste keuze)"),
+        (2, "Training 2 (Tweede keuze)"),
+        (3, "Training 3 (Derde keuze)")
     ]
     
     duplicates_found = False
     
-    for file_path, training_name in training_files:
-        if file_path.exists():
+    for ronde, training_name in training_files:
+        if inschrijvingen_aanwezig(ronde, live=True):
             try:
-                df = pd.read_csv(file_path)
+                df = lees_inschrijvingen(ronde, live=True)
                 
                 if 'Telefoon' in df.columns and 'Inschrijfdatum' in df.columns:
                     # Count duplicates
@@ -55,26 +52,32 @@ def clean_duplicates_manually():
         if st.button("🧹 Duplicaten Opruimen", type="primary"):
             cleaned_count = 0
             
-            for file_path, training_name in training_files:
-                if file_path.exists():
+            removed = {}
+            
+            def remove_duplicates(df):
+                if 'Telefoon' not in df.columns or 'Inschrijfdatum' not in df.columns:
+                    return None
+                # Convert date column to datetime for proper sorting
+                df['Inschrijfdatum'] = pd.to_datetime(df['Inschrijfdatum'])
+                
+                # Keep only the most recent entry for each phone number
+                df_cleaned = df.sort_values('Inschrijfdatum', ascending=False).drop_duplicates(subset=['Telefoon'], keep='first')
+                removed["count"] = len(df) - len(df_cleaned)
+                if removed["count"] == 0:
+                    return None
+                
+                # Convert back to string format for saving
+                df_cleaned['Inschrijfdatum'] = df_cleaned['Inschrijfdatum'].dt.strftime('%Y-%m-%d %H:%M')
+                return df_cleaned
+            
+            for ronde, training_name in training_files:
+                if inschrijvingen_aanwezig(ronde, live=True):
                     try:
-                        df = pd.read_csv(file_path)
-                        
-                        if 'Telefoon' in df.columns and 'Inschrijfdatum' in df.columns:
-                            # Convert date column to datetime for proper sorting
-                            df['Inschrijfdatum'] = pd.to_datetime(df['Inschrijfdatum'])
-                            
-                            # Keep only the most recent entry for each phone number
-                            original_count = len(df)
-                            df_cleaned = df.sort_values('Inschrijfdatum', ascending=False).drop_duplicates(subset=['Telefoon'], keep='first')
-                            removed_count = original_count - len(df_cleaned)
-                            
-                            if removed_count > 0:
-                                # Convert back to string format for saving
-                                df_cleaned['Inschrijfdatum'] = df_cleaned['Inschrijfdatum'].dt.strftime('%Y-%m-%d %H:%M')
-                                df_cleaned.to_csv(file_path, index=False)
-                                cleaned_count += removed_count
-                                st.success(f"**{training_name}**: {removed_count} duplicaten verwijderd")
+                        # Read and write in one locked step so no new registrations get lost in between
+                        if bewerk_inschrijvingen(ronde, remove_duplicates) is not None:
+                            removed_count = removed["count"]
+                            cleaned_count += removed_count
+                            st.success(f"**{training_name}**: {removed_count} duplicaten verwijderd")
                     
                     except Exception as e:
                         st.error(f"Fout bij opruimen {training_name}: {e}")
@@ -93,6 +96,10 @@ def aanmeldingen_overzicht():
     De aanmeldingen komen automatisch binnen via het publieke aanmeldformulier.
     """)
     
+    archive_dir = werkperiode_map()
+    if archive_dir is not None:
+        st.info(f"📁 Je bekijkt de gearchiveerde periode **{archive_dir.name}**. Schakel in Periode Beheer terug naar live data voor de nieuwe aanmeldingen.")
+    
     # Add admin tools section
     with st.expander("🔧 Admin Tools"):
         clean_duplicates_manually()
@@ -102,29 +109,111 @@ def aanmeldingen_overzicht():
     
     with tab1:
         st.subheader("🥇 Eerste keuze trainingen")
-        display_training_registrations(TRAINING1_PATH, "Training 1", "success")
+        display_training_registrations(1, "Training 1", "success")
     
     with tab2:
         st.subheader("🥈 Tweede keuze trainingen")
-        display_training_registrations(TRAINING2_PATH, "Training 2", "info")
+        display_training_registrations(2, "Training 2", "info")
     
     with tab3:
         st.subheader("🥉 Derde keuze trainingen")
-        display_training_registrations(TRAINING3_PATH, "Training 3", "warning")
+        display_training_registrations(3, "Training 3", "warning")
     
     with tab_combined:
         st.subheader("📊 Gecombineerd overzicht alle aanmeldingen")
         display_combined_overview()
 
-def display_training_registrations(file_path, training_name, status_type):
+PAGE_SIZES = [25, 50, 100, 250]
+
+def registration_filters(df, key, priorities=False):
+    """Filter widgets for a prepared registration frame; returns the filtered rows"""
+    opties = df.attrs
+    with st.expander("🔍 Filters", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            niveaus = st.multiselect("Niveau", opties["niveaus"], key=f"{key}_niveaus")
+        with col2:
+            frequenties = st.multiselect("Trainingen per week", opties["frequenties"], key=f"{key}_frequenties")
+        with col3:
+            vanaf = tot = None
+            if pd.notna(opties["eerste_datum"]):
+                eerste, laatste = opties["eerste_datum"].date(), opties["laatste_datum"].date()
+                periode = st.date_input("Inschrijfdatum", value=(eerste, laatste), min_value=eerste, max_value=laatste,
+                                        format="DD-MM-YYYY", key=f"{key}_periode")
+                # While picking a range only the start date is set
+                if len(periode) == 2 and (periode[0], periode[1]) != (eerste, laatste):
+                    vanaf, tot = periode
+        voorkeuren = st.multiselect("Voorkeur (eerste, tweede of derde keuze)", opties["voorkeuren"], key=f"{key}_voorkeuren")
+        prioriteiten = None
+        if priorities:
+            prioriteiten = st.multiselect("Prioriteit", list(PRIORITEITEN), format_func=lambda r: f"{PRIORITEIT_ICONEN[r]} {PRIORITEITEN[r]}",
+                                          key=f"{key}_prioriteiten")
+    return filter_rijen(df, niveaus, voorkeuren, frequenties, vanaf, tot, prioriteiten), (niveaus, voorkeuren, frequenties, vanaf, tot, prioriteiten)
+
+def display_registration_page(df, key, columns, download_name, priorities=False):
+    """Filtered, sorted and paginated registrations; only the visible page is sent to the browser"""
+    filtered, filters = registration_filters(df, key, priorities)
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sortering = st.selectbox("Sorteren op", list(SORTERINGEN), key=f"{key}_sortering")
+    with col2:
+        per_page = st.selectbox("Per pagina", PAGE_SIZES, key=f"{key}_per_pagina")
+    pages = aantal_paginas(len(filtered), per_page)
+    # Back to the first page when the selection changes, and never past the last one
+    page_key = f"{key}_pagina"
+    signature = (filters, sortering, per_page)
+    if st.session_state.get(f"{key}_selectie") != signature:
+        st.session_state[f"{key}_selectie"] = signature
+        st.session_state[page_key] = 1
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    with col3:
+        page = st.number_input(f"Pagina (van {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    if len(filtered) == 0:
+        st.info("Geen aanmeldingen die aan de filters voldoen")
+        return
+
+    rows = pagina(filtered, sortering, page, per_page)
+    start = (page - 1) * per_page
+    st.caption(f"Aanmeldingen {start + 1}–{start + len(rows)} van {len(filtered)}"
+               + (f" (gefilterd uit {len(df)})" if len(filtered) != len(df) else ""))
+
+    df_display = rows[[col for col in columns if col in rows.columns]].copy()
+    if 'Inschrijfdatum' in df_display.columns:
+        # Dates that couldn't be parsed are shown as stored
+        df_display['Inschrijfdatum'] = rows['_datum'].dt.strftime('%d-%m-%Y %H:%M').fillna(rows['Inschrijfdatum'])
+    if 'Prioriteit' in df_display.columns:
+        df_display['Prioriteit'] = rows['Prioriteit'].map(lambda r: f"{PRIORITEIT_ICONEN[r]} {PRIORITEITEN[r]}")
+    st.dataframe(df_display.astype("string"), use_container_width=True, hide_index=True)
+
+    # Extra messages of the visible page in one table instead of an element per message
+    if 'Extra_bericht' in rows.columns:
+        messages = rows[rows['Extra_bericht'].notna() & (rows['Extra_bericht'].astype(str).str.strip() != '')]
+        if len(messages) > 0:
+            st.markdown("### 💬 Extra berichten van deelnemers")
+            st.dataframe(messages[['Naam', 'Extra_bericht']].rename(columns={'Extra_bericht': 'Bericht'}).astype("string"),
+                         use_container_width=True, hide_index=True)
+
+    # Download of the current selection, only built when clicked
+    st.download_button(
+        label=f"📥 Download {len(filtered)} aanmeldingen CSV",
+        data=lambda: zonder_hulpkolommen(filtered).to_csv(index=False).encode('utf-8'),
+        file_name=download_name,
+        mime="text/csv",
+        key=f"{key}_download"
+    )
+
+def display_training_registrations(ronde, training_name, status_type):
     """Display registrations for a specific training priority"""
     
-    if not file_path.exists():
+    if not inschrijvingen_aanwezig(ronde):
         st.info(f"📝 Nog geen aanmeldingen voor {training_name}")
         return
     
     try:
-        df = pd.read_csv(file_path)
+        df = voorbereid(ronde)
         
         if len(df) == 0:
             st.info(f"📝 Nog geen aanmeldingen voor {training_name}")
@@ -141,50 +230,16 @@ def display_training_registrations(file_path, training_name, status_type):
                 st.warning(f"**{len(df)}** aanmeldingen")
         
         with col2:
-            avg_strength = df['Speelsterkte'].mean() if 'Speelsterkte' in df.columns else 0
-            st.metric("Gem. speelsterkte", f"{avg_strength:.1f}")
+            st.metric("Gem. niveau", f"{df.attrs['gemiddeld_niveau']:.1f}")
         
         with col3:
-            recent_count = len(df[df['Inschrijfdatum'] == df['Inschrijfdatum'].max()]) if 'Inschrijfdatum' in df.columns else 0
-            st.metric("Vandaag", recent_count)
+            st.metric("Vandaag", vandaag(df))
         
-        # Show detailed table
         st.markdown("### 📋 Gedetailleerd overzicht")
-        
-        # Select which columns to display
-        display_columns = ['Naam', 'Telefoon', 'Speelsterkte', 'Voorkeur_1', 'Voorkeur_2', 'Voorkeur_3', 
+        display_columns = ['Naam', 'Telefoon', 'Niveau', 'Voorkeur_1', 'Voorkeur_2', 'Voorkeur_3',
                           'Trainingen_per_week', 'Toestemming_hoger_niveau', 'Inschrijfdatum']
-        
-        # Filter existing columns
-        available_columns = [col for col in display_columns if col in df.columns]
-        df_display = df[available_columns].copy()
-        
-        # Format the display
-        if 'Inschrijfdatum' in df_display.columns:
-            df_display['Inschrijfdatum'] = pd.to_datetime(df_display['Inschrijfdatum']).dt.strftime('%d-%m-%Y %H:%M')
-        
-        # Sort by registration date (newest first)
-        if 'Inschrijfdatum' in df_display.columns:
-            df_display = df_display.sort_values('Inschrijfdatum', ascending=False)
-        
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
-        
-        # Download button
-        csv_data = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label=f"📥 Download {training_name} CSV",
-            data=csv_data,
-            file_name=f"{training_name.lower().replace(' ', '_')}_aanmeldingen.csv",
-            mime="text/csv"
-        )
-        
-        # Show extra messages if available
-        if 'Extra_bericht' in df.columns:
-            messages = df[df['Extra_bericht'].notna() & (df['Extra_bericht'] != '')]
-            if len(messages) > 0:
-                st.markdown("### 💬 Extra berichten van deelnemers")
-                for idx, row in messages.iterrows():
-                    st.info(f"**{row['Naam']}**: {row['Extra_bericht']}")
+        display_registration_page(df, f"aanmeldingen_{ronde}", display_columns,
+                                  f"{training_name.lower().replace(' ', '_')}_aanmeldingen.csv")
         
     except Exception as e:
         st.error(f"Fout bij het laden van {training_name}: {e}")
@@ -192,32 +247,20 @@ def display_training_registrations(file_path, training_name, status_type):
 def display_combined_overview():
     """Display combined overview of all registrations"""
     
-    all_data = []
-    
-    # Load all training files
-    training_files = [
-        (TRAINING1_PATH, "Eerste keuze", "🥇"),
-        (TRAINING2_PATH, "Tweede keuze", "🥈"), 
-        (TRAINING3_PATH, "Derde keuze", "🥉")
-    ]
+    if not any(inschrijvingen_aanwezig(ronde) for ronde in PRIORITEITEN):
+        st.info("📝 Nog geen aanmeldingen gevonden")
+        return
     
-    for file_path, priority_name, icon in training_files:
-        if file_path.exists():
-            try:
-                df = pd.read_csv(file_path)
-                df['Training_Prioriteit'] = priority_name
-                df['Prioriteit_Icon'] = icon
-                all_data.append(df)
-            except Exception as e:
-                st.error(f"Fout bij laden {priority_name}: {e}")
+    try:
+        combined_df = gecombineerd()
+    except Exception as e:
+        st.error(f"Fout bij laden aanmeldingen: {e}")
+        return
     
-    if not all_data:
+    if len(combined_df) == 0:
         st.info("📝 Nog geen aanmeldingen gevonden")
         return
     
-    # Combine all data
-    combined_df = pd.concat(all_data, ignore_index=True)
-    
     # Summary statistics
     st.markdown("### 📊 Overzicht statistieken")
     col1, col2, col3, col4 = st.columns(4)
@@ -226,57 +269,26 @@ def display_combined_overview():
         st.metric("Totaal aanmeldingen", len(combined_df))
     
     with col2:
-        unique_people = combined_df['Naam'].nunique() if 'Naam' in combined_df.columns else 0
-        st.metric("Unieke personen", unique_people)
+        st.metric("Unieke personen", combined_df.attrs["unieke_namen"])
     
     with col3:
-        avg_strength = combined_df['Speelsterkte'].mean() if 'Speelsterkte' in combined_df.columns else 0
-        st.metric("Gem. speelsterkte", f"{avg_strength:.1f}")
+        st.metric("Gem. niveau", f"{combined_df.attrs['gemiddeld_niveau']:.1f}")
     
     with col4:
-        with_permission = len(combined_df[combined_df['Toestemming_hoger_niveau'] == 'Ja']) if 'Toestemming_hoger_niveau' in combined_df.columns else 0
-        st.metric("Met toestemming", with_permission)
+        st.metric("Met toestemming", combined_df.attrs["met_toestemming"])
     
     # Show breakdown per priority
     st.markdown("### 📈 Verdeling per prioriteit")
-    priority_counts = combined_df['Training_Prioriteit'].value_counts()
-    
     col1, col2, col3 = st.columns(3)
     with col1:
-        count1 = priority_counts.get('Eerste keuze', 0)
-        st.success(f"🥇 Eerste keuze: **{count1}**")
+        st.success(f"🥇 Eerste keuze: **{aantal_inschrijvingen(1)}**")
     with col2:
-        count2 = priority_counts.get('Tweede keuze', 0)
-        st.info(f"🥈 Tweede keuze: **{count2}**")
+        st.info(f"🥈 Tweede keuze: **{aantal_inschrijvingen(2)}**")
     with col3:
-        count3 = priority_counts.get('Derde keuze', 0)
-        st.warning(f"🥉 Derde keuze: **{count3}**")
+        st.warning(f"🥉 Derde keuze: **{aantal_inschrijvingen(3)}**")
     
     # Detailed combined table
     st.markdown("### 📋 Alle aanmeldingen")
-    
-    # Select display columns
-    display_columns = ['Prioriteit_Icon', 'Training_Prioriteit', 'Naam', 'Telefoon', 'Speelsterkte', 
-                      'Voorkeur_1', 'Trainingen_per_week', 'Inschrijfdatum']
-    
-    available_columns = [col for col in display_columns if col in combined_df.columns]
-    df_display = combined_df[available_columns].copy()
-    
-    # Format dates
-    if 'Inschrijfdatum' in df_display.columns:
-        df_display['Inschrijfdatum'] = pd.to_datetime(df_display['Inschrijfdatum']).dt.strftime('%d-%m-%Y %H:%M')
-    
-    # Sort by registration date (newest first)
-    if 'Inschrijfdatum' in df_display.columns:
-        df_display = df_display.sort_values('Inschrijfdatum', ascending=False)
-    
-    st.dataframe(df_display, use_container_width=True, hide_index=True)
-    
-    # Download combined data
-    csv_data = combined_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download alle aanmeldingen CSV",
-        data=csv_data,
-        file_name="alle_aanmeldingen_gecombineerd.csv",
-        mime="text/csv"
-    ) 
\ No newline at end of file
+    display_columns = ['Prioriteit', 'Naam', 'Telefoon', 'Niveau', 'Voorkeur_1', 'Trainingen_per_week', 'Inschrijfdatum']
+    display_registration_page(combined_df, "aanmeldingen_gecombineerd", display_columns,
+                              "alle_aanmeldingen_gecombineerd.csv", priorities=True)
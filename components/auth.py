@@ -1,46 +1,18 @@
 import streamlit as st
 from datetime import datetime
-import json
-import os
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-AUTH_LOG_PATH = BASE_DIR / "data" / "auth_log.json"
+from utils.inlogpogingen import registreer, recente_pogingen, mislukte_pogingen, volledige_log
 
 # Admin access code
 ADMIN_CODE = "legends"
 
 def log_auth_attempt(success, ip_address=None, timestamp=None):
     """Log authentication attempts for audit trail"""
-    if timestamp is None:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    log_entry = {
-        "timestamp": timestamp,
-        "success": success,
-        "ip_address": ip_address or "Unknown",
-        "user_agent": "Admin Dashboard"
-    }
-    
-    # Load existing log
-    auth_log = []
-    if AUTH_LOG_PATH.exists():
-        try:
-            with open(AUTH_LOG_PATH, 'r', encoding='utf-8') as f:
-                auth_log = json.load(f)
-        except:
-            auth_log = []
-    
-    # Add new entry
-    auth_log.append(log_entry)
-    
-    # Keep only last 100 entries
-    auth_log = auth_log[-100:]
-    
-    # Save log
-    os.makedirs(AUTH_LOG_PATH.parent, exist_ok=True)
-    with open(AUTH_LOG_PATH, 'w', encoding='utf-8') as f:
-        json.dump(auth_log, f, indent=2, ensure_ascii=False)
+    return registreer(success, ip_address, timestamp)
+
+def client_ip():
+    """IP address of the current visitor, when Streamlit knows it"""
+    ip_address = getattr(st.context, "ip_address", None)
+    return ip_address if isinstance(ip_address, str) else None
 
 def check_admin_access():
     """Check if user is authenticated as admin"""
@@ -74,7 +46,7 @@ def login_form():
                 st.session_state['login_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
                 # Log successful attempt
-                log_auth_attempt(success=True)
+                log_auth_attempt(success=True, ip_address=client_ip())
                 
                 st.success("✅ **Login succesvol!**")
                 st.info("🔄 Pagina wordt vernieuwd...")
@@ -83,22 +55,16 @@ def login_form():
                 
             else:
                 # Failed login
-                log_auth_attempt(success=False)
+                ip_address = client_ip()
+                log_auth_attempt(success=False, ip_address=ip_address)
                 
                 st.error("❌ **Ongeldige toegangscode!**")
                 st.warning("⚠️ Zorg ervoor dat je de juiste code invoert.")
                 
-                # Show recent failed attempts (security info)
-                if AUTH_LOG_PATH.exists():
-                    try:
-                        with open(AUTH_LOG_PATH, 'r', encoding='utf-8') as f:
-                            auth_log = json.load(f)
-                        
-                        failed_attempts = [entry for entry in auth_log[-10:] if not entry['success']]
-                        if len(failed_attempts) >= 3:
-                            st.warning(f"⚠️ {len(failed_attempts)} recente mislukte pogingen gedetecteerd.")
-                    except:
-                        pass
+                # Show recent failed attempts (security info), counted in memory per IP
+                failed_attempts = mislukte_pogingen(ip_address)
+                if failed_attempts >= 3:
+                    st.warning(f"⚠️ {failed_attempts} recente mislukte pogingen gedetecteerd.")
     
     # Security information
     st.markdown("---")
@@ -136,15 +102,8 @@ def show_admin_header():
             logout()
 
 def get_auth_log():
-    """Get authentication log for admin view"""
-    if not AUTH_LOG_PATH.exists():
-        return []
-    
-    try:
-        with open(AUTH_LOG_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+    """Get authentication log for admin view (the latest attempts, kept in memory)"""
+    return recente_pogingen()
 
 def show_auth_log():
     """Display authentication log in admin dashboard"""
@@ -189,10 +148,9 @@ def show_auth_log():
     
     # Download log
     if st.button("📥 Download Volledige Log"):
-        log_data = json.dumps(auth_log, indent=2, ensure_ascii=False)
         st.download_button(
-            label="💾 Download auth_log.json",
-            data=log_data.encode('utf-8'),
-            file_name=f"auth_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            label="💾 Download auth_log.jsonl",
+            data=volledige_log(),
+            file_name=f"auth_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson"
         ) 
\ No newline at end of file
@@ -1,10 +1,9 @@
 import streamlit as st
 import pandas as pd
-import os
-from pathlib import Path
+from components.ronde_planning import PLANNING_METHODES, load_all_rounds, load_ronde_status
+from utils.simulatie import simuleer_capaciteit, standaard_scenarios
+from utils.opslag import trainingen_aanwezig, lees_trainingen, schrijf_trainingen
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-TRAINING_CSV_PATH = BASE_DIR / "data" / "trainings.csv"
 
 def trainingsbeheer_tab():
     st.title("📅 Trainingsbeheer")
@@ -18,8 +17,8 @@ def trainingsbeheer_tab():
 
     # Laad bestaande trainingen uit CSV (indien aanwezig)
     if "trainingen" not in st.session_state:
-        if os.path.exists(TRAINING_CSV_PATH):
-            df_existing = pd.read_csv(TRAINING_CSV_PATH)
+        if trainingen_aanwezig():
+            df_existing = lees_trainingen()
             # Remove Training Naam column if it exists (backward compatibility)
             if "Training Naam" in df_existing.columns:
                 df_existing = df_existing.drop(columns=["Training Naam"])
@@ -34,17 +33,44 @@ def trainingsbeheer_tab():
     edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True, key="editor")
     if st.button("💾 Wijzigingen opslaan"):
         st.session_state.trainingen = edited_df
-        st.session_state.trainingen.to_csv(TRAINING_CSV_PATH, index=False)
+        schrijf_trainingen(st.session_state.trainingen)
         st.success("Wijzigingen opgeslagen!")
         st.rerun()
 
+    # What-if: effect van andere capaciteiten op de planning, zonder op te slaan
+    with st.expander("🧮 Simuleer capaciteit"):
+        st.write("Plant de huidige aanmeldingen tegen verschillende capaciteiten van de trainingen hierboven "
+                 "(inclusief niet-opgeslagen wijzigingen). Er wordt niets opgeslagen.")
+        trainingen_sim = edited_df.dropna(subset=["Dag", "Tijd"])
+        scenarios = standaard_scenarios(trainingen_sim)
+        gekozen = st.multiselect("Scenario's", options=[s["naam"] for s in scenarios],
+                                 default=[s["naam"] for s in scenarios])
+        methode = st.radio("Planningsmethode:", options=list(PLANNING_METHODES.keys()),
+                           format_func=lambda m: PLANNING_METHODES[m][0], horizontal=True, key="simulatie_methode")
+        if st.button("🧮 Simuleer", disabled=not gekozen):
+            rondes = load_all_rounds(load_ronde_status())
+            if not rondes:
+                st.warning("Geen aanmeldingen gevonden om mee te simuleren.")
+            else:
+                with st.spinner(f"{len(gekozen)} scenario's worden gepland..."):
+                    resultaten = simuleer_capaciteit(rondes, trainingen_sim,
+                                                     [s for s in scenarios if s["naam"] in gekozen], methode)
+                df_resultaten = pd.DataFrame([{
+                    "Scenario": r["scenario"],
+                    "Extra plekken": r["extra_plekken"],
+                    "Ingepland": r["geplaatst"],
+                    "Handmatig": r["handmatig"],
+                    "% Eerste keuze": r["eerste_keuze_pct"],
+                } for r in resultaten])
+                st.dataframe(df_resultaten, use_container_width=True, hide_index=True)
+
     # Verwijderen
     if len(df) > 0:
         st.write("### 🗑 Verwijder training")
         index_to_delete = st.selectbox("Selecteer een training om te verwijderen:", df.index, format_func=lambda i: f"{df.at[i, 'Dag']} {df.at[i, 'Tijd']} - Niveau {df.at[i, 'MinNiveau']}-{df.at[i, 'MaxNiveau']}")
         if st.button("Verwijder geselecteerde training"):
             st.session_state.trainingen = df.drop(index=index_to_delete).reset_index(drop=True)
-            st.session_state.trainingen.to_csv(TRAINING_CSV_PATH, index=False)
+            schrijf_trainingen(st.session_state.trainingen)
             st.success("Training verwijderd!")
             st.rerun()
 
@@ -71,6 +97,6 @@ def trainingsbeheer_tab():
             st.session_state.trainingen = pd.concat([
                 st.session_state.trainingen, pd.DataFrame([nieuwe_training])
             ], ignore_index=True)
-            st.session_state.trainingen.to_csv(TRAINING_CSV_PATH, index=False)
+            schrijf_trainingen(st.session_state.trainingen)
             st.success("Training toegevoegd!")
             st.rerun()
@@ -1,27 +1,22 @@
 import streamlit as st
-import pandas as pd
 import os
-import shutil
-from datetime import datetime, date
+from datetime import datetime
 from pathlib import Path
 import json
+from utils.opslag import (lees_document, schrijf_document, aantal_inschrijvingen, lees_inschrijvingen,
+                          inschrijvingen_aanwezig, compacteer_inschrijvingen, wis_inschrijvingen,
+                          registreer_periode, sqlite_actief, migreer_naar_sqlite, DB_PATH)
+from utils.archief import (ARCHIEF_EXTENSIE, schrijf_archief, archief_pad, archief_naar_csv,
+                           lees_catalogus, catalogiseer_periode, herbouw_catalogus)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
 ARCHIVE_DIR = BASE_DIR / "archive"
-TRAINING1_PATH = DATA_DIR / "training1_inschrijvingen.csv"
-TRAINING2_PATH = DATA_DIR / "training2_inschrijvingen.csv"
-TRAINING3_PATH = DATA_DIR / "training3_inschrijvingen.csv"
-PERIODE_STATUS_PATH = DATA_DIR / "periode_status.json"
 
 def load_periode_status():
     """Load current period status"""
-    if PERIODE_STATUS_PATH.exists():
-        try:
-            with open(PERIODE_STATUS_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
+    status = lees_document("periode_status")
+    if status is not None:
+        return status
     
     # Default status
     return {
@@ -33,32 +28,15 @@ def load_periode_status():
 
 def save_periode_status(status):
     """Save period status"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(PERIODE_STATUS_PATH, 'w', encoding='utf-8') as f:
-        json.dump(status, f, indent=2, ensure_ascii=False)
+    schrijf_document("periode_status", status)
 
 def get_registration_counts():
-    """Get current registration counts"""
+    """Get current registration counts (live data, whatever the working period)"""
     counts = {"training1": 0, "training2": 0, "training3": 0, "total": 0}
     
-    if TRAINING1_PATH.exists():
-        try:
-            df1 = pd.read_csv(TRAINING1_PATH)
-            counts["training1"] = len(df1)
-        except:
-            pass
-    
-    if TRAINING2_PATH.exists():
+    for ronde in (1, 2, 3):
         try:
-            df2 = pd.read_csv(TRAINING2_PATH)
-            counts["training2"] = len(df2)
-        except:
-            pass
-    
-    if TRAINING3_PATH.exists():
-        try:
-            df3 = pd.read_csv(TRAINING3_PATH)
-            counts["training3"] = len(df3)
+            counts[f"training{ronde}"] = aantal_inschrijvingen(ronde, live=True)
         except:
             pass
     
@@ -73,31 +51,28 @@ def archive_current_period(period_name):
         period_dir = ARCHIVE_DIR / period_name
         os.makedirs(period_dir, exist_ok=True)
         
-        # Archive registration files
+        # Archive registrations in the compressed columnar format, including submissions not yet compacted
         files_archived = []
-        
-        if TRAINING1_PATH.exists():
-            shutil.copy2(TRAINING1_PATH, period_dir / "training1_inschrijvingen.csv")
-            files_archived.append("training1_inschrijvingen.csv")
-        
-        if TRAINING2_PATH.exists():
-            shutil.copy2(TRAINING2_PATH, period_dir / "training2_inschrijvingen.csv")
-            files_archived.append("training2_inschrijvingen.csv")
-        
-        if TRAINING3_PATH.exists():
-            shutil.copy2(TRAINING3_PATH, period_dir / "training3_inschrijvingen.csv")
-            files_archived.append("training3_inschrijvingen.csv")
+        compacteer_inschrijvingen()
+        for ronde in (1, 2, 3):
+            if inschrijvingen_aanwezig(ronde, live=True):
+                file_name = f"training{ronde}_inschrijvingen{ARCHIEF_EXTENSIE}"
+                schrijf_archief(lees_inschrijvingen(ronde, live=True), period_dir / file_name)
+                files_archived.append(file_name)
         
         # Create archive metadata
         metadata = {
             "period_name": period_name,
             "archived_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "files_archived": files_archived,
+            "format": "columnar",
             "registration_counts": get_registration_counts()
         }
         
         with open(period_dir / "metadata.json", 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
+        registreer_periode(period_name, "archive", metadata)
+        catalogiseer_periode(ARCHIVE_DIR, period_dir)
         
         return True, files_archived
     
@@ -109,17 +84,9 @@ def clear_current_registrations():
     try:
         files_cleared = []
         
-        if TRAINING1_PATH.exists():
-            os.remove(TRAINING1_PATH)
-            files_cleared.append("training1_inschrijvingen.csv")
-        
-        if TRAINING2_PATH.exists():
-            os.remove(TRAINING2_PATH)
-            files_cleared.append("training2_inschrijvingen.csv")
-        
-        if TRAINING3_PATH.exists():
-            os.remove(TRAINING3_PATH)
-            files_cleared.append("training3_inschrijvingen.csv")
+        for ronde in (1, 2, 3):
+            if wis_inschrijvingen(ronde):
+                files_cleared.append(f"training{ronde}_inschrijvingen.csv")
         
         return True, files_cleared
     
@@ -127,53 +94,38 @@ def clear_current_registrations():
         return False, str(e)
 
 def get_archived_periods():
-    """Get list of archived periods"""
+    """Get list of archived periods from the archive catalog, newest first"""
     if not ARCHIVE_DIR.exists():
         return []
     
-    periods = []
-    for item in ARCHIVE_DIR.iterdir():
-        if item.is_dir():
-            metadata_path = item / "metadata.json"
-            if metadata_path.exists():
-                try:
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    periods.append({
-                        "name": item.name,
-                        "metadata": metadata
-                    })
-                except:
-                    periods.append({
-                        "name": item.name,
-                        "metadata": {"period_name": item.name, "archived_date": "Onbekend"}
-                    })
-    
-    return sorted(periods, key=lambda x: x["metadata"].get("archived_date", ""), reverse=True)
+    periods = lees_catalogus(ARCHIVE_DIR)
+    if periods is None:
+        # No catalog yet (archives from before it existed): build it once from the folders
+        periods, _ = herbouw_catalogus(ARCHIVE_DIR)
+    return periods
 
 def restore_archived_period_for_planning(archive_name):
-    """Restore an archived period to data folder for planning purposes"""
+    """Check an archived period can be planned against; returns the archive files that will be read.
+
+    Nothing is copied: once set as working period, planning and overviews
+    read the archive files in place and live registrations stay untouched.
+    """
     try:
         archive_path = ARCHIVE_DIR / archive_name
         
         if not archive_path.exists():
             return False, "Archief map niet gevonden"
         
-        # Clear current data first
-        clear_success, cleared_files = clear_current_registrations()
-        if not clear_success:
-            return False, f"Fout bij wissen huidige data: {cleared_files}"
-        
-        # Copy archived files back to data folder
-        files_restored = []
+        files_used = []
+        for ronde in (1, 2, 3):
+            archive_file = archief_pad(archive_path, ronde)
+            if archive_file is not None:
+                files_used.append(archive_file.name)
         
-        for file_name in ["training1_inschrijvingen.csv", "training2_inschrijvingen.csv", "training3_inschrijvingen.csv"]:
-            archive_file = archive_path / file_name
-            if archive_file.exists():
-                shutil.copy2(archive_file, DATA_DIR / file_name)
-                files_restored.append(file_name)
+        if not files_used:
+            return False, "Geen aanmeldingen gevonden in dit archief"
         
-        return True, files_restored
+        return True, files_used
     
     except Exception as e:
         return False, str(e)
@@ -181,12 +133,9 @@ def restore_archived_period_for_planning(archive_name):
 def get_current_working_period():
     """Get information about the current working period (for planning)"""
     # Check if we're working with an archived period
-    if os.path.exists(DATA_DIR / "working_period.json"):
-        try:
-            with open(DATA_DIR / "working_period.json", 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
+    working_period = lees_document("working_period")
+    if working_period is not None:
+        return working_period
     
     # Default to current period
     status = load_periode_status()
@@ -198,9 +147,7 @@ def get_current_working_period():
 
 def set_working_period(period_info):
     """Set the current working period for planning"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(DATA_DIR / "working_period.json", 'w', encoding='utf-8') as f:
-        json.dump(period_info, f, indent=2, ensure_ascii=False)
+    schrijf_document("working_period", period_info)
 
 def periode_beheer():
     st.title("📅 Periode Beheer")
@@ -298,7 +245,7 @@ def periode_beheer():
                             })
                             
                             st.success(f"✅ Archief '{selected_archive}' geladen voor planning!")
-                            st.info(f"📁 Herstelde bestanden: {', '.join(result)}")
+                            st.info(f"📁 Planning leest direct uit: {', '.join(result)}")
                             st.rerun()
                         else:
                             st.error(f"❌ Fout bij laden archief: {result}")
@@ -483,23 +430,35 @@ def periode_beheer():
                 if archive_path.exists():
                     st.write("**Download bestanden:**")
                     
-                    for file_name in ["training1_inschrijvingen.csv", "training2_inschrijvingen.csv", "training3_inschrijvingen.csv"]:
-                        file_path = archive_path / file_name
-                        if file_path.exists():
+                    for ronde in (1, 2, 3):
+                        file_path = archief_pad(archive_path, ronde)
+                        file_name = f"training{ronde}_inschrijvingen.csv"
+                        if file_path is not None:
                             try:
-                                with open(file_path, 'rb') as f:
-                                    st.download_button(
-                                        label=f"📥 {file_name}",
-                                        data=f.read(),
-                                        file_name=f"{period['name']}_{file_name}",
-                                        mime="text/csv",
-                                        key=f"download_{period['name']}_{file_name}"
-                                    )
+                                # Columnar archives are converted back to CSV on demand
+                                st.download_button(
+                                    label=f"📥 {file_name}",
+                                    data=archief_naar_csv(file_path) if file_path.suffix == ARCHIEF_EXTENSIE else file_path.read_bytes(),
+                                    file_name=f"{period['name']}_{file_name}",
+                                    mime="text/csv",
+                                    key=f"download_{period['name']}_{file_name}"
+                                )
                             except:
                                 st.write(f"❌ Fout bij laden {file_name}")
     else:
         st.info("📝 Nog geen gearchiveerde periodes gevonden.")
     
+    if ARCHIVE_DIR.exists():
+        st.caption("De lijst komt uit de archiefcatalogus. Mappen handmatig toegevoegd, verwijderd of aangepast? Herstel dan de catalogus.")
+        if st.button("🔧 Catalogus herstellen", key="herbouw_catalogus"):
+            with st.spinner("Archiefmappen controleren..."):
+                _, differences = herbouw_catalogus(ARCHIVE_DIR)
+            if any(differences.values()):
+                st.success(f"✅ Catalogus hersteld: {len(differences['toegevoegd'])} toegevoegd, "
+                           f"{len(differences['verwijderd'])} verwijderd, {len(differences['gewijzigd'])} gewijzigd")
+            else:
+                st.success("✅ Catalogus klopt met de archiefmappen")
+    
     # Status summary
     st.markdown("---")
     st.subheader("📊 Status Samenvatting")
@@ -520,4 +479,25 @@ def periode_beheer():
         st.success("✅ Altijd beschikbaar")
         st.write(f"→ Werkend met: {working_period['name']}")
         if working_period["type"] == "archive":
-            st.write("→ Gearchiveerde data geladen") 
\ No newline at end of file
+            st.write("→ Gearchiveerde data geladen") 
+    # Storage backend
+    st.markdown("---")
+    with st.expander("🗄️ Opslag"):
+        if sqlite_actief():
+            st.success(f"✅ Gegevens staan in de database ({DB_PATH.name})")
+            st.caption("Verwijder tennis.db of zet TENNIS_OPSLAG=bestanden om terug te gaan naar de CSV/JSON bestanden.")
+        else:
+            st.info("📄 Gegevens staan in CSV/JSON bestanden")
+            st.write("Een SQLite database houdt inschrijvingen, trainingen, planning en archiefgegevens bij elkaar "
+                     "en laat meerdere sessies tegelijk veilig schrijven. De bestanden blijven als back-up staan.")
+            if DB_PATH.exists():
+                st.warning("⚠️ De database bestaat al maar is uitgeschakeld via TENNIS_OPSLAG=bestanden.")
+            elif st.button("🗄️ Migreer naar database", key="migreer_sqlite"):
+                try:
+                    with st.spinner("Gegevens overzetten..."):
+                        samenvatting = migreer_naar_sqlite(ARCHIVE_DIR)
+                    st.success(f"✅ Gemigreerd: {sum(samenvatting['inschrijvingen'].values())} aanmeldingen, "
+                               f"{samenvatting['trainingen']} trainingen, {samenvatting['periodes']} archiefperiodes")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Fout bij migreren: {e}")
@@ -1,32 +1,19 @@
 import streamlit as st
 import pandas as pd
-import os
-import json
-from datetime import datetime, date
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-TRAININGEN_PATH = BASE_DIR / "data" / "trainings.csv"
-TRAINING1_PATH = BASE_DIR / "data" / "training1_inschrijvingen.csv"
-TRAINING2_PATH = BASE_DIR / "data" / "training2_inschrijvingen.csv"
-TRAINING3_PATH = BASE_DIR / "data" / "training3_inschrijvingen.csv"
-PERIODE_STATUS_PATH = BASE_DIR / "data" / "periode_status.json"
+from datetime import datetime
+from utils.opslag import RONDES, lees_document, trainingen_aanwezig, lees_trainingen, sla_inschrijvingen_op, compacteer_inschrijvingen
 
 def check_registration_status():
     """Check if registrations are currently open"""
-    if PERIODE_STATUS_PATH.exists():
-        try:
-            with open(PERIODE_STATUS_PATH, 'r', encoding='utf-8') as f:
-                status = json.load(f)
-                return status.get("is_open", True), status.get("current_period", None)
-        except:
-            pass
+    status = lees_document("periode_status")
+    if status is not None:
+        return status.get("is_open", True), status.get("current_period", None)
     return True, None  # Default: open
 
 def load_available_trainings():
     """Load available training sessions from the CSV file"""
-    if os.path.exists(TRAININGEN_PATH):
-        trainings_df = pd.read_csv(TRAININGEN_PATH)
+    if trainingen_aanwezig():
+        trainings_df = lees_trainingen()
         training_options = []
         for _, row in trainings_df.iterrows():
             # Create training name based on level range
@@ -66,9 +53,12 @@ def check_permission_needed(speelsterkte, training_choices, toestemming_hoger_ni
     return permission_warnings
 
 def save_multiple_registrations(registrations_list):
-    """Save registrations to separate CSV files per training, removing duplicates based on phone number"""
-    os.makedirs("data", exist_ok=True)
+    """Save registrations to separate CSV files per training, removing duplicates based on phone number.
     
+    Registrations are appended to a log per training file (or stored in the
+    database once migrated); the admin side folds the logs into the CSV files
+    with compact_registrations().
+    """
     # Get the phone number from the first registration (all have same phone)
     phone_number = registrations_list[0]['Telefoon'] if registrations_list else None
     duplicate_found = False
@@ -81,45 +71,22 @@ def save_multiple_registrations(registrations_list):
             training_groups[training_num] = []
         training_groups[training_num].append(registration)
     
-    # Save each training to its own file
-    training_paths = {
-        1: TRAINING1_PATH,
-        2: TRAINING2_PATH,
-        3: TRAINING3_PATH
-    }
-    
     for training_num, registrations in training_groups.items():
-        if training_num in training_paths:
-            file_path = training_paths[training_num]
-            
+        if training_num in RONDES:
             # Remove Training_nummer column as it's not needed in separate files
             for reg in registrations:
                 reg.pop('Training_nummer', None)
             
-            # Convert to DataFrame
-            df_new = pd.DataFrame(registrations)
-            
-            # If file exists, remove existing registrations with same phone number
-            if os.path.exists(file_path):
-                df_existing = pd.read_csv(file_path)
-                
-                # Check if duplicate exists
-                if phone_number and 'Telefoon' in df_existing.columns:
-                    existing_count = len(df_existing[df_existing['Telefoon'] == phone_number])
-                    if existing_count > 0:
-                        duplicate_found = True
-                    df_existing = df_existing[df_existing['Telefoon'] != phone_number]
-                
-                # Combine with new registrations
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            else:
-                df_combined = df_new
-            
-            # Save to CSV
-            df_combined.to_csv(file_path, index=False)
+            # Replaces an existing registration with the same phone number
+            if sla_inschrijvingen_op(training_num, registrations, phone_number):
+                duplicate_found = True
     
     return duplicate_found
 
+def compact_registrations():
+    """Fold the registration logs into the training CSV files read by the admin pages"""
+    compacteer_inschrijvingen()
+
 def get_translations():
     """Return dictionary with all text translations"""
     return {
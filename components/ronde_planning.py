@@ -1,53 +1,37 @@
 import streamlit as st
 import pandas as pd
-import json
-import os
-from pathlib import Path
 from datetime import datetime
-from utils.logic import plan_spelers
+from utils.logic import plan_spelers, training_label, opgaves_tekst, VOORKEUR_KOLOMMEN
+from utils.optimaal import plan_spelers_optimaal, plan_rondes_optimaal
+from utils.resolver import onopgeloste_voorkeuren
+from utils.strategieen import vergelijk_strategieen, orden_volgens_strategie
+from utils.timing import planning_run, stap, run_info, recente_runs, timing_actief, zet_timing
+from utils.leescache import gecached, statistieken as leescache_statistieken
+from utils.export import (FORMATEN as EXPORT_FORMATEN, ROOSTER_KOLOMMEN as EXPORT_ROOSTER_KOLOMMEN, exporteer,
+                          bestandsnaam as export_bestandsnaam)
+from utils.planningweergave import weergave, voorbeeld, openstaand, bereken as bereken_weergave
+from utils.importeer import dubbel_sleutel
+from utils.wachtlijst import bouw_wachtlijst, niet_meer_wachtend, promoveer, wachtenden
+from utils.opslag import (lees_planning_status, schrijf_planning_status, planning_journaal, lees_inschrijvingen, inschrijvingen_aanwezig,
+                          inschrijvingen_bron, aantal_inschrijvingen, lees_trainingen, trainingen_aanwezig,
+                          lees_document, schrijf_document, WACHTLIJST_DOCUMENT)
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-TRAINING1_PATH = BASE_DIR / "data" / "training1_inschrijvingen.csv"
-TRAINING2_PATH = BASE_DIR / "data" / "training2_inschrijvingen.csv"
-TRAINING3_PATH = BASE_DIR / "data" / "training3_inschrijvingen.csv"
-TRAININGEN_PATH = BASE_DIR / "data" / "trainings.csv"
-RONDE_STATUS_PATH = BASE_DIR / "data" / "ronde_planning_status.json"
+
+# Registration columns that decide a placement; a change in any of them gets a person replanned
+FINGERPRINT_COLUMNS = ["Naam", "Niveau"] + VOORKEUR_KOLOMMEN
+
+# Available planning engines: key -> (label, planner)
+PLANNING_METHODES = {
+    "greedy": ("Wie het eerst komt (inschrijfdatum)", plan_spelers),
+    "optimaal": ("Optimaal (zoveel mogelijk mensen ingepland)", plan_spelers_optimaal),
+}
 
 def load_ronde_status():
     """Load the current round planning status"""
-    if RONDE_STATUS_PATH.exists():
-        try:
-            with open(RONDE_STATUS_PATH, 'r', encoding='utf-8') as f:
-                status = json.load(f)
-                
-                # Clean up duplicate entries in planning history
-                if "planning_history" in status:
-                    seen_rounds = {}
-                    cleaned_history = []
-                    
-                    for round_data in status["planning_history"]:
-                        round_num = round_data.get("round")
-                        if round_num not in seen_rounds:
-                            cleaned_history.append(round_data)
-                            seen_rounds[round_num] = True
-                        else:
-                            # Keep the most recent timestamp for this round
-                            existing_index = next(i for i, r in enumerate(cleaned_history) if r.get("round") == round_num)
-                            existing_timestamp = cleaned_history[existing_index].get("timestamp", "")
-                            current_timestamp = round_data.get("timestamp", "")
-                            
-                            if current_timestamp > existing_timestamp:
-                                cleaned_history[existing_index] = round_data
-                    
-                    status["planning_history"] = cleaned_history
-                    
-                    # Save cleaned status
-                    with open(RONDE_STATUS_PATH, 'w', encoding='utf-8') as f:
-                        json.dump(status, f, indent=2, ensure_ascii=False)
-                
-                return status
-        except:
-            pass
+    # Duplicate rounds can't occur: the stored form keys rounds by number
+    status = lees_planning_status()
+    if status is not None:
+        return status
     
     # Default status
     return {
@@ -58,30 +42,32 @@ def load_ronde_status():
         "planning_history": []
     }
 
-def save_ronde_status(status):
-    """Save the round planning status"""
-    os.makedirs("data", exist_ok=True)
-    with open(RONDE_STATUS_PATH, 'w', encoding='utf-8') as f:
-        json.dump(status, f, indent=2, ensure_ascii=False)
+def save_ronde_status(status, event, **details):
+    """Save the round planning status as a journal event (e.g. "handmatig_toegewezen", ronde=1, naam=...)"""
+    with stap("save_ronde_status"):
+        schrijf_planning_status(status, event, details)
+
+def load_wachtlijsten():
+    """Load the waitlists per round, {"1": wachtlijst, ...}"""
+    return lees_document(WACHTLIJST_DOCUMENT, {})
+
+def save_wachtlijsten(wachtlijsten):
+    """Save the waitlists next to the round planning status"""
+    with stap("save_wachtlijsten"):
+        schrijf_document(WACHTLIJST_DOCUMENT, wachtlijsten)
 
 def get_available_people_for_round(round_num, status):
     """Get people available for planning in the current round"""
     
-    # Load the appropriate CSV based on round
-    if round_num == 1:
-        csv_path = TRAINING1_PATH
-    elif round_num == 2:
-        csv_path = TRAINING2_PATH
-    elif round_num == 3:
-        csv_path = TRAINING3_PATH
-    else:
+    # Load the registrations of this round
+    if round_num not in (1, 2, 3) or not inschrijvingen_aanwezig(round_num):
         return pd.DataFrame()
     
-    if not csv_path.exists():
+    with stap("lees_inschrijvingen"):
+        df = lees_inschrijvingen(round_num)
+    if len(df) == 0:
         return pd.DataFrame()
     
-    df = pd.read_csv(csv_path)
-    
     # Only filter out manually excluded people
     # Don't filter based on previous round assignments because:
     # - Each round reads from a different CSV file
@@ -94,6 +80,400 @@ def get_available_people_for_round(round_num, status):
     
     return available
 
+def filter_people_for_round(available_people, round_num):
+    """Keep only the people whose training frequency needs this round"""
+    if round_num == 1:
+        # Ronde 1: Iedereen (1x, 2x, 3x per week)
+        return available_people.copy(), "Alle mensen die zich hebben aangemeld (1x, 2x of 3x per week)"
+    
+    if round_num == 2:
+        # Ronde 2: Alleen mensen die 2x of 3x per week willen
+        frequencies = ['2x per week', '3x per week']
+        round_info = "Mensen die 2x of 3x per week willen trainen"
+    else:
+        # Ronde 3: Alleen mensen die 3x per week willen
+        frequencies = ['3x per week']
+        round_info = "Mensen die 3x per week willen trainen"
+    
+    if 'Trainingen_per_week' in available_people.columns:
+        return available_people[available_people['Trainingen_per_week'].isin(frequencies)], round_info
+    return available_people.copy(), round_info
+
+def apply_previous_round_capacity(trainingen_df, status, current_round):
+    """Reduce training capacities by the automatic assignments of earlier rounds"""
+    return reduce_capacity_for_rounds(trainingen_df, status, lambda round_num: round_num < current_round)
+
+def reduce_capacity_for_rounds(trainingen_df, status, include_round):
+    """Reduce training capacities by the assignments of every round for which include_round(round) holds"""
+    taken = {}
+    for round_data in status.get("planning_history", []):
+        if include_round(round_data["round"]):
+            for training_name, people in round_data.get("assigned_by_training", {}).items():
+                taken[training_name] = taken.get(training_name, 0) + len(people)
+    return capacity_left(trainingen_df, taken)
+
+def capacity_left(trainingen_df, occupied):
+    """Training capacities minus the placements in occupied ({training: count})"""
+    trainingen_copy = trainingen_df.copy()
+    if occupied:
+        labels = pd.Series([training_label(row) for _, row in trainingen_copy.iterrows()], index=trainingen_copy.index)
+        reduction = labels.map(occupied).fillna(0)
+        trainingen_copy['Capaciteit'] = (trainingen_copy['Capaciteit'] - reduction).clip(lower=0)
+    return trainingen_copy
+
+def registration_fingerprints(people_df):
+    """{key: [name, hash]} of the people of a round.
+    
+    The key is the phone number (or the name without one), the hash covers the
+    columns that decide a placement, so a changed level or preference shows up
+    as a changed fingerprint.
+    """
+    if len(people_df) == 0:
+        return {}
+    columns = [col for col in FINGERPRINT_COLUMNS if col in people_df.columns]
+    hashes = pd.util.hash_pandas_object(people_df[columns].astype(str), index=False)
+    return {key: [name, int(h)] for key, name, h in zip(dubbel_sleutel(people_df), people_df["Naam"], hashes)}
+
+def current_fingerprints(round_num):
+    """Fingerprints of the people a round would plan now, {key: [name, hash, row position]}.
+    
+    Computed once per change of the registrations and shared; don't change the result.
+    """
+    def compute():
+        df = lees_inschrijvingen(round_num)
+        if len(df) == 0:
+            return {}
+        people, _ = filter_people_for_round(df.reset_index(drop=True), round_num)
+        return {key: [name, h, pos] for (key, (name, h)), pos in zip(registration_fingerprints(people).items(), people.index)}
+    
+    sleutel, identiteit = inschrijvingen_bron(round_num)
+    return gecached(f"{sleutel} (vingerafdrukken ronde {round_num})", identiteit, compute)
+
+def build_round_result(round_num, planning, handmatig, working_period, methode, people_df=None, strategie=None):
+    """Create the planning_history entry for a planned round.
+
+    people_df are the people it was planned for; strategie is the ordering
+    from the strategy comparison the planning was picked from, if any.
+    """
+    round_result = {
+        "round": round_num,
+        "timestamp": datetime.now().isoformat(),
+        "assigned_by_training": planning,
+        "manual_needed": handmatig,
+        "assigned": [],
+        "working_period": working_period["name"],
+        "period_type": working_period["type"],
+        "methode": methode
+    }
+    if strategie is not None:
+        round_result["strategie"] = strategie
+    if people_df is not None:
+        # What each person's registration looked like, so later changes can be found
+        round_result["aanmeldingen"] = registration_fingerprints(people_df)
+    
+    # Convert planning to assigned list
+    for training, people in planning.items():
+        for name, level in people:
+            round_result["assigned"].append({
+                "name": name,
+                "level": level,
+                "training": training
+            })
+    
+    return round_result
+
+def store_round_result(status, round_result):
+    """Replace the round in planning_history, or add it if it is new"""
+    for i, round_data in enumerate(status.get("planning_history", [])):
+        if round_data["round"] == round_result["round"]:
+            status["planning_history"][i] = round_result
+            return
+    status.setdefault("planning_history", []).append(round_result)
+
+def load_all_rounds(status):
+    """The people to plan in each round, {round: people_df}, skipping rounds without registrations"""
+    rounds = {}
+    for round_num in (1, 2, 3):
+        available_people = get_available_people_for_round(round_num, status)
+        if len(available_people) > 0:
+            rounds[round_num] = filter_people_for_round(available_people, round_num)[0]
+    return rounds
+
+def plan_all_rounds(status, trainingen_df, working_period, methode="greedy"):
+    """Plan the first, second and third trainings of everyone in one go.
+    
+    Replaces all existing planning (including manual assignments) and returns the
+    new status; the caller saves it once. The greedy method runs the rounds one
+    after another in memory, the optimal method solves all rounds together.
+    """
+    new_status = {
+        "current_round": 3,
+        "rounds_completed": [1, 2],
+        "manual_assignments": {},
+        "excluded_people": status.get("excluded_people", []),
+        "planning_history": []
+    }
+    
+    rounds = load_all_rounds(new_status)
+    
+    if methode == "optimaal":
+        results = plan_rondes_optimaal({r: df for r, df in rounds.items() if len(df) > 0}, trainingen_df)
+        for round_num in sorted(results):
+            planning, handmatig = results[round_num]
+            store_round_result(new_status, build_round_result(round_num, planning, handmatig, working_period, methode,
+                                                              rounds[round_num]))
+    else:
+        for round_num in sorted(rounds):
+            trainingen_copy = apply_previous_round_capacity(trainingen_df, new_status, round_num)
+            planning, handmatig = plan_single_round(rounds[round_num], trainingen_copy, round_num, new_status, methode)
+            store_round_result(new_status, build_round_result(round_num, planning, handmatig, working_period, methode,
+                                                              rounds[round_num]))
+    
+    return new_status
+
+def trainings_in_other_rounds(status, round_num):
+    """Trainings each person has in rounds other than round_num, automatic and manual"""
+    people_training_map = {}
+    for round_data in status.get("planning_history", []):
+        if round_data["round"] == round_num:
+            continue
+        for training, people in round_data.get("assigned_by_training", {}).items():
+            for name, level in people:
+                people_training_map.setdefault(name, []).append(training)
+        for assignment in status.get("manual_assignments", {}).get(str(round_data["round"]), []):
+            people_training_map.setdefault(assignment["name"], []).append(assignment["training"])
+    return people_training_map
+
+def rebuild_waitlists(status, trainingen_df, wachtlijsten, rounds=(1, 2, 3)):
+    """Rebuild the waitlists of planned rounds from their manual-needed lists"""
+    for round_num in rounds:
+        round_data = next((r for r in status.get("planning_history", []) if r["round"] == round_num), None)
+        if round_data is None:
+            wachtlijsten.pop(str(round_num), None)
+            continue
+        people_df, _ = filter_people_for_round(get_available_people_for_round(round_num, status), round_num)
+        wachtlijsten[str(round_num)] = bouw_wachtlijst(people_df, trainingen_df, round_data.get("manual_needed", []),
+                                                      trainings_in_other_rounds(status, round_num))
+    return wachtlijsten
+
+def release_spot(status, round_num, training, wachtlijst):
+    """A spot in training freed up: place the next person from its waitlist.
+    
+    The promoted person moves from manual_needed into the planning of the
+    round. Returns their name, or None if nobody was waiting.
+    """
+    round_data = next((r for r in status.get("planning_history", []) if r["round"] == round_num), None)
+    if round_data is None or not wachtlijst:
+        return None
+    promoted = promoveer(wachtlijst, training)
+    if promoted is None:
+        return None
+    name, level = promoted
+    round_data.setdefault("assigned_by_training", {}).setdefault(training, []).append([name, level])
+    round_data.setdefault("assigned", []).append({"name": name, "level": level, "training": training})
+    round_data["manual_needed"] = [e for e in round_data.get("manual_needed", []) if e[0] != name]
+    return name
+
+def remove_from_training(status, round_num, name):
+    """Take a person out of their placement in a round, automatic or manual; returns (freed training, level) or (None, None)"""
+    round_data = next((r for r in status.get("planning_history", []) if r["round"] == round_num), None)
+    if round_data is None:
+        return None, None
+    manual = status.get("manual_assignments", {})
+    if str(round_num) in manual:
+        kept = [a for a in manual[str(round_num)] if a["name"] != name]
+        if kept:
+            manual[str(round_num)] = kept
+        else:
+            del manual[str(round_num)]
+    for training, people in list(round_data.get("assigned_by_training", {}).items()):
+        kept = [p for p in people if p[0] != name]
+        if len(kept) != len(people):
+            if kept:
+                round_data["assigned_by_training"][training] = kept
+            else:
+                del round_data["assigned_by_training"][training]
+            round_data["assigned"] = [a for a in round_data.get("assigned", []) if a["name"] != name]
+            return training, next(p[1] for p in people if p[0] == name)
+    return None, None
+
+def exclude_from_planning(status, name, wachtlijsten):
+    """Exclude a person from the planning: out of every planned round, their freed spots go to the waitlists.
+
+    Returns [(round, freed training, promoted name or None)].
+    """
+    if name not in status.setdefault("excluded_people", []):
+        status["excluded_people"].append(name)
+    # They must not come back through a waitlist either
+    for wachtlijst in wachtlijsten.values():
+        niet_meer_wachtend(wachtlijst, name)
+    freed = []
+    for round_data in status.get("planning_history", []):
+        round_num = round_data["round"]
+        round_data["manual_needed"] = [e for e in round_data.get("manual_needed", []) if e[0] != name]
+        training, _ = remove_from_training(status, round_num, name)
+        while training is not None:
+            freed.append((round_num, training, release_spot(status, round_num, training, wachtlijsten.get(str(round_num)))))
+            training, _ = remove_from_training(status, round_num, name)
+    return freed
+
+def detect_round_changes(round_num, status):
+    """Compare a planned round with the current registrations.
+    
+    Returns (added_df, removed_names, changed_df): registrations that are not
+    part of the planning yet, planned people that are no longer registered (or
+    were excluded, or changed their name), and registrations whose level or
+    preferences changed since the round was planned. Registrations are
+    matched on phone number, or on name without one, using the fingerprints
+    stored with the round. Returns (None, [], None) if the round has not been
+    planned.
+    """
+    round_data = next((r for r in status.get("planning_history", []) if r["round"] == round_num), None)
+    if round_data is None:
+        return None, [], None
+    
+    excluded = set(status.get("excluded_people", []))
+    current = current_fingerprints(round_num)
+    stored = round_data.get("aanmeldingen")
+    df = lees_inschrijvingen(round_num)
+    
+    if stored is None:
+        # Planned before fingerprints were kept: only additions and removals by name can be found
+        planned_names = set()
+        for people in round_data.get("assigned_by_training", {}).values():
+            planned_names.update(name for name, level in people)
+        planned_names.update(entry[0] for entry in round_data.get("manual_needed", []))
+        planned_names.update(a["name"] for a in status.get("manual_assignments", {}).get(str(round_num), []))
+        current_names = {name for name, h, pos in current.values() if name not in excluded}
+        added = [pos for name, h, pos in current.values() if name not in excluded and name not in planned_names]
+        return df.iloc[added], sorted(planned_names - current_names), df.iloc[[]]
+    
+    added, changed, removed = [], [], set()
+    for key, (name, h, pos) in current.items():
+        if name in excluded:
+            continue
+        before = stored.get(key)
+        if before is None:
+            added.append(pos)
+        elif before[1] != h:
+            changed.append(pos)
+            if before[0] != name:
+                removed.add(before[0])
+    for key, (name, h) in stored.items():
+        entry = current.get(key)
+        if entry is None or entry[0] in excluded:
+            removed.add(name)
+    return df.iloc[added], sorted(removed), df.iloc[changed]
+
+def replan_round_incremental(status, round_num, trainingen_df, added_df=None, removed_names=(), changed_df=None,
+                             wachtlijst=None, view=None):
+    """Update an already planned round for a delta of registrations, without replanning it.
+    
+    removed_names are taken out of the planning, freeing their spot; with a
+    wachtlijst each freed spot first goes to the next person waiting for it.
+    added_df and changed_df rows are planned into the remaining capacity with
+    the round's own planning method. Only the planner runs on the delta; the rest
+    is bookkeeping on the affected people. Manual placements are never
+    touched: changes for manually placed people are skipped.
+    view is planningweergave.weergave() of the status as stored before this
+    update; its occupancy and per-person trainings are adjusted for the delta
+    instead of walking the whole planning. Returns a summary dict; the caller
+    saves the status. Raises ValueError, before changing anything, if the
+    round was planned with a method that isn't in PLANNING_METHODES.
+    """
+    summary = {"removed": [], "assigned": [], "manual_needed": [], "skipped_manual": [], "promoted": []}
+    round_data = next((r for r in status.get("planning_history", []) if r["round"] == round_num), None)
+    if round_data is None:
+        return summary
+    # New people are planned the way the round was; rounds from before methode was stored were greedy
+    methode, strategie = round_data.get("methode", "greedy"), round_data.get("strategie")
+    if methode not in PLANNING_METHODES:
+        raise ValueError(f"Ronde {round_num} is gepland met een onbekende methode: {methode}")
+    
+    if view is None:
+        view = bereken_weergave(status)
+    occupied = dict(view["bezetting"])
+    
+    manual_names = {a["name"] for a in status.get("manual_assignments", {}).get(str(round_num), [])}
+    frames = [df for df in (added_df, changed_df) if df is not None and len(df) > 0]
+    new_people = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    # Changed registrations are replanned: their old placement is taken out first
+    to_remove = set(removed_names)
+    if changed_df is not None and len(changed_df) > 0:
+        to_remove.update(changed_df["Naam"])
+    new_names = set(new_people["Naam"]) if len(new_people) > 0 else set()
+    summary["skipped_manual"] = sorted(manual_names & (to_remove | new_names))
+    to_remove -= manual_names
+    if len(new_people) > 0:
+        new_people = new_people[~new_people["Naam"].isin(manual_names)]
+    
+    # Remove people from the automatic planning and the manual-needed list
+    freed = []
+    if to_remove:
+        for training, people in list(round_data.get("assigned_by_training", {}).items()):
+            kept = [p for p in people if p[0] not in to_remove]
+            if len(kept) != len(people):
+                summary["removed"].extend(p[0] for p in people if p[0] in to_remove)
+                freed.extend([training] * (len(people) - len(kept)))
+                occupied[training] = occupied.get(training, 0) - (len(people) - len(kept))
+                if kept:
+                    round_data["assigned_by_training"][training] = kept
+                else:
+                    del round_data["assigned_by_training"][training]
+        round_data["assigned"] = [a for a in round_data.get("assigned", []) if a["name"] not in to_remove]
+        round_data["manual_needed"] = [e for e in round_data.get("manual_needed", []) if e[0] not in to_remove]
+        if wachtlijst:
+            for name in to_remove:
+                niet_meer_wachtend(wachtlijst, name)
+    
+    # Freed spots go to the waitlist before any new registration
+    for training in freed:
+        promoted = release_spot(status, round_num, training, wachtlijst)
+        if promoted:
+            summary["promoted"].append((promoted, training))
+            occupied[training] = occupied.get(training, 0) + 1
+    
+    if len(new_people) > 0:
+        # Capacity left after every round, including what is still planned in this one
+        remaining = capacity_left(trainingen_df, occupied)
+        
+        # Trainings the new people already have in other rounds
+        people_training_map = {name: [training for other, training in view["per_speler"].get(name, []) if other != round_num]
+                               for name in new_names}
+        
+        to_plan = orden_volgens_strategie(new_people, trainingen_df, strategie) if strategie else new_people.copy()
+        planning, handmatig = PLANNING_METHODES[methode][1](to_plan, remaining)
+        
+        for training, people in planning.items():
+            for name, level in people:
+                if training in people_training_map.get(name, []):
+                    person = new_people[new_people["Naam"] == name].iloc[0]
+                    opgaves = opgaves_tekst([person.get(col) for col in VOORKEUR_KOLOMMEN])
+                    handmatig.append((name, level, opgaves, f"Al toegewezen aan {training} in andere ronde"))
+                    continue
+                round_data.setdefault("assigned_by_training", {}).setdefault(training, []).append([name, level])
+                round_data.setdefault("assigned", []).append({"name": name, "level": level, "training": training})
+                summary["assigned"].append((name, training))
+        
+        round_data.setdefault("manual_needed", []).extend(handmatig)
+        summary["manual_needed"] = [entry[0] for entry in handmatig]
+    
+    # Only the fingerprints of the people in the delta change
+    if round_data.get("aanmeldingen") is not None:
+        fingerprints = round_data["aanmeldingen"]
+        for key, (name, h) in list(fingerprints.items()):
+            if name in to_remove:
+                del fingerprints[key]
+        if len(new_people) > 0:
+            fingerprints.update(registration_fingerprints(new_people))
+    elif len(new_people) > 0 or to_remove:
+        # Planned before fingerprints were kept: start keeping them from here
+        round_data["aanmeldingen"] = {key: [name, h] for key, (name, h, pos) in current_fingerprints(round_num).items()}
+    
+    round_data["last_incremental_update"] = datetime.now().isoformat()
+    return summary
+
 def get_people_already_assigned_to_trainings(status, current_round):
     """Get a dictionary of people already assigned to specific trainings in previous rounds"""
     people_training_map = {}  # person_name -> [list of training names]
@@ -156,22 +536,26 @@ def filter_people_for_available_trainings(people_df, trainingen_df, people_train
     else:
         return pd.DataFrame()
 
-def plan_single_round(people_df, trainingen_df, round_num, status):
-    """Plan a single round using the existing logic, but prevent duplicate training assignments"""
+def plan_single_round(people_df, trainingen_df, round_num, status, methode="greedy"):
+    """Plan a single round using the chosen planning engine, but prevent duplicate training assignments"""
     if len(people_df) == 0:
         return {}, []
     
     # Get people already assigned to trainings in previous rounds
-    people_training_map = get_people_already_assigned_to_trainings(status, round_num)
+    with stap("get_people_already_assigned_to_trainings"):
+        people_training_map = get_people_already_assigned_to_trainings(status, round_num)
     
     # Filter people who can still be assigned to available trainings
-    filtered_people = filter_people_for_available_trainings(people_df, trainingen_df, people_training_map)
+    with stap("filter_people_for_available_trainings"):
+        filtered_people = filter_people_for_available_trainings(people_df, trainingen_df, people_training_map)
     
     if len(filtered_people) == 0:
         return {}, []
     
-    # Use the existing planning logic with filtered people
-    planning, handmatig = plan_spelers(filtered_people, trainingen_df)
+    # Use the selected planning logic with filtered people
+    planner = PLANNING_METHODES.get(methode, PLANNING_METHODES["greedy"])[1]
+    with stap(planner.__name__):
+        planning, handmatig = planner(filtered_people, trainingen_df)
     
     # Additional check: remove people from planning if they're already assigned to that training
     cleaned_planning = {}
@@ -195,6 +579,10 @@ def plan_single_round(people_df, trainingen_df, round_num, status):
     return cleaned_planning, handmatig
 
 def ronde_planning_systeem():
+    with planning_run("ronde_planning"):
+        _ronde_planning_pagina()
+
+def _ronde_planning_pagina():
     st.title("🎯 Ronde-gebaseerde Planning")
     
     # Import periode management functions
@@ -236,16 +624,20 @@ def ronde_planning_systeem():
     """)
     
     # Load current status
-    status = load_ronde_status()
+    with stap("load_ronde_status"):
+        status = load_ronde_status()
+        wachtlijsten = load_wachtlijsten()
     current_round = status["current_round"]
+    run_info(ronde=current_round)
     
     # Check if training files exist
-    if not TRAININGEN_PATH.exists():
+    if not trainingen_aanwezig():
         st.error("❌ Trainingen bestand niet gevonden in 'data/' map.")
         st.info("💡 Zorg ervoor dat je trainingen hebt gedefinieerd in de Trainingsbeheer sectie.")
         return
     
-    trainingen = pd.read_csv(TRAININGEN_PATH)
+    with stap("lees_trainingen"):
+        trainingen = lees_trainingen()
     
     # Quick status overview
     st.markdown("---")
@@ -269,11 +661,10 @@ def ronde_planning_systeem():
     with col4:
         # Count total registrations
         total_regs = 0
-        for path in [TRAINING1_PATH, TRAINING2_PATH, TRAINING3_PATH]:
-            if path.exists():
+        with stap("registratie_telling"):
+            for round_num in (1, 2, 3):
                 try:
-                    df = pd.read_csv(path)
-                    total_regs += len(df)
+                    total_regs += aantal_inschrijvingen(round_num)
                 except:
                     pass
         st.metric("Totaal Registraties", total_regs)
@@ -307,6 +698,28 @@ def ronde_planning_systeem():
     
     st.markdown("---")
     
+    # Plan all rounds in one go
+    with st.expander("⚡ Alle rondes in één keer plannen"):
+        st.write("Plant de eerste, tweede en derde training van iedereen in één keer. "
+                 "Niemand wordt twee keer in dezelfde training ingepland.")
+        st.warning("⚠️ Dit vervangt alle bestaande planning, inclusief handmatige toewijzingen.")
+        joint_methode = st.radio(
+            "Planningsmethode:",
+            options=list(PLANNING_METHODES.keys()),
+            format_func=lambda m: PLANNING_METHODES[m][0],
+            horizontal=True,
+            key="planning_methode_alle_rondes"
+        )
+        if st.button("⚡ Plan Alle Rondes"):
+            run_info(actie="plan_all_rounds", methode=joint_methode)
+            with st.spinner("Alle rondes worden gepland..."):
+                with stap("plan_all_rounds"):
+                    new_status = plan_all_rounds(status, trainingen, working_period, joint_methode)
+                save_ronde_status(new_status, "alle_rondes_gepland", methode=joint_methode)
+                save_wachtlijsten(rebuild_waitlists(new_status, trainingen, {}))
+            st.success("✅ Alle rondes gepland!")
+            st.rerun()
+    
     # Show current round planning
     if current_round <= 3:
         round_descriptions = {
@@ -345,32 +758,12 @@ def ronde_planning_systeem():
                 if st.button(f"⏭️ Ga naar Ronde {current_round + 1}"):
                     status["rounds_completed"].append(current_round)
                     status["current_round"] = current_round + 1
-                    save_ronde_status(status)
+                    save_ronde_status(status, "ronde_afgerond", ronde=current_round)
                     st.rerun()
         else:
             # Filter people based on their training frequency for this round
-            if current_round == 1:
-                # Ronde 1: Iedereen (1x, 2x, 3x per week)
-                filtered_people = available_people.copy()
-                round_info = "Alle mensen die zich hebben aangemeld (1x, 2x of 3x per week)"
-            elif current_round == 2:
-                # Ronde 2: Alleen mensen die 2x of 3x per week willen
-                if 'Trainingen_per_week' in available_people.columns:
-                    filtered_people = available_people[
-                        available_people['Trainingen_per_week'].isin(['2x per week', '3x per week'])
-                    ]
-                else:
-                    filtered_people = available_people.copy()
-                round_info = "Mensen die 2x of 3x per week willen trainen"
-            else:  # current_round == 3
-                # Ronde 3: Alleen mensen die 3x per week willen
-                if 'Trainingen_per_week' in available_people.columns:
-                    filtered_people = available_people[
-                        available_people['Trainingen_per_week'] == '3x per week'
-                    ]
-                else:
-                    filtered_people = available_people.copy()
-                round_info = "Mensen die 3x per week willen trainen"
+            with stap("filter_people_for_round"):
+                filtered_people, round_info = filter_people_for_round(available_people, current_round)
             
             if len(filtered_people) == 0:
                 st.info(f"📋 Geen mensen beschikbaar voor deze ronde ({round_info})")
@@ -378,7 +771,7 @@ def ronde_planning_systeem():
                     if st.button(f"⏭️ Ga naar Ronde {current_round + 1}"):
                         status["rounds_completed"].append(current_round)
                         status["current_round"] = current_round + 1
-                        save_ronde_status(status)
+                        save_ronde_status(status, "ronde_afgerond", ronde=current_round)
                         st.rerun()
             else:
                 st.info(f"📋 {len(filtered_people)} mensen beschikbaar voor planning ({round_info})")
@@ -389,65 +782,85 @@ def ronde_planning_systeem():
                     available_cols = [col for col in display_cols if col in filtered_people.columns]
                     st.dataframe(filtered_people[available_cols], use_container_width=True, hide_index=True)
                 
+                # Preferences that don't match a training fall back to matching on the day only
+                unresolved = onopgeloste_voorkeuren(filtered_people, trainingen)
+                if unresolved:
+                    with st.expander(f"⚠️ {len(unresolved)} voorkeuren niet herkend"):
+                        st.write("Deze voorkeuren komen niet overeen met een training en worden alleen op dag gematcht:")
+                        df_unresolved = pd.DataFrame(
+                            [(text, reason, count) for text, (reason, count) in unresolved.items()],
+                            columns=["Voorkeur", "Reden", "Aantal"]
+                        )
+                        st.dataframe(df_unresolved, use_container_width=True, hide_index=True)
+                
+                # Choose planning engine
+                methode = st.radio(
+                    "Planningsmethode:",
+                    options=list(PLANNING_METHODES.keys()),
+                    format_func=lambda m: PLANNING_METHODES[m][0],
+                    horizontal=True,
+                    key=f"planning_methode_{current_round}",
+                    help="Optimaal plant zoveel mogelijk mensen in en houdt daarbij rekening met alle drie de voorkeuren"
+                )
+                
+                # Compare planning strategies before committing the round
+                with st.expander("🧪 Vergelijk planningsstrategieën"):
+                    st.write("Plant deze ronde met verschillende volgordes (inschrijfdatum, loting, niveau, minste opties) "
+                             "en de optimale methode, zodat je de beste uitkomst kunt kiezen.")
+                    results_key = f"strategy_results_{current_round}"
+                    if st.button("🧪 Vergelijk strategieën", key=f"compare_strategies_{current_round}"):
+                        with st.spinner("Strategieën worden vergeleken..."):
+                            trainingen_copy = apply_previous_round_capacity(trainingen, status, current_round)
+                            st.session_state[results_key] = vergelijk_strategieen(filtered_people, trainingen_copy, current_round, status)
+                    
+                    results = st.session_state.get(results_key)
+                    if results:
+                        df_results = pd.DataFrame([{
+                            "Strategie": r["omschrijving"],
+                            "Ingepland": r["geplaatst"],
+                            "% Eerste keuze": r["eerste_keuze_pct"],
+                            "Handmatig nodig": r["handmatig"]
+                        } for r in results])
+                        st.dataframe(df_results, use_container_width=True, hide_index=True)
+                        
+                        chosen = st.selectbox(
+                            "Kies een strategie:",
+                            options=range(len(results)),
+                            format_func=lambda i: results[i]["omschrijving"],
+                            key=f"chosen_strategy_{current_round}"
+                        )
+                        if st.button("✅ Gebruik deze planning", key=f"use_strategy_{current_round}"):
+                            result = results[chosen]
+                            round_result = build_round_result(current_round, result["planning"], result["manual_needed"],
+                                                              working_period, result["methode"], filtered_people,
+                                                              strategie=result["strategie"])
+                            store_round_result(status, round_result)
+                            save_ronde_status(status, "ronde_gepland", ronde=current_round, methode=result["methode"],
+                                              strategie=result["strategie"])
+                            save_wachtlijsten(rebuild_waitlists(status, trainingen, wachtlijsten, [current_round]))
+                            del st.session_state[results_key]
+                            st.success(f"✅ Ronde {current_round} gepland met: {result['omschrijving']}")
+                            st.rerun()
+                
                 # Plan this round
                 if st.button(f"🚀 Start Ronde {current_round} Planning", type="primary"):
+                    run_info(actie="plan_single_round", methode=methode, mensen=len(filtered_people))
                     with st.spinner(f"Planning Ronde {current_round}..."):
-                        # Make a copy of trainingen for this round
-                        trainingen_copy = trainingen.copy()
-                        
                         # Apply previous round capacity reductions
-                        for round_data in status.get("planning_history", []):
-                            if round_data["round"] < current_round:
-                                for training_name, people in round_data.get("assigned_by_training", {}).items():
-                                    # Find matching training and reduce capacity
-                                    for idx, row in trainingen_copy.iterrows():
-                                        # Create training label based on available columns
-                                        if 'Training Naam' in row and pd.notna(row['Training Naam']):
-                                            training_label = f"{row['Dag']} {row['Tijd']} - {row['Training Naam']}"
-                                        else:
-                                            trainer_text = f" - {row['Trainer']}" if pd.notna(row['Trainer']) and row['Trainer'].strip() else ""
-                                            training_label = f"{row['Dag']} {row['Tijd']}{trainer_text}"
-                                        
-                                        if training_label == training_name:
-                                            trainingen_copy.at[idx, 'Capaciteit'] = max(0, trainingen_copy.at[idx, 'Capaciteit'] - len(people))
+                        with stap("apply_previous_round_capacity"):
+                            trainingen_copy = apply_previous_round_capacity(trainingen, status, current_round)
                         
                         # Plan this round with filtered people
-                        planning, handmatig = plan_single_round(filtered_people, trainingen_copy, current_round, status)
-                        
-                        # Check if this round already exists in planning history
-                        existing_round_index = None
-                        for i, round_data in enumerate(status.get("planning_history", [])):
-                            if round_data["round"] == current_round:
-                                existing_round_index = i
-                                break
-                        
-                        # Store results
-                        round_result = {
-                            "round": current_round,
-                            "timestamp": datetime.now().isoformat(),
-                            "assigned_by_training": planning,
-                            "manual_needed": handmatig,
-                            "assigned": [],
-                            "working_period": working_period["name"],
-                            "period_type": working_period["type"]
-                        }
-                        
-                        # Convert planning to assigned list
-                        for training, people in planning.items():
-                            for name, level in people:
-                                round_result["assigned"].append({
-                                    "name": name,
-                                    "level": level,
-                                    "training": training
-                                })
+                        with stap("plan_single_round"):
+                            planning, handmatig = plan_single_round(filtered_people, trainingen_copy, current_round, status, methode)
                         
-                        # Update status - replace existing round or add new one
-                        if existing_round_index is not None:
-                            status["planning_history"][existing_round_index] = round_result
-                        else:
-                            status["planning_history"].append(round_result)
+                        # Store results - replace existing round or add new one
+                        round_result = build_round_result(current_round, planning, handmatig, working_period, methode,
+                                                          filtered_people)
+                        store_round_result(status, round_result)
                         
-                        save_ronde_status(status)
+                        save_ronde_status(status, "ronde_gepland", ronde=current_round, methode=methode)
+                        save_wachtlijsten(rebuild_waitlists(status, trainingen, wachtlijsten, [current_round]))
                         
                         st.success(f"✅ Ronde {current_round} planning voltooid!")
                         st.rerun()
@@ -490,17 +903,8 @@ def ronde_planning_systeem():
                 
                 # Show people needing manual assignment (filter out already assigned people)
                 if round_data.get("manual_needed"):
-                    # Get list of people already manually assigned in this round
-                    manual_assignments = status.get("manual_assignments", {}).get(str(round_num), [])
-                    assigned_names = set(assignment["name"] for assignment in manual_assignments)
-                    
-                    # Filter out people who are already manually assigned
-                    manual_needed_data = round_data["manual_needed"]
-                    filtered_manual_needed = []
-                    for entry in manual_needed_data:
-                        person_name = entry[0]  # First element is always the name
-                        if person_name not in assigned_names:
-                            filtered_manual_needed.append(entry)
+                    # People who are not manually assigned yet
+                    filtered_manual_needed = openstaand(status, round_data)
                     
                     if filtered_manual_needed:  # Only show if there are still people needing assignment
                         st.write("### ⚠️ Handmatige Inplanning Nodig")
@@ -518,17 +922,8 @@ def ronde_planning_systeem():
                 
                 # Manual assignment form - only show if there are people needing assignment
                 if round_data.get("manual_needed"):
-                    # Get list of people already manually assigned in this round
-                    manual_assignments = status.get("manual_assignments", {}).get(str(round_num), [])
-                    assigned_names = set(assignment["name"] for assignment in manual_assignments)
-                    
-                    # Filter out people who are already manually assigned
-                    manual_needed_data = round_data["manual_needed"]
-                    filtered_manual_needed = []
-                    for entry in manual_needed_data:
-                        person_name = entry[0]  # First element is always the name
-                        if person_name not in assigned_names:
-                            filtered_manual_needed.append(entry)
+                    # People who are not manually assigned yet
+                    filtered_manual_needed = openstaand(status, round_data)
                     
                     if filtered_manual_needed:  # Only show form if there are people needing assignment
                         st.write("### 🔧 Handmatige Inplanning")
@@ -618,10 +1013,88 @@ def ronde_planning_systeem():
                                         "timestamp": datetime.now().isoformat()
                                     })
                                     
-                                    save_ronde_status(status)
+                                    save_ronde_status(status, "handmatig_toegewezen", ronde=round_num,
+                                                      naam=person_name, training=training_to_assign)
+                                    if str(round_num) in wachtlijsten:
+                                        niet_meer_wachtend(wachtlijsten[str(round_num)], person_name, training_to_assign)
+                                        save_wachtlijsten(wachtlijsten)
                                     st.success(f"✅ {person_name} toegewezen aan {training_to_assign}")
                                     st.rerun()
                 
+                # Waitlist: who gets the next spot that frees up
+                wachtlijst = wachtlijsten.get(str(round_num))
+                if wachtlijst and any(wachtenden(wachtlijst, t) for t in wachtlijst["wachtrijen"]):
+                    st.write("### ⏳ Wachtlijst")
+                    wacht_rows = []
+                    for training in sorted(wachtlijst["wachtrijen"]):
+                        queue = wachtenden(wachtlijst, training)
+                        if queue:
+                            wacht_rows.append({
+                                "Training": training,
+                                "Wachtenden": len(queue),
+                                "Eerstvolgende": f"{queue[0][0]} (voorkeur {queue[0][2]})"
+                            })
+                    st.dataframe(pd.DataFrame(wacht_rows), use_container_width=True, hide_index=True)
+                
+                # Free a spot: the next person on the waitlist takes it
+                assigned_names = sorted({a["name"] for a in round_data.get("assigned", [])} |
+                                        {a["name"] for a in status.get("manual_assignments", {}).get(str(round_num), [])})
+                if assigned_names:
+                    with st.form(f"remove_from_training_{round_num}"):
+                        st.write("### 🚪 Speler uit training halen")
+                        name_to_remove = st.selectbox("Selecteer persoon:", options=["-- Selecteer --"] + assigned_names,
+                                                      key=f"remove_person_{round_num}")
+                        exclude = st.checkbox("Ook uitsluiten van verdere planning", key=f"exclude_person_{round_num}")
+                        if st.form_submit_button("🚪 Uit training halen"):
+                            if name_to_remove != "-- Selecteer --":
+                                if exclude:
+                                    freed = exclude_from_planning(status, name_to_remove, wachtlijsten)
+                                    save_ronde_status(status, "uitgesloten", naam=name_to_remove,
+                                                      vrijgekomen=[[r, t, p] for r, t, p in freed])
+                                    if wachtlijsten:
+                                        save_wachtlijsten(wachtlijsten)
+                                    promoted = [p for _, _, p in freed if p]
+                                    st.success(f"✅ {name_to_remove} uitgesloten en uit {len(freed)} training(en) gehaald"
+                                               + (f"; {', '.join(promoted)} van de wachtlijst ingepland" if promoted else ""))
+                                    st.rerun()
+                                freed_training, level = remove_from_training(status, round_num, name_to_remove)
+                                if freed_training:
+                                    # Keep them in view so they can be placed elsewhere by hand
+                                    round_data.setdefault("manual_needed", []).append(
+                                        [name_to_remove, level, freed_training, "Handmatig uit training gehaald"])
+                                promoted = release_spot(status, round_num, freed_training, wachtlijst) if freed_training else None
+                                save_ronde_status(status, "uit_training_gehaald", ronde=round_num,
+                                                  naam=name_to_remove, training=freed_training, gepromoveerd=promoted)
+                                if wachtlijst:
+                                    save_wachtlijsten(wachtlijsten)
+                                if promoted:
+                                    st.success(f"✅ {name_to_remove} uit {freed_training} gehaald; {promoted} van de wachtlijst ingepland")
+                                else:
+                                    st.success(f"✅ {name_to_remove} uit {freed_training} gehaald")
+                                st.rerun()
+                
+                # Process registrations that changed after this round was planned
+                if st.button("🔁 Verwerk gewijzigde aanmeldingen", key=f"incremental_{round_num}",
+                             help="Plant nieuwe aanmeldingen in en haalt afgemelde mensen uit de planning, zonder de ronde opnieuw te plannen"):
+                    added_df, removed_names, changed_df = detect_round_changes(round_num, status)
+                    if len(added_df) == 0 and not removed_names and len(changed_df) == 0:
+                        st.info("📋 Geen wijzigingen gevonden sinds de planning van deze ronde")
+                    else:
+                        try:
+                            summary = replan_round_incremental(status, round_num, trainingen, added_df, removed_names, changed_df,
+                                                               wachtlijst=wachtlijsten.get(str(round_num)), view=weergave())
+                        except ValueError as e:
+                            st.error(f"❌ {e}. Plan de ronde opnieuw.")
+                        else:
+                            save_ronde_status(status, "incrementeel_bijgewerkt", ronde=round_num, toegevoegd=len(added_df),
+                                              gewijzigd=len(changed_df), verwijderd=len(summary["removed"]))
+                            save_wachtlijsten(rebuild_waitlists(status, trainingen, wachtlijsten, [round_num]))
+                            st.success(f"✅ {len(summary['assigned'])} ingepland, {len(summary['removed'])} verwijderd, "
+                                       f"{len(summary['promoted'])} van de wachtlijst, {len(summary['manual_needed'])} handmatig nodig")
+                            if summary["skipped_manual"]:
+                                st.info(f"🔧 Handmatige toewijzingen niet aangepast: {', '.join(summary['skipped_manual'])}")
+                            st.rerun()
+                
                 # Export results
                 if round_data.get("assigned") or manual_assignments:
                     st.write("### 📥 Exporteren")
@@ -676,27 +1149,9 @@ def ronde_planning_systeem():
                         )
 
     # Check if planning is complete (no more people need manual assignment)
-    all_people_assigned = True
-    total_people_needing_manual = 0
-    
-    for round_data in status.get("planning_history", []):
-        round_num = round_data["round"]
-        manual_assignments = status.get("manual_assignments", {}).get(str(round_num), [])
-        
-        # Get people who still need manual assignment for this round
-        manual_needed = round_data.get("manual_needed", [])
-        already_assigned_names = {assignment["name"] for assignment in manual_assignments}
-        
-        # Filter out people who have already been manually assigned
-        filtered_manual_needed = []
-        for person_data in manual_needed:
-            person_name = person_data[0] if len(person_data) > 0 else ""
-            if person_name not in already_assigned_names:
-                filtered_manual_needed.append(person_data)
-        
-        if filtered_manual_needed:
-            total_people_needing_manual += len(filtered_manual_needed)
-            all_people_assigned = False
+    view = weergave()
+    total_people_needing_manual = view["tellingen"]["open"]
+    all_people_assigned = total_people_needing_manual == 0
     
     # Show Final Planning section only if everything is planned
     if status.get("planning_history") and all_people_assigned:
@@ -704,82 +1159,29 @@ def ronde_planning_systeem():
         st.header("🎉 Final Planning - Alle Trainingsgroepen")
         st.success("✅ Alle deelnemers zijn succesvol ingepland!")
         
-        # Collect all assignments from all rounds
-        all_training_groups = {}
-        all_assignments_for_export = []
-        
-        for round_data in status["planning_history"]:
-            round_num = round_data["round"]
-            
-            # Add automatic assignments
-            for training, people in round_data.get("assigned_by_training", {}).items():
-                if training not in all_training_groups:
-                    all_training_groups[training] = []
-                for name, level in people:
-                    # Convert float level to int if it's a whole number
-                    if isinstance(level, float) and level.is_integer():
-                        level = int(level)
-                    member_data = {
-                        "Naam": str(name),
-                        "Niveau": str(level),
-                        "Ronde": str(round_num),
-                        "Type": "Automatisch",
-                        "Training": str(training)
-                    }
-                    all_training_groups[training].append(member_data)
-                    all_assignments_for_export.append(member_data)
-            
-            # Add manual assignments
-            manual_assignments = status.get("manual_assignments", {}).get(str(round_num), [])
-            for assignment in manual_assignments:
-                training = assignment["training"]
-                if training not in all_training_groups:
-                    all_training_groups[training] = []
-                # Use stored level if available, otherwise use "Handmatig"
-                level = assignment.get("level", "Handmatig")
-                if isinstance(level, float) and level.is_integer():
-                    level = int(level)
-                member_data = {
-                    "Naam": str(assignment["name"]),
-                    "Niveau": str(level),
-                    "Ronde": str(round_num),
-                    "Type": "Handmatig",
-                    "Training": str(training)
-                }
-                all_training_groups[training].append(member_data)
-                all_assignments_for_export.append(member_data)
+        # Totals and groups come from the shared planning views
+        totals = view["tellingen"]
         
-        if all_training_groups:
+        if totals["totaal"]:
             # Summary statistics
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                total_people = len(all_assignments_for_export)
-                st.metric("👥 Totaal Deelnemers", total_people)
+                st.metric("👥 Totaal Deelnemers", totals["totaal"])
             with col2:
-                total_trainings = len(all_training_groups)
-                st.metric("🎾 Aantal Trainingen", total_trainings)
+                st.metric("🎾 Aantal Trainingen", totals["trainingen"])
             with col3:
-                auto_count = len([a for a in all_assignments_for_export if a["Type"] == "Automatisch"])
-                st.metric("🤖 Automatisch", auto_count)
+                st.metric("🤖 Automatisch", totals["automatisch"])
             with col4:
-                manual_count = len([a for a in all_assignments_for_export if a["Type"] == "Handmatig"])
-                st.metric("👤 Handmatig", manual_count)
+                st.metric("👤 Handmatig", totals["handmatig"])
             
             st.markdown("---")
             
             # Show each training group in a nice format
-            for training, members in all_training_groups.items():
-                if members:  # Only show trainings that have people
-                    with st.expander(f"🎾 {training} ({len(members)} deelnemers)", expanded=True):
-                        # Create DataFrame for this training group
-                        df_group = pd.DataFrame(members)
-                        
-                        # Sort by name for better readability
-                        df_group = df_group.sort_values('Naam')
-                        
-                        # Display only relevant columns
-                        display_df = df_group[["Naam", "Niveau", "Type", "Ronde"]]
-                        st.dataframe(display_df, use_container_width=True, hide_index=True)
+            for training in view["trainingen"]:
+                members = view["roosters"][training]
+                with st.expander(f"🎾 {training} ({len(members)} deelnemers)", expanded=True):
+                    # Display only relevant columns, sorted by name
+                    st.dataframe(members[EXPORT_ROOSTER_KOLOMMEN], use_container_width=True, hide_index=True)
             
             st.markdown("---")
             
@@ -787,27 +1189,21 @@ def ronde_planning_systeem():
             st.subheader("📥 Complete Planning Downloaden")
             st.write("Download hier de complete planning van alle trainingsgroepen:")
             
-            # Create complete export DataFrame
-            df_complete_export = pd.DataFrame(all_assignments_for_export)
-            df_complete_export = df_complete_export.sort_values(['Training', 'Naam'])
-            
-            # Reorder columns for better export
-            export_columns = ["Training", "Naam", "Niveau", "Type", "Ronde"]
-            df_complete_export = df_complete_export[export_columns]
-            
-            # Create CSV with proper encoding
-            csv_complete_export = df_complete_export.to_csv(index=False, encoding='utf-8-sig', sep=';')
+            export_format = st.radio("Formaat", list(EXPORT_FORMATEN), horizontal=True, key="final_export_format",
+                                     format_func=lambda f: EXPORT_FORMATEN[f][0])
             
             # Show preview of the complete data
             st.write("**Preview van de complete planning:**")
-            st.dataframe(df_complete_export, use_container_width=True, hide_index=True)
+            st.dataframe(voorbeeld(view, 15), use_container_width=True, hide_index=True)
+            if totals["totaal"] > 15:
+                st.caption(f"... en nog {totals['totaal'] - 15} regels meer in de volledige export.")
             
-            # Download button for complete planning
+            # The file is only generated when the button is clicked
             st.download_button(
                 label="🎾 Download Complete Planning",
-                data=csv_complete_export,
-                file_name=f"complete_planning_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                mime="text/csv",
+                data=lambda: exporteer(status, export_format),
+                file_name=export_bestandsnaam(export_format),
+                mime=EXPORT_FORMATEN[export_format][1],
                 type="primary",
                 help="Download alle trainingsgroepen in één bestand"
             )
@@ -824,20 +1220,11 @@ def ronde_planning_systeem():
         total_people = 0
         assigned_people = 0
         
-        # Count total people from all CSV files
-        working_period = get_current_working_period()
-        if working_period["type"] == "live":
-            data_path = "data"
-        else:
-            data_path = f"archive/{working_period['folder']}"
-        
+        # Count total people from all registrations (archives are restored into the same store)
         for i in range(1, 4):
-            csv_file = f"{data_path}/training{i}_inschrijvingen.csv"
-            if os.path.exists(csv_file):
-                df = pd.read_csv(csv_file)
-                total_people += len(df)
+            total_people += aantal_inschrijvingen(i)
         
-        assigned_people = len(all_assignments_for_export) if 'all_assignments_for_export' in locals() else 0
+        assigned_people = view["tellingen"]["totaal"]
         
         if total_people > 0:
             progress = assigned_people / total_people
@@ -862,7 +1249,7 @@ def ronde_planning_systeem():
                            help="Markeer deze ronde als voltooid en ga naar de volgende ronde"):
                     status["rounds_completed"].append(current_round)
                     status["current_round"] = current_round + 1
-                    save_ronde_status(status)
+                    save_ronde_status(status, "ronde_afgerond", ronde=current_round)
                     st.success(f"✅ Ronde {current_round} voltooid! Nu bezig met ronde {current_round + 1}")
                     st.rerun()
             else:
@@ -877,7 +1264,9 @@ def ronde_planning_systeem():
                 if str(current_round) in status.get("manual_assignments", {}):
                     del status["manual_assignments"][str(current_round)]
                 
-                save_ronde_status(status)
+                save_ronde_status(status, "ronde_gereset", ronde=current_round)
+                if wachtlijsten.pop(str(current_round), None) is not None:
+                    save_wachtlijsten(wachtlijsten)
                 st.success(f"✅ Ronde {current_round} reset!")
                 st.rerun()
         
@@ -903,7 +1292,8 @@ def ronde_planning_systeem():
                             "excluded_people": [],
                             "planning_history": []
                         }
-                        save_ronde_status(new_status)
+                        save_ronde_status(new_status, "alles_gereset")
+                        save_wachtlijsten({})
                         st.session_state.confirm_full_reset = False
                         st.success("✅ Alle planning gereset!")
                         st.rerun()
@@ -917,4 +1307,41 @@ def ronde_planning_systeem():
     # Show working period reminder
     st.markdown("---")
     st.info(f"💡 **Herinnering:** Je werkt momenteel met {working_period['type']} data: {working_period['name']}. "
-            f"Je kunt dit wijzigen in de Periode Beheer sectie.") 
\ No newline at end of file
+            f"Je kunt dit wijzigen in de Periode Beheer sectie.") 
+    
+    # Every change to the planning, as recorded in the journal
+    with st.expander("📜 Planningslogboek"):
+        events = planning_journaal()
+        if not events:
+            st.info("Nog geen wijzigingen vastgelegd.")
+        else:
+            df_events = pd.DataFrame([{"Nr": e["nr"], "Tijd": e["tijd"][:19], "Actie": e["soort"],
+                                       "Details": ", ".join(f"{k}: {v}" for k, v in e["details"].items())}
+                                      for e in events])
+            st.dataframe(df_events, use_container_width=True, hide_index=True)
+        st.caption("Alle wijzigingen worden bewaard in data/ronde_planning_journal.jsonl")
+
+    # Stage timings of recent planning runs
+    with st.expander("⏱️ Timing per planningsstap"):
+        actief = st.checkbox("Meet de duur van elke stap", value=timing_actief(), key="planning_timing_actief")
+        if actief != timing_actief():
+            zet_timing(actief)
+            st.rerun()
+        
+        runs = recente_runs()
+        if not runs:
+            st.info("Nog geen metingen. Zet meten aan en voer een planning uit.")
+        for run in runs:
+            st.markdown(f"**{run['start'][:19]}** - {run.get('actie', 'pagina')} "
+                        f"(ronde {run.get('ronde', '?')}): {run['totaal_s']:.3f}s")
+            if run["stappen"]:
+                df_stappen = pd.DataFrame(run["stappen"]).rename(columns={"stap": "Stap", "s": "Seconden"})
+                st.dataframe(df_stappen, use_container_width=True, hide_index=True)
+        st.caption("Alle metingen worden ook bewaard in data/planning_timings.jsonl")
+        
+        cache = leescache_statistieken()
+        st.markdown(f"**Leescache:** {cache['hits']} hits, {cache['misses']} keer ingelezen")
+        if cache["items"]:
+            df_cache = pd.DataFrame([{"Bestand": naam, "Hits": t["hits"], "Ingelezen": t["misses"]}
+                                     for naam, t in sorted(cache["items"].items())])
+            st.dataframe(df_cache, use_container_width=True, hide_index=True)
@@ -0,0 +1,65 @@
+import streamlit as st
+import pandas as pd
+from utils.importeer import lees_legacy, importeer
+from utils.opslag import lees_trainingen, trainingen_aanwezig, aantal_inschrijvingen
+
+def upload_registrations():
+    """Admin page to import registration exports of older forms in bulk"""
+    st.title("📤 Inschrijvingen Importeren")
+    st.markdown("""
+    Importeer een export van een eerder inschrijfformulier (CSV), bijvoorbeeld met de kolommen
+    `Naam, Inschrijfdatum, Voorkeur 1, Voorkeur 2, Voorkeur 3, Ervaring, Niveau`.
+    Codering en datumnotatie worden automatisch herkend, voorkeuren worden gekoppeld aan de huidige trainingen
+    en dubbele aanmeldingen (zelfde telefoon, of zelfde naam zonder telefoon) worden samengevoegd.
+    """)
+
+    if not trainingen_aanwezig():
+        st.warning("⚠️ Er zijn nog geen trainingen. Voeg eerst trainingen toe, zodat voorkeuren gekoppeld kunnen worden.")
+        return
+
+    uploaded = st.file_uploader("CSV-bestand", type=["csv"])
+    if uploaded is None:
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        ronde = st.selectbox("Importeren in", [1, 2, 3], format_func=lambda r: f"Training {r} ({aantal_inschrijvingen(r, live=True)} aanmeldingen)")
+    with col2:
+        replace_existing = st.checkbox("Bestaande aanmeldingen van dezelfde personen vervangen",
+                                       help="Standaard blijven bestaande aanmeldingen staan en worden dubbele regels uit het bestand overgeslagen")
+
+    try:
+        df, rapport = lees_legacy(uploaded, lees_trainingen())
+    except (ValueError, pd.errors.ParserError) as e:
+        st.error(f"❌ Bestand kan niet gelezen worden: {e}")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Regels gelezen", rapport["gelezen"])
+    with col2:
+        st.metric("Dubbel in bestand", rapport["dubbel_in_bestand"])
+    with col3:
+        st.metric("Te importeren", rapport["te_importeren"])
+    st.caption(f"Codering: {rapport['codering']} · Datumnotatie: {rapport['datumformaat'] or 'niet herkend'}")
+
+    if rapport["ongeldige_datum"]:
+        st.warning(f"⚠️ {rapport['ongeldige_datum']} inschrijfdatums konden niet gelezen worden en zijn ongewijzigd overgenomen.")
+    if rapport["onopgelost"]:
+        with st.expander(f"⚠️ {len(rapport['onopgelost'])} voorkeuren komen niet overeen met een huidige training"):
+            df_onopgelost = pd.DataFrame(sorted(rapport["onopgelost"].items(), key=lambda x: -x[1]), columns=["Voorkeur", "Aantal"])
+            st.dataframe(df_onopgelost, use_container_width=True, hide_index=True)
+            st.caption("Deze voorkeuren worden letterlijk overgenomen; de planning meldt ze als onopgelost.")
+
+    st.write("**Preview:**")
+    # Levels are numbers or text; show them all as text
+    st.dataframe(df.head(20).astype("string"), use_container_width=True, hide_index=True)
+
+    if st.button(f"📥 Importeer {rapport['te_importeren']} aanmeldingen in Training {ronde}", type="primary",
+                 disabled=rapport["te_importeren"] == 0):
+        with st.spinner("Importeren..."):
+            resultaat = importeer(uploaded, ronde, vervang_bestaande=replace_existing)
+        if replace_existing:
+            st.success(f"✅ {resultaat['toegevoegd']} aanmeldingen geïmporteerd, waarvan {resultaat['al_aanwezig']} ter vervanging van een bestaande.")
+        else:
+            st.success(f"✅ {resultaat['toegevoegd']} aanmeldingen geïmporteerd, {resultaat['al_aanwezig']} stonden er al en zijn overgeslagen.")
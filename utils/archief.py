@@ -0,0 +1,240 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.bestanden import bestandsslot, schrijf_atomisch
+
+# Archived registrations are stored column by column in a compressed .npz:
+# every column is its own member, so readers only decompress what they ask for.
+#   __kolommen__   JSON list of {"naam", "soort", ...} in the original column order
+#   k<i>           values (numbers, epoch seconds) or category codes of column i
+#   k<i>_cat       the categories of a text column
+ARCHIEF_EXTENSIE = ".npz"
+# Timestamp formats that are stored parsed, with the numpy unit that writes them back
+TIJD_FORMATEN = {"%Y-%m-%d %H:%M:%S": "s", "%Y-%m-%d %H:%M": "m", "%Y-%m-%d": "D"}
+GEEN_TIJD = np.iinfo(np.int64).min
+
+def _kleinste_int(minimum, maximum):
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= minimum and maximum <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _tijd_tekst(seconden, formaat):
+    """Timestamps (epoch seconds) written in formaat, vectorised"""
+    tekst = np.datetime_as_string(seconden.astype("datetime64[s]"), unit=TIJD_FORMATEN[formaat])
+    return np.char.replace(tekst, "T", " ")
+
+def _als_tijd(reeks):
+    """(epoch seconds, format) when every value is a timestamp written in one format, else None"""
+    aanwezig = reeks.notna().to_numpy()
+    waarden = reeks[aanwezig].astype(str).to_numpy(dtype=str)
+    if len(waarden) == 0 or not re.match(r"\d{4}-\d{2}-\d{2}", waarden[0]):
+        return None
+    for formaat in TIJD_FORMATEN:
+        tijden = pd.to_datetime(pd.Series(waarden), format=formaat, errors="coerce")
+        if tijden.isna().any():
+            continue
+        seconden = tijden.to_numpy(dtype="datetime64[s]").astype(np.int64)
+        # Only lossless when writing them back gives exactly the same text
+        if not (_tijd_tekst(seconden, formaat) == waarden).all():
+            continue
+        alle = np.full(len(reeks), GEEN_TIJD, dtype=np.int64)
+        alle[aanwezig] = seconden
+        return alle, formaat
+    return None
+
+def _codeer_kolom(reeks):
+    """(description, arrays) of one column"""
+    if pd.api.types.is_bool_dtype(reeks):
+        return {"soort": "bool"}, {"": reeks.to_numpy(dtype=np.uint8)}
+    if pd.api.types.is_integer_dtype(reeks):
+        waarden = reeks.to_numpy()
+        dtype = _kleinste_int(waarden.min(), waarden.max()) if len(waarden) else np.int8
+        return {"soort": "int"}, {"": waarden.astype(dtype)}
+    if pd.api.types.is_float_dtype(reeks):
+        return {"soort": "float"}, {"": reeks.to_numpy(dtype=np.float64)}
+
+    tijd = _als_tijd(reeks)
+    if tijd is not None:
+        seconden, formaat = tijd
+        return {"soort": "tijd", "formaat": formaat}, {"": seconden}
+
+    # Text: categorical, so repeated preferences and levels cost a small code each
+    codes, categorieen = pd.factorize(reeks.astype(object).where(reeks.notna(), None), use_na_sentinel=True)
+    dtype = _kleinste_int(-1, max(len(categorieen), 1))
+    return {"soort": "tekst"}, {"": codes.astype(dtype), "_cat": np.asarray([str(c) for c in categorieen], dtype=str)}
+
+def schrijf_archief(df, pad):
+    """Write a registrations DataFrame to a columnar archive file"""
+    kolommen = []
+    arrays = {}
+    for i, naam in enumerate(df.columns):
+        beschrijving, delen = _codeer_kolom(df[naam])
+        kolommen.append(dict(beschrijving, naam=str(naam)))
+        for achtervoegsel, array in delen.items():
+            arrays[f"k{i}{achtervoegsel}"] = array
+    arrays["__kolommen__"] = np.asarray(json.dumps(kolommen, ensure_ascii=False))
+    arrays["__rijen__"] = np.asarray(len(df), dtype=np.int64)
+
+    def schrijf(tijdelijk):
+        with open(tijdelijk, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+    schrijf_atomisch(pad, schrijf)
+
+def _decodeer_kolom(archief, i, beschrijving, categorisch, tijden_als_tekst):
+    waarden = archief[f"k{i}"]
+    soort = beschrijving["soort"]
+    if soort == "bool":
+        return pd.Series(waarden.astype(bool))
+    if soort == "int":
+        return pd.Series(waarden.astype(np.int64))
+    if soort == "float":
+        return pd.Series(waarden)
+    if soort == "tijd":
+        ontbreekt = waarden == GEEN_TIJD
+        if not tijden_als_tekst:
+            return pd.Series(np.where(ontbreekt, np.datetime64("NaT"), waarden.astype("datetime64[s]")))
+        tekst = _tijd_tekst(waarden, beschrijving["formaat"]).astype(object)
+        tekst[ontbreekt] = np.nan
+        return pd.Series(tekst)
+    categorieen = archief[f"k{i}_cat"].astype(object)
+    codes = waarden.astype(np.int64)
+    if categorisch:
+        return pd.Series(pd.Categorical.from_codes(codes, categories=categorieen))
+    tekst = np.append(categorieen, np.nan)[codes]  # code -1 picks the NaN at the end
+    return pd.Series(tekst)
+
+def archief_kolommen(pad):
+    """Column names of an archive file, without reading any data"""
+    pad = Path(pad)
+    if pad.suffix != ARCHIEF_EXTENSIE:
+        return list(pd.read_csv(pad, nrows=0).columns)
+    with np.load(pad, allow_pickle=False) as archief:
+        return [k["naam"] for k in json.loads(str(archief["__kolommen__"]))]
+
+def lees_archief(pad, kolommen=None, categorisch=False, tijden_als_tekst=False):
+    """Read an archived registrations file, only decompressing the requested columns.
+
+    Text columns come back as strings, or as pandas categoricals with
+    categorisch=True. Timestamps come back parsed, or as the original text
+    with tijden_als_tekst=True. Old CSV archives are read as well.
+    """
+    pad = Path(pad)
+    if pad.suffix != ARCHIEF_EXTENSIE:
+        return pd.read_csv(pad, usecols=kolommen)
+    with np.load(pad, allow_pickle=False) as archief:
+        beschrijvingen = json.loads(str(archief["__kolommen__"]))
+        gevraagd = set(kolommen) if kolommen is not None else None
+        data = {}
+        for i, beschrijving in enumerate(beschrijvingen):
+            if gevraagd is not None and beschrijving["naam"] not in gevraagd:
+                continue
+            data[beschrijving["naam"]] = _decodeer_kolom(archief, i, beschrijving, categorisch, tijden_als_tekst)
+        return pd.DataFrame(data, index=pd.RangeIndex(int(archief["__rijen__"])))
+
+def archief_naar_csv(pad, doel=None):
+    """The archive as CSV, written to doel or returned as bytes for a download"""
+    df = lees_archief(pad, tijden_als_tekst=True)
+    if doel is None:
+        return df.to_csv(index=False).encode('utf-8')
+    df.to_csv(doel, index=False)
+
+def archief_pad(periode_dir, ronde):
+    """The archive file of a round in a period folder: the columnar file, or the CSV of older archives; None if neither"""
+    for extensie in (ARCHIEF_EXTENSIE, ".csv"):
+        pad = Path(periode_dir) / f"training{ronde}_inschrijvingen{extensie}"
+        if pad.exists():
+            return pad
+    return None
+
+# --- Catalog of archived periods ---
+
+CATALOGUS_NAAM = "catalogus.json"
+
+def _controlesom(pad):
+    h = hashlib.sha256()
+    with open(pad, 'rb') as f:
+        for blok in iter(lambda: f.read(1 << 20), b""):
+            h.update(blok)
+    return h.hexdigest()
+
+def _catalogus_item(periode_dir):
+    """Catalog entry of one period folder: its metadata plus size and checksum of every file"""
+    periode_dir = Path(periode_dir)
+    with open(periode_dir / "metadata.json", 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    bestanden = {pad.name: {"grootte": pad.stat().st_size, "sha256": _controlesom(pad)}
+                 for pad in sorted(periode_dir.iterdir()) if pad.is_file() and pad.name != "metadata.json"}
+    return {"name": periode_dir.name, "metadata": metadata, "files": bestanden}
+
+def _sorteer(periodes):
+    return sorted(periodes, key=lambda p: p["metadata"].get("archived_date", ""), reverse=True)
+
+def _schrijf_catalogus(archief_dir, periodes):
+    data = {"versie": 1, "periodes": _sorteer(periodes)}
+    schrijf_atomisch(Path(archief_dir) / CATALOGUS_NAAM,
+                     lambda pad: pad.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding='utf-8'))
+    return data["periodes"]
+
+def lees_catalogus(archief_dir):
+    """All archived periods, newest first, from the catalog; None when there is no readable catalog"""
+    try:
+        with open(Path(archief_dir) / CATALOGUS_NAAM, 'r', encoding='utf-8') as f:
+            return json.load(f)["periodes"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+def catalogiseer_periode(archief_dir, periode_dir):
+    """Add or refresh one period in the catalog, e.g. right after archiving it"""
+    catalogus = Path(archief_dir) / CATALOGUS_NAAM
+    with bestandsslot(catalogus):
+        periodes = lees_catalogus(archief_dir)
+        if periodes is None:
+            return _herbouw(archief_dir)[0]
+        item = _catalogus_item(periode_dir)
+        periodes = [p for p in periodes if p["name"] != item["name"]] + [item]
+        return _schrijf_catalogus(archief_dir, periodes)
+
+def _herbouw(archief_dir):
+    archief_dir = Path(archief_dir)
+    oud = {p["name"]: p for p in (lees_catalogus(archief_dir) or [])}
+    periodes = []
+    if archief_dir.exists():
+        for item in archief_dir.iterdir():
+            # Folders without metadata.json (a half-written archive, a stray folder) are no period
+            if not item.is_dir() or not (item / "metadata.json").exists():
+                continue
+            try:
+                periodes.append(_catalogus_item(item))
+            except (OSError, ValueError):
+                # Unreadable metadata: list the folder anyway, like the old directory scan did
+                periodes.append({"name": item.name, "metadata": {"period_name": item.name, "archived_date": "Onbekend"}, "files": {}})
+    nieuw = {p["name"]: p for p in periodes}
+    verschillen = {
+        "toegevoegd": sorted(set(nieuw) - set(oud)),
+        "verwijderd": sorted(set(oud) - set(nieuw)),
+        "gewijzigd": sorted(n for n in set(nieuw) & set(oud) if nieuw[n] != oud[n]),
+    }
+    return _schrijf_catalogus(archief_dir, periodes), verschillen
+
+def herbouw_catalogus(archief_dir):
+    """Rebuild the catalog from the period folders; returns (periods, differences with the old catalog)"""
+    with bestandsslot(Path(archief_dir) / CATALOGUS_NAAM):
+        return _herbouw(archief_dir)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Herstel de catalogus van gearchiveerde periodes")
+    parser.add_argument("--archief", default=str(Path(__file__).resolve().parent.parent / "archive"))
+    args = parser.parse_args()
+    periodes, verschillen = herbouw_catalogus(args.archief)
+    print(f"{len(periodes)} periodes in de catalogus")
+    for soort, namen in verschillen.items():
+        for naam in namen:
+            print(f"  {soort}: {naam}")
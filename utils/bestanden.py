@@ -0,0 +1,57 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialised
+    fcntl = None
+
+# One lock per file for the threads of this process; flock covers other processes
+_thread_sloten = {}
+_thread_sloten_lock = threading.Lock()
+
+def slot_pad(pad):
+    pad = Path(pad)
+    return pad.with_name(pad.name + ".lock")
+
+@contextmanager
+def bestandsslot(pad):
+    """Exclusive lock on a data file, shared by all sessions and the public and admin apps"""
+    sleutel = str(Path(pad).resolve())
+    with _thread_sloten_lock:
+        thread_slot = _thread_sloten.setdefault(sleutel, threading.Lock())
+    with thread_slot:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(Path(pad).parent, exist_ok=True)
+        with open(slot_pad(pad), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def schrijf_atomisch(pad, schrijf):
+    """Write a file through a temp file in the same folder and rename it into place.
+
+    schrijf(tijdelijk_pad) writes the content. Readers see either the old or
+    the new file, never a half-written one.
+    """
+    pad = Path(pad)
+    os.makedirs(pad.parent, exist_ok=True)
+    tijdelijk = pad.with_name(f".{pad.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        schrijf(tijdelijk)
+        with open(tijdelijk, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tijdelijk, pad)
+    finally:
+        if tijdelijk.exists():
+            os.remove(tijdelijk)
+
+def csv_atomisch(df, pad, **kwargs):
+    """DataFrame.to_csv with an atomic replace"""
+    schrijf_atomisch(pad, lambda tijdelijk: df.to_csv(tijdelijk, index=False, **kwargs))
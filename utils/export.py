@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import re
+import tempfile
+import zipfile
+from datetime import datetime
+
+# Export of the complete planning, generated from the planning status. The
+# rows are grouped per training in one pass and written out one by one, so
+# the cost follows the number of assignments, not assignments x trainings.
+KOLOMMEN = ["Training", "Naam", "Niveau", "Type", "Ronde"]
+ROOSTER_KOLOMMEN = ["Naam", "Niveau", "Type", "Ronde"]
+FORMATEN = {
+    "csv": ("CSV (één bestand)", "text/csv", ".csv"),
+    "jsonl": ("JSON Lines", "application/x-ndjson", ".jsonl"),
+    "zip": ("ZIP (rooster per training)", "application/zip", ".zip"),
+}
+MAX_IN_GEHEUGEN = 8 << 20  # larger exports spill to a temp file
+
+def _niveau_tekst(level):
+    # Whole levels without the .0
+    if isinstance(level, float) and level.is_integer():
+        level = int(level)
+    return str(level)
+
+def alle_rijen(status):
+    """Every automatic and manual assignment, in planning order"""
+    for round_data in status.get("planning_history", []):
+        round_num = round_data["round"]
+        for training, people in round_data.get("assigned_by_training", {}).items():
+            for name, level in people:
+                yield {"Training": str(training), "Naam": str(name), "Niveau": _niveau_tekst(level),
+                       "Type": "Automatisch", "Ronde": str(round_num)}
+        for assignment in status.get("manual_assignments", {}).get(str(round_num), []):
+            # Use stored level if available, otherwise use "Handmatig"
+            yield {"Training": str(assignment["training"]), "Naam": str(assignment["name"]),
+                   "Niveau": _niveau_tekst(assignment.get("level", "Handmatig")),
+                   "Type": "Handmatig", "Ronde": str(round_num)}
+
+def per_training(status):
+    """{training: export rows sorted by name}, in one pass over the planning; trainings in sorted order"""
+    groepen = {}
+    for rij in alle_rijen(status):
+        groepen.setdefault(rij["Training"], []).append(rij)
+    return {training: sorted(groepen[training], key=lambda rij: rij["Naam"]) for training in sorted(groepen)}
+
+def trainingen(status):
+    """Names of the trainings with at least one assignment, sorted"""
+    return sorted({rij["Training"] for rij in alle_rijen(status)})
+
+def toewijzingen(status, training=None):
+    """Export rows ({"Training", "Naam", "Niveau", "Type", "Ronde"}) by training and name, or of one training"""
+    if training is not None:
+        yield from sorted((rij for rij in alle_rijen(status) if rij["Training"] == training), key=lambda rij: rij["Naam"])
+        return
+    for rijen in per_training(status).values():
+        yield from rijen
+
+def tellingen(status):
+    """Totals of the planning without building the export"""
+    totalen = {"totaal": 0, "automatisch": 0, "handmatig": 0}
+    namen, trainingen_gezien = set(), set()
+    for rij in alle_rijen(status):
+        totalen["totaal"] += 1
+        totalen["automatisch" if rij["Type"] == "Automatisch" else "handmatig"] += 1
+        namen.add(rij["Naam"])
+        trainingen_gezien.add(rij["Training"])
+    totalen["deelnemers"] = len(namen)
+    totalen["trainingen"] = len(trainingen_gezien)
+    return totalen
+
+def schrijf_csv(rijen, f, kolommen=KOLOMMEN):
+    """Write rows as semicolon-separated CSV (UTF-8 with BOM, for Excel) to a binary file"""
+    tekst = io.TextIOWrapper(f, encoding='utf-8-sig', newline='', write_through=True)
+    writer = csv.DictWriter(tekst, kolommen, delimiter=';', lineterminator='\n', extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rijen)
+    tekst.detach()
+
+def schrijf_jsonl(rijen, f):
+    for rij in rijen:
+        f.write((json.dumps(rij, ensure_ascii=False) + "\n").encode('utf-8'))
+
+def rooster_naam(i, training):
+    """File name of a training's roster in the ZIP; numbered so the order survives and names stay unique"""
+    veilig = re.sub(r"[^\w\- ]+", "_", training).strip()
+    return f"{i:02d} {veilig}.csv"
+
+def schrijf_zip(status, f):
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i, (training, rijen) in enumerate(per_training(status).items(), start=1):
+            with zf.open(rooster_naam(i, training), 'w') as lid:
+                schrijf_csv(rijen, lid, ROOSTER_KOLOMMEN)
+
+def schrijf(status, formaat, f):
+    """Stream the complete planning in one of FORMATEN to a binary file"""
+    if formaat == "csv":
+        schrijf_csv(toewijzingen(status), f)
+    elif formaat == "jsonl":
+        schrijf_jsonl(toewijzingen(status), f)
+    elif formaat == "zip":
+        schrijf_zip(status, f)
+    else:
+        raise ValueError(f"Onbekend exportformaat: {formaat}")
+
+def exporteer(status, formaat):
+    """The export as a file object for a download; kept in memory up to MAX_IN_GEHEUGEN, on disk beyond"""
+    f = tempfile.SpooledTemporaryFile(max_size=MAX_IN_GEHEUGEN)
+    schrijf(status, formaat, f)
+    f.seek(0)
+    return f
+
+def bestandsnaam(formaat, nu=None):
+    return f"complete_planning_{(nu or datetime.now()).strftime('%Y%m%d_%H%M')}{FORMATEN[formaat][2]}"
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from utils.opslag import lees_planning_status
+
+    parser = argparse.ArgumentParser(description="Exporteer de complete planning")
+    parser.add_argument("--formaat", choices=sorted(FORMATEN), default="csv")
+    parser.add_argument("--uit", help="uitvoerbestand (standaard: complete_planning_<tijd> in de huidige map, '-' voor stdout)")
+    args = parser.parse_args()
+    status = lees_planning_status()
+    if status is None:
+        sys.exit("Nog geen planning beschikbaar")
+    if args.uit == "-":
+        schrijf(status, args.formaat, sys.stdout.buffer)
+    else:
+        uit = args.uit or bestandsnaam(args.formaat)
+        with open(uit, 'wb') as f:
+            schrijf(status, args.formaat, f)
+        print(f"{tellingen(status)['totaal']} toewijzingen geschreven naar {uit}")
@@ -0,0 +1,204 @@
+import codecs
+import contextlib
+import io
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.opslag import bewerk_inschrijvingen, lees_trainingen
+from utils.resolver import get_resolver, resolve_keuze, is_geen_keuze, optie_tekst
+
+# Bulk import of registration exports from older forms, e.g.
+#   Naam, Inschrijfdatum, Voorkeur 1,Voorkeur 2,Voorkeur 3, Ervaring, Niveau
+#   Leon Moreno Gutierrez,13/03/2025 08:46,Dinsdag 14:00 – 15:15 Niveau 8 Robin Baan 1-4,...
+# The file is read in chunks; every distinct preference string is resolved
+# once, and the result is written to the registration store in one batch.
+KOLOMMEN = ["Naam", "Voornaam", "Achternaam", "Telefoon", "Niveau", "Trainingen_per_week",
+            "Voorkeur_1", "Voorkeur_2", "Voorkeur_3", "Extra_bericht", "Inschrijfdatum", "Toestemming_hoger_niveau"]
+# Legacy column names (normalised: lowercase, single spaces) -> registration column
+KOLOM_NAMEN = {
+    "naam": "Naam",
+    "voornaam": "Voornaam",
+    "achternaam": "Achternaam",
+    "telefoon": "Telefoon",
+    "telefoonnummer": "Telefoon",
+    "niveau": "Niveau",
+    "trainingen per week": "Trainingen_per_week",
+    "voorkeur 1": "Voorkeur_1",
+    "voorkeur 2": "Voorkeur_2",
+    "voorkeur 3": "Voorkeur_3",
+    "ervaring": "Extra_bericht",
+    "extra bericht": "Extra_bericht",
+    "opmerking": "Extra_bericht",
+    "inschrijfdatum": "Inschrijfdatum",
+    "tijdstempel": "Inschrijfdatum",
+}
+# Tried in this order; day-first wins a tie because the exports are Dutch
+DATUM_FORMATEN = ["%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y %H:%M:%S", "%d/%m/%Y",
+                  "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S"]
+OPSLAG_DATUM = "%Y-%m-%d %H:%M:%S"
+CHUNK = 10000
+BLOK = 1 << 20
+
+def _open(bron):
+    """A binary file object for a path, bytes or an (uploaded) file object; the caller's own file stays open"""
+    if isinstance(bron, (str, Path)):
+        return open(bron, 'rb')
+    if isinstance(bron, bytes):
+        return io.BytesIO(bron)
+    bron.seek(0)
+    return contextlib.nullcontext(bron)
+
+def detecteer_codering(f):
+    """utf-8 (with or without BOM) when the whole file decodes as such, else cp1252"""
+    if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+        return "utf-8-sig"
+    f.seek(0)
+    # A non-ASCII byte can be anywhere in the file, so a sample isn't enough
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for blok in iter(lambda: f.read(BLOK), b""):
+            decoder.decode(blok)
+        decoder.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+def detecteer_datumformaat(waarden):
+    """The format of DATUM_FORMATEN that parses most of the sample values, or None"""
+    waarden = pd.Series(waarden, dtype=object).dropna().astype(str).str.strip()
+    if len(waarden) == 0:
+        return None
+    beste, beste_aantal = None, 0
+    for formaat in DATUM_FORMATEN:
+        aantal = pd.to_datetime(waarden, format=formaat, errors='coerce').notna().sum()
+        if aantal > beste_aantal:
+            beste, beste_aantal = formaat, aantal
+    return beste
+
+def _kolom_naam(kolom):
+    return KOLOM_NAMEN.get(re.sub(r"[\s_]+", " ", str(kolom).strip().lower()))
+
+def _herstel_streepjes(reeks):
+    # En-dashes in the training names that went through a wrong encoding come out as U+FFFD or as "ï¿½"
+    return reeks.str.replace("ï¿½", "–", regex=False).str.replace("�", "–", regex=False)
+
+def _voorkeuren(reeks, resolver, trainingen, onopgelost):
+    """Preference strings as the current option strings; unmatched ones keep their (repaired) text"""
+    reeks = _herstel_streepjes(reeks.fillna(""))
+    vertaling = {}
+    for keuze, aantal in reeks.value_counts().items():
+        if is_geen_keuze(keuze):
+            vertaling[keuze] = None
+            continue
+        positie = resolve_keuze(resolver, keuze)
+        if positie is None:
+            onopgelost[keuze] = onopgelost.get(keuze, 0) + int(aantal)
+            vertaling[keuze] = keuze
+        else:
+            vertaling[keuze] = optie_tekst(trainingen.iloc[positie])
+    return reeks.map(vertaling)
+
+def _zet_om(chunk, formaat, resolver, trainingen, rapport):
+    """One chunk of legacy rows in the registration columns"""
+    uit = pd.DataFrame(index=chunk.index, columns=KOLOMMEN, dtype=object)
+    for kolom in chunk.columns:
+        doel = _kolom_naam(kolom)
+        if doel is not None:
+            uit[doel] = chunk[kolom].astype("string").str.strip().astype(object)
+
+    namen = uit["Naam"].fillna("").str.split(n=1)
+    uit["Voornaam"] = uit["Voornaam"].fillna(namen.str[0])
+    uit["Achternaam"] = uit["Achternaam"].fillna(namen.str[1])
+
+    niveau = pd.to_numeric(uit["Niveau"].str.replace(",", ".", regex=False), errors='coerce')
+    uit["Niveau"] = niveau.round().astype("Int64").astype(object).where(niveau.notna() & (niveau == niveau.round()), uit["Niveau"])
+
+    for col in ("Voorkeur_1", "Voorkeur_2", "Voorkeur_3"):
+        uit[col] = _voorkeuren(uit[col], resolver, trainingen, rapport["onopgelost"])
+
+    datums = pd.to_datetime(uit["Inschrijfdatum"], format=formaat, errors='coerce') if formaat else pd.Series(pd.NaT, index=uit.index)
+    rapport["ongeldige_datum"] += int((datums.isna() & uit["Inschrijfdatum"].notna()).sum())
+    uit["Inschrijfdatum"] = datums.dt.strftime(OPSLAG_DATUM).astype(object).where(datums.notna(), uit["Inschrijfdatum"])
+    return uit
+
+def dubbel_sleutel(df):
+    """Who a row belongs to: the phone number, or the normalised name when there is none"""
+    telefoon = df["Telefoon"].astype("string").str.replace(r"\D", "", regex=True) if "Telefoon" in df else None
+    naam = df["Naam"].astype("string").str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+    if telefoon is None:
+        return naam.fillna("")
+    return telefoon.where(telefoon.fillna("") != "", naam).fillna("")
+
+def lees_legacy(bron, trainingen):
+    """Read a legacy export into the registration columns; returns (DataFrame, report).
+
+    Duplicates within the file are removed, keeping each person's latest
+    registration. The report has the detected encoding and date format,
+    row counts and the preference strings that match no training.
+    """
+    with _open(bron) as f:
+        codering = detecteer_codering(f)
+        f.seek(0)
+        tekst = io.TextIOWrapper(f, encoding=codering, newline='')
+        rapport = {"codering": codering, "datumformaat": None, "gelezen": 0, "ongeldige_datum": 0, "onopgelost": {}}
+        resolver = get_resolver(trainingen)
+        delen = []
+        formaat = None
+        for chunk in pd.read_csv(tekst, dtype=str, skipinitialspace=True, chunksize=CHUNK, keep_default_na=False, na_values=[""]):
+            if not delen:
+                datum_kolom = next((k for k in chunk.columns if _kolom_naam(k) == "Inschrijfdatum"), None)
+                formaat = detecteer_datumformaat(chunk[datum_kolom].head(1000)) if datum_kolom else None
+                rapport["datumformaat"] = formaat
+            rapport["gelezen"] += len(chunk)
+            delen.append(_zet_om(chunk, formaat, resolver, trainingen, rapport))
+        tekst.detach()
+    df = pd.concat(delen, ignore_index=True) if delen else pd.DataFrame(columns=KOLOMMEN)
+    df = df[df["Naam"].fillna("").str.strip() != ""]
+
+    # Latest registration per person; the stored timestamp format sorts as text
+    volgorde = df["Inschrijfdatum"].fillna("").sort_values(kind="stable").index
+    df = df.loc[volgorde]
+    uniek = ~dubbel_sleutel(df).duplicated(keep="last")
+    rapport["dubbel_in_bestand"] = int((~uniek).sum())
+    # Missing values as NaN, like a registration CSV read back
+    df = df[uniek].reset_index(drop=True).astype(object)
+    df = df.where(df.notna(), np.nan)
+    rapport["te_importeren"] = len(df)
+    return df, rapport
+
+def voeg_samen(bestaand, nieuw, vervang_bestaande=False):
+    """Existing registrations plus the imported ones, matched on phone or name.
+
+    People already registered keep their registration, unless
+    vervang_bestaande: then the imported one replaces it. Returns
+    (combined DataFrame, number of imported rows that matched someone).
+    """
+    if len(bestaand) == 0:
+        return nieuw[KOLOMMEN].copy(), 0
+    bekend = dubbel_sleutel(bestaand)
+    nieuwe_sleutels = dubbel_sleutel(nieuw)
+    dubbel = nieuwe_sleutels.isin(set(bekend))
+    if vervang_bestaande:
+        bestaand = bestaand[~bekend.isin(set(nieuwe_sleutels))]
+    else:
+        nieuw = nieuw[~dubbel]
+    kolommen = list(bestaand.columns) + [k for k in KOLOMMEN if k not in bestaand.columns]
+    return pd.concat([bestaand, nieuw], ignore_index=True)[kolommen], int(dubbel.sum())
+
+def importeer(bron, ronde, vervang_bestaande=False, trainingen=None):
+    """Import a legacy export into the registrations of a round in one locked, batched write; returns the report"""
+    if trainingen is None:
+        trainingen = lees_trainingen()
+    df, rapport = lees_legacy(bron, trainingen)
+
+    def bewerk(bestaand):
+        samen, dubbel = voeg_samen(bestaand, df, vervang_bestaande)
+        rapport["al_aanwezig"] = dubbel
+        rapport["toegevoegd"] = len(df) - (0 if vervang_bestaande else dubbel)
+        return samen
+
+    bewerk_inschrijvingen(ronde, bewerk)
+    return rapport
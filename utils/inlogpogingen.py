@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.bestanden import bestandsslot
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_PAD = BASE_DIR / "data" / "auth_log.jsonl"
+OUDE_LOG_PAD = BASE_DIR / "data" / "auth_log.json"
+MAX_GROOTTE = 1 << 20  # rotate the log past 1 MB ...
+BEWAAR = 5             # ... keeping auth_log.jsonl.1 to .5
+RECENT = 1000
+MAX_PER_IP = 50
+MAX_IPS = 10000
+ONBEKEND = "Unknown"
+
+# Login attempts: one JSON line per attempt, appended to data/auth_log.jsonl.
+# The latest RECENT attempts and the recent failures per IP are kept in
+# memory, so the login form and the history page never read the log.
+_recent = deque(maxlen=RECENT)
+_mislukt = {}  # ip -> times of failed attempts since its last successful login; unknown IPs aren't counted
+_geladen = False
+_lock = threading.Lock()
+
+def _geroteerd(i):
+    return LOG_PAD.with_name(f"{LOG_PAD.name}.{i}")
+
+def _als_tijd(tekst):
+    try:
+        return datetime.strptime(tekst, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+def _onthoud(poging):
+    _recent.append(poging)
+    ip = poging.get("ip_address", ONBEKEND)
+    if ip == ONBEKEND:
+        # Visitors without a known IP would all share one counter
+        return
+    if poging.get("success"):
+        _mislukt.pop(ip, None)
+        return
+    tijd = _als_tijd(poging.get("timestamp"))
+    if tijd is None:
+        return
+    if ip not in _mislukt and len(_mislukt) >= MAX_IPS:
+        _mislukt.pop(next(iter(_mislukt)))  # forget the IP that failed first
+    _mislukt.setdefault(ip, deque(maxlen=MAX_PER_IP)).append(tijd)
+
+def _lees_regels(pad):
+    pogingen = []
+    try:
+        with open(pad, 'r', encoding='utf-8') as f:
+            for regel in f:
+                try:
+                    pogingen.append(json.loads(regel))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return pogingen
+
+def _laad():
+    """Fill the buffers once per process from the tail of the log"""
+    global _geladen
+    if _geladen:
+        return
+    if not LOG_PAD.exists() and OUDE_LOG_PAD.exists():
+        _zet_oude_log_om()
+    pogingen = _lees_regels(LOG_PAD)
+    if len(pogingen) < RECENT:
+        pogingen = _lees_regels(_geroteerd(1))[-(RECENT - len(pogingen)):] + pogingen
+    for poging in pogingen[-RECENT:]:
+        _onthoud(poging)
+    _geladen = True
+
+def _zet_oude_log_om():
+    """Carry the entries of the old auth_log.json over into the JSONL log"""
+    try:
+        with open(OUDE_LOG_PAD, 'r', encoding='utf-8') as f:
+            oud = json.load(f)
+    except ValueError:
+        return
+    with bestandsslot(LOG_PAD):
+        if LOG_PAD.exists():
+            return
+        with open(LOG_PAD, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(poging, ensure_ascii=False) + "\n" for poging in oud)
+
+def _roteer():
+    """Shift auth_log.jsonl to .1, .1 to .2 and so on, dropping the oldest"""
+    with bestandsslot(LOG_PAD):
+        # Another process may have rotated it already
+        if not LOG_PAD.exists() or LOG_PAD.stat().st_size < MAX_GROOTTE:
+            return
+        for i in range(BEWAAR - 1, 0, -1):
+            if _geroteerd(i).exists():
+                os.replace(_geroteerd(i), _geroteerd(i + 1))
+        os.replace(LOG_PAD, _geroteerd(1))
+
+def registreer(success, ip_address=None, timestamp=None):
+    """Record one login attempt: a single append to the log plus the in-memory buffers"""
+    poging = {
+        "timestamp": timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "success": success,
+        "ip_address": ip_address or ONBEKEND,
+        "user_agent": "Admin Dashboard",
+    }
+    regel = (json.dumps(poging, ensure_ascii=False) + "\n").encode('utf-8')
+    with _lock:
+        _laad()
+        _onthoud(poging)
+    os.makedirs(LOG_PAD.parent, exist_ok=True)
+    # O_APPEND keeps lines from different processes whole without a lock
+    fd = os.open(LOG_PAD, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, regel)
+        grootte = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if grootte >= MAX_GROOTTE:
+        _roteer()
+    return poging
+
+def recente_pogingen(aantal=None):
+    """The latest attempts, oldest first"""
+    with _lock:
+        _laad()
+        pogingen = list(_recent)
+    return pogingen[-aantal:] if aantal else pogingen
+
+def mislukte_pogingen(ip_address=None, binnen=timedelta(minutes=15)):
+    """Failed attempts of an IP in the last `binnen`, counting from its last successful login; 0 for an unknown IP"""
+    if not ip_address or ip_address == ONBEKEND:
+        return 0
+    grens = datetime.now() - binnen
+    with _lock:
+        _laad()
+        return sum(1 for tijd in _mislukt.get(ip_address, ()) if tijd >= grens)
+
+def volledige_log():
+    """All retained attempts as JSONL bytes, oldest first, for a download"""
+    delen = []
+    for pad in [_geroteerd(i) for i in range(BEWAAR, 0, -1)] + [LOG_PAD]:
+        try:
+            delen.append(pad.read_bytes())
+        except FileNotFoundError:
+            continue
+    return b"".join(delen)
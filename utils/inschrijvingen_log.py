@@ -0,0 +1,239 @@
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import pandas as pd
+
+from utils.bestanden import bestandsslot, csv_atomisch
+from utils.samenvatting import bereken, schrijf_sidecar
+
+# Phones seen per registration file: csv path -> (file identity, phones, log offset)
+_telefoon_index = {}
+
+# Submissions waiting for the writer thread: (csv path, rows, phone, future)
+_wachtrij = queue.Queue()
+_schrijver = None
+_schrijver_lock = threading.Lock()
+MAX_BATCH = 500
+ACK_TIMEOUT = 30
+
+def log_pad(csv_pad):
+    """The append-only log next to a registration CSV"""
+    csv_pad = Path(csv_pad)
+    return csv_pad.with_name(f"{csv_pad.stem}.log.jsonl")
+
+def _compacterend_pad(csv_pad):
+    return log_pad(csv_pad).with_suffix(".compacting")
+
+def _gecompacteerd_pad(csv_pad):
+    """The compacted CSV, written in full before it replaces the registration CSV"""
+    return log_pad(csv_pad).with_suffix(".compacted")
+
+def _identiteit(pad):
+    try:
+        info = os.stat(pad)
+        return info.st_ino, info.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def lees_log(pad, offset=0):
+    """Log entries from offset on, and the offset after the last complete line"""
+    entries = []
+    with open(pad, 'rb') as f:
+        f.seek(offset)
+        for regel in f:
+            if not regel.endswith(b"\n"):
+                break  # a write still in progress
+            offset += len(regel)
+            try:
+                entries.append(json.loads(regel))
+            except ValueError:
+                continue
+    return entries, offset
+
+def lees_staart(pad, aantal, blok=1 << 16):
+    """The last aantal entries of a log, read backwards from the end in blocks"""
+    with open(pad, 'rb') as f:
+        einde = f.seek(0, os.SEEK_END)
+        positie, staart, entries = einde, b"", []
+        while positie > 0 and len(entries) < aantal:
+            lengte = min(blok, positie)
+            positie -= lengte
+            f.seek(positie)
+            staart = f.read(lengte) + staart
+            regels = staart.split(b"\n")
+            # A line cut off by the block start is only whole once the file start is reached
+            compleet = regels if positie == 0 else regels[1:]
+            entries = []
+            for regel in compleet[:-1]:  # after the last newline: empty or a write still in progress
+                try:
+                    entries.append(json.loads(regel))
+                except ValueError:
+                    continue
+    return entries[-aantal:]
+
+def _bekende_telefoons(csv_pad):
+    """Phones registered in the compacted CSV or the log, updated incrementally"""
+    pad = log_pad(csv_pad)
+    log_identiteit = _identiteit(pad)
+    sleutel = (_identiteit(csv_pad), log_identiteit[0] if log_identiteit else None)
+    bekend, telefoons, offset = _telefoon_index.get(str(csv_pad), (None, set(), 0))
+    if bekend != sleutel:
+        # The CSV was compacted or edited, or the log was rotated: start over
+        telefoons, offset = set(), 0
+        for csv in (csv_pad, _gecompacteerd_pad(csv_pad)):
+            if os.path.exists(csv):
+                df = pd.read_csv(csv, dtype=str, keep_default_na=False)
+                if 'Telefoon' in df.columns:
+                    telefoons.update(df['Telefoon'])
+        bezig = _compacterend_pad(csv_pad)
+        if bezig.exists():
+            telefoons.update(str(e["rij"].get("Telefoon")) for e in lees_log(bezig)[0] if e.get("op") == "add")
+    if pad.exists():
+        entries, offset = lees_log(pad, offset)
+        telefoons.update(str(e["rij"].get("Telefoon")) for e in entries if e.get("op") == "add")
+    _telefoon_index[str(csv_pad)] = (sleutel, telefoons, offset)
+    return telefoons
+
+def _schrijf_batch(csv_pad, items):
+    """Append a batch of submissions to one log with a single write and fsync"""
+    regels = []
+    vervangen = []
+    with bestandsslot(log_pad(csv_pad)):
+        telefoons = _bekende_telefoons(csv_pad)
+        for rijen, telefoon, future in items:
+            vervangen.append(bool(telefoon) and str(telefoon) in telefoons)
+            if telefoon:
+                regels.append({"op": "tombstone", "Telefoon": str(telefoon)})
+                telefoons.add(str(telefoon))
+            regels.extend({"op": "add", "rij": rij} for rij in rijen)
+        data = "".join(json.dumps(regel, ensure_ascii=False, default=str) + "\n" for regel in regels)
+
+        pad = log_pad(csv_pad)
+        os.makedirs(pad.parent, exist_ok=True)
+        with open(pad, 'a', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    return vervangen
+
+def _schrijver_lus():
+    """Writer thread: drain the queue, group by file and commit each group at once"""
+    while True:
+        batch = [_wachtrij.get()]
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(_wachtrij.get_nowait())
+            except queue.Empty:
+                break
+
+        per_bestand = {}
+        for csv_pad, rijen, telefoon, future in batch:
+            per_bestand.setdefault(str(csv_pad), []).append((rijen, telefoon, future))
+        for csv_pad, items in per_bestand.items():
+            try:
+                vervangen = _schrijf_batch(Path(csv_pad), items)
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), was_vervangen in zip(items, vervangen):
+                future.set_result(was_vervangen)
+
+def _start_schrijver():
+    global _schrijver
+    with _schrijver_lock:
+        if _schrijver is None or not _schrijver.is_alive():
+            _schrijver = threading.Thread(target=_schrijver_lus, name="inschrijvingen-schrijver", daemon=True)
+            _schrijver.start()
+
+def voeg_inschrijvingen_toe(csv_pad, rijen, telefoon):
+    """Append registrations to the log of a registration CSV and wait until they are on disk.
+
+    An earlier registration with the same phone number is replaced by writing a
+    tombstone before the new rows; nothing existing is read or rewritten, so
+    the cost doesn't grow with the number of registrations. Submissions from
+    all sessions go through one writer thread that batches them into a single
+    locked append and fsync. Returns whether an earlier registration was replaced.
+    """
+    _start_schrijver()
+    future = Future()
+    _wachtrij.put((csv_pad, list(rijen), telefoon, future))
+    return future.result(timeout=ACK_TIMEOUT)
+
+def compacteer(csv_pad):
+    """Fold the log into the registration CSV that the admin pages read.
+
+    The log is moved aside first, so new registrations go to a fresh log while
+    compacting. Tombstones drop every earlier row with that phone number; added
+    rows are appended in order. Returns the number of log entries applied.
+
+    The result is written in full next to the CSV before the moved log is
+    removed, and only then replaces the CSV. A compaction that was cut short
+    is finished from whichever of the two is left, so no entry is applied twice.
+    """
+    csv_pad = Path(csv_pad)
+    with bestandsslot(csv_pad):
+        return _compacteer(csv_pad)
+
+def voltooi_compactie(csv_pad):
+    """Put the result of an interrupted compaction in place; the caller holds the lock of the CSV"""
+    gecompacteerd = _gecompacteerd_pad(csv_pad)
+    if not gecompacteerd.exists():
+        return
+    # Its entries are in the compacted CSV already
+    bezig = _compacterend_pad(csv_pad)
+    if bezig.exists():
+        os.remove(bezig)
+    os.replace(gecompacteerd, csv_pad)
+    schrijf_sidecar(csv_pad, bereken(pd.read_csv(csv_pad, dtype=str, keep_default_na=False)))
+
+def _compacteer(csv_pad):
+    voltooi_compactie(csv_pad)
+    pad = log_pad(csv_pad)
+    bezig = _compacterend_pad(csv_pad)
+    if not bezig.exists():
+        if not pad.exists():
+            return 0
+        # Under the log lock no append is half-way; later ones start a new log
+        with bestandsslot(pad):
+            os.replace(pad, bezig)
+
+    entries, _ = lees_log(bezig)
+    if os.path.exists(csv_pad):
+        df = pd.read_csv(csv_pad, dtype=str, keep_default_na=False)
+    else:
+        df = pd.DataFrame()
+
+    # A row survives unless a tombstone for its phone comes after it
+    rijen = df.to_dict("records")
+    laatste_tombstone = {}
+    for entry in entries:
+        if entry.get("op") == "tombstone":
+            laatste_tombstone[entry["Telefoon"]] = len(rijen)
+        elif entry.get("op") == "add":
+            rijen.append(entry["rij"])
+    rijen = [r for i, r in enumerate(rijen) if laatste_tombstone.get(str(r.get("Telefoon")), -1) <= i]
+
+    if rijen or len(df.columns):
+        kolommen = list(df.columns) + [k for r in rijen for k in r if k not in df.columns]
+        kolommen = list(dict.fromkeys(kolommen))
+        df_nieuw = pd.DataFrame(rijen, columns=kolommen)
+        csv_atomisch(df_nieuw, _gecompacteerd_pad(csv_pad))
+        os.remove(bezig)
+        os.replace(_gecompacteerd_pad(csv_pad), csv_pad)
+        schrijf_sidecar(csv_pad, bereken(df_nieuw))
+    else:
+        os.remove(bezig)
+    return len(entries)
+
+def verwijder_log(csv_pad):
+    """Remove the log of a registration CSV, e.g. when a period is cleared"""
+    with bestandsslot(csv_pad), bestandsslot(log_pad(csv_pad)):
+        for pad in (log_pad(csv_pad), _compacterend_pad(csv_pad), _gecompacteerd_pad(csv_pad)):
+            if pad.exists():
+                os.remove(pad)
+        _telefoon_index.pop(str(csv_pad), None)
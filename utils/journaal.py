@@ -0,0 +1,57 @@
+import copy
+
+# A change to a JSON document is a list of operations on paths of dict keys and list indexes:
+#   {"op": "zet", "pad": [...], "waarde": v}          replace or add the value at pad
+#   {"op": "verwijder", "pad": [...]}                  remove a dict key
+#   {"op": "voeg_toe", "pad": [...], "waarden": [...]} extend the list at pad
+# verschil() only descends into what changed, so a manual assignment is a
+# single voeg_toe of one entry rather than the whole planning.
+
+def verschil(oud, nieuw, pad=()):
+    """Operations that turn oud into nieuw"""
+    if isinstance(oud, dict) and isinstance(nieuw, dict):
+        ops = []
+        for sleutel in oud:
+            if sleutel not in nieuw:
+                ops.append({"op": "verwijder", "pad": list(pad) + [sleutel]})
+        for sleutel, waarde in nieuw.items():
+            if sleutel not in oud:
+                ops.append({"op": "zet", "pad": list(pad) + [sleutel], "waarde": waarde})
+            elif oud[sleutel] != waarde:
+                ops.extend(verschil(oud[sleutel], waarde, pad + (sleutel,)))
+        return ops
+    if isinstance(oud, list) and isinstance(nieuw, list):
+        if len(nieuw) > len(oud) and nieuw[:len(oud)] == oud:
+            return [{"op": "voeg_toe", "pad": list(pad), "waarden": nieuw[len(oud):]}]
+        if len(nieuw) == len(oud):
+            ops = []
+            for i, (a, b) in enumerate(zip(oud, nieuw)):
+                if a != b:
+                    ops.extend(verschil(a, b, pad + (i,)))
+            return ops
+    if oud == nieuw and type(oud) is type(nieuw):
+        return []
+    return [{"op": "zet", "pad": list(pad), "waarde": nieuw}]
+
+def pas_toe(document, ops):
+    """Apply operations from verschil() to document in place; returns the (possibly replaced) document"""
+    for op in ops:
+        pad = op["pad"]
+        if not pad:
+            # The whole document was replaced
+            document = copy.deepcopy(op["waarde"])
+            continue
+        ouder = document
+        for stap in pad[:-1]:
+            ouder = ouder[stap]
+        laatste = pad[-1]
+        if op["op"] == "zet":
+            if isinstance(ouder, list) and laatste == len(ouder):
+                ouder.append(copy.deepcopy(op["waarde"]))
+            else:
+                ouder[laatste] = copy.deepcopy(op["waarde"])
+        elif op["op"] == "verwijder":
+            del ouder[laatste]
+        elif op["op"] == "voeg_toe":
+            ouder[laatste].extend(copy.deepcopy(op["waarden"]))
+    return document
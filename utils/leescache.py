@@ -0,0 +1,69 @@
+import os
+import threading
+
+import pandas as pd
+
+# Process-wide: every session of the admin app and the pages share it
+_cache = {}
+_tellers = {}
+_lock = threading.Lock()
+
+# With copy-on-write a shallow copy can't change the cached frame
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+def bestand_identiteit(*paden):
+    """(inode, mtime, size) of each file, None for a missing one; changes whenever a file is written or replaced"""
+    identiteit = []
+    for pad in paden:
+        try:
+            info = os.stat(pad)
+            identiteit.append((info.st_ino, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            identiteit.append(None)
+    return tuple(identiteit)
+
+def _uitgeven(waarde):
+    if isinstance(waarde, pd.DataFrame):
+        return waarde.copy(deep=not _COPY_ON_WRITE)
+    return waarde
+
+def gecached(sleutel, identiteit, laad):
+    """The value cached under sleutel, or laad() when identiteit changed since it was cached.
+
+    DataFrames are handed out as copies, so callers may change them freely
+    without affecting the cache or each other.
+    """
+    with _lock:
+        tellers = _tellers.setdefault(sleutel, {"hits": 0, "misses": 0})
+        gevonden = _cache.get(sleutel)
+        if gevonden is not None and gevonden[0] == identiteit:
+            tellers["hits"] += 1
+            return _uitgeven(gevonden[1])
+        tellers["misses"] += 1
+    waarde = laad()
+    with _lock:
+        _cache[sleutel] = (identiteit, waarde)
+    return _uitgeven(waarde)
+
+def zet(sleutel, identiteit, waarde):
+    """Store a value the caller just wrote itself, so the next read is a hit"""
+    with _lock:
+        _cache[sleutel] = (identiteit, waarde)
+
+def vergeet(sleutel=None):
+    """Drop one cached value, or all of them"""
+    with _lock:
+        if sleutel is None:
+            _cache.clear()
+        else:
+            _cache.pop(sleutel, None)
+
+def statistieken():
+    """Hits and misses per cached item since the process started"""
+    with _lock:
+        per_item = {sleutel: dict(tellers) for sleutel, tellers in _tellers.items()}
+    return {
+        "hits": sum(t["hits"] for t in per_item.values()),
+        "misses": sum(t["misses"] for t in per_item.values()),
+        "items": per_item,
+    }
@@ -1,71 +1,141 @@
 import pandas as pd
+import numpy as np
 from collections import defaultdict
 
+VOORKEUR_KOLOMMEN = ["Voorkeur_1", "Voorkeur_2", "Voorkeur_3"]
+
+def naar_niveau(nv):
+    try:
+        return float(str(nv).replace(",", "."))
+    except:
+        return None
+
+def training_label(rij):
+    """Build the display label of a training row, as used in the planning"""
+    if 'Training Naam' in rij and pd.notna(rij['Training Naam']):
+        # Backward compatibility: use Training Naam if available
+        return f"{rij['Dag']} {rij['Tijd']} - {rij['Training Naam']}"
+    # New format: use trainer name if available
+    trainer_text = f" - {rij['Trainer']}" if pd.notna(rij['Trainer']) and rij['Trainer'].strip() else ""
+    return f"{rij['Dag']} {rij['Tijd']}{trainer_text}"
+
+def training_labels(trainingen):
+    """Labels for all training rows, in row order"""
+    return [training_label(rij) for _, rij in trainingen.iterrows()]
+
+def vrije_plekken(trainingen):
+    """Free spots per training row as an int array; fractional capacities round up"""
+    capaciteit = np.nan_to_num(trainingen["Capaciteit"].to_numpy(dtype=float), nan=0.0)
+    return np.ceil(capaciteit).clip(min=0).astype(np.int64)
+
+def dag_matrix(keuzes, dagen):
+    """Boolean matrix (keuzes x trainingen): does the choice start with the training day"""
+    matrix = np.zeros((len(keuzes), len(dagen)), dtype=bool)
+    for k, keuze in enumerate(keuzes):
+        keuze = keuze.strip()
+        for t, dag in enumerate(dagen):
+            matrix[k, t] = isinstance(dag, str) and keuze.startswith(dag)
+    return matrix
+
+def keuze_matrix(keuzes, trainingen):
+    """Boolean matrix (keuzes x trainingen) of the trainings each preference string points to.
+
+    Strings the resolver recognises point to exactly one training. Unknown
+    strings fall back to matching every training on the same day.
+    """
+    from utils.resolver import get_resolver, resolve_keuze, is_geen_keuze
+    resolver = get_resolver(trainingen)
+    matrix = dag_matrix(keuzes, trainingen["Dag"].tolist())
+    for k, keuze in enumerate(keuzes):
+        positie = resolve_keuze(resolver, keuze)
+        if positie is not None:
+            matrix[k] = False
+            matrix[k, positie] = True
+        elif is_geen_keuze(keuze):
+            matrix[k] = False
+    return matrix
+
+def opgaves_tekst(speler_voorkeuren):
+    voorkeuren = []
+    for pref_val in speler_voorkeuren:
+        if pd.notna(pref_val) and str(pref_val).strip():
+            voorkeuren.append(str(pref_val).strip())
+    return ", ".join(voorkeuren) if voorkeuren else "Geen opgaves"
+
+def handmatig_reden(voorkeuren, niveau, laagste, hoogste):
+    """Reason shown to the admin when a player could not be placed automatically"""
+    if all(pd.isna(v) for v in voorkeuren):
+        return "Geen voorkeuren opgegeven"
+    elif niveau is None:
+        return "Niveau ontbreekt"
+    elif niveau < laagste:
+        return "Niveau te laag voor alle trainingen"
+    elif niveau > hoogste:
+        return "Niveau te hoog voor alle trainingen"
+    return "Alle voorkeuren zaten vol of geen match"
+
 def plan_spelers(inschrijvingen, trainingen):
-    trainingen = trainingen.copy()
-    trainingen["Beschikbaar"] = trainingen["Capaciteit"] + 1
     toegewezen_per_training = defaultdict(list)
     handmatig = []
 
     inschrijvingen["Inschrijfdatum"] = pd.to_datetime(inschrijvingen["Inschrijfdatum"], errors='coerce')
     inschrijvingen = inschrijvingen.sort_values("Inschrijfdatum")
 
-    def naar_niveau(nv):
-        try:
-            return float(str(nv).replace(",", "."))
-        except:
-            return None
-
-    def vind_training(keuze, niveau):
-        if pd.isna(keuze):
-            return None, None
-        for i, rij in trainingen.iterrows():
-            if keuze.strip().startswith(rij["Dag"]):
-                if rij["MinNiveau"] <= niveau <= rij["MaxNiveau"] and trainingen.at[i, "Beschikbaar"] > 1:
-                    trainingen.at[i, "Beschikbaar"] -= 1
-                    # Create training label based on available columns
-                    if 'Training Naam' in rij and pd.notna(rij['Training Naam']):
-                        # Backward compatibility: use Training Naam if available
-                        label = f"{rij['Dag']} {rij['Tijd']} - {rij['Training Naam']}"
-                    else:
-                        # New format: use trainer name if available
-                        trainer_text = f" - {rij['Trainer']}" if pd.notna(rij['Trainer']) and rij['Trainer'].strip() else ""
-                        label = f"{rij['Dag']} {rij['Tijd']}{trainer_text}"
-                    return label, i
-        return None, None
-
-    for _, speler in inschrijvingen.iterrows():
-        naam = speler["Naam"]
-        niveau = naar_niveau(speler["Niveau"])
-
-        if pd.isna(speler.get("Voorkeur_1")) and pd.isna(speler.get("Voorkeur_2")) and pd.isna(speler.get("Voorkeur_3")):
-            reden = "Geen voorkeuren opgegeven"
-        elif niveau is None:
-            reden = "Niveau ontbreekt"
-        elif niveau < trainingen["MinNiveau"].min():
-            reden = "Niveau te laag voor alle trainingen"
-        elif niveau > trainingen["MaxNiveau"].max():
-            reden = "Niveau te hoog voor alle trainingen"
-        else:
-            reden = "Alle voorkeuren zaten vol of geen match"
-
-        toegewezen, _ = (
-            vind_training(speler.get("Voorkeur_1"), niveau)
-            or vind_training(speler.get("Voorkeur_2"), niveau)
-            or vind_training(speler.get("Voorkeur_3"), niveau)
-        )
-
-        if toegewezen:
-            toegewezen_per_training[toegewezen].append((naam, niveau))
-        else:
-            # Collect preferences for manual assignment
-            voorkeuren = []
-            for pref_col in ["Voorkeur_1", "Voorkeur_2", "Voorkeur_3"]:
-                pref_val = speler.get(pref_col)
-                if pd.notna(pref_val) and str(pref_val).strip():
-                    voorkeuren.append(str(pref_val).strip())
-            
-            opgaves_text = ", ".join(voorkeuren) if voorkeuren else "Geen opgaves"
-            handmatig.append((naam, niveau if niveau is not None else "?", opgaves_text, reden))
-
-    return toegewezen_per_training, handmatig
\ No newline at end of file
+    n_spelers = len(inschrijvingen)
+    if n_spelers == 0:
+        return toegewezen_per_training, handmatig
+
+    labels = training_labels(trainingen)
+    min_niveau = trainingen["MinNiveau"].to_numpy(dtype=float)
+    max_niveau = trainingen["MaxNiveau"].to_numpy(dtype=float)
+    vrij = vrije_plekken(trainingen)
+
+    namen = inschrijvingen["Naam"].tolist()
+    niveaus = [naar_niveau(nv) for nv in inschrijvingen["Niveau"].tolist()]
+    niveau_arr = np.array([np.nan if nv is None else nv for nv in niveaus], dtype=float)
+
+    kolommen = {
+        col: inschrijvingen[col].tolist() if col in inschrijvingen.columns else [None] * n_spelers
+        for col in VOORKEUR_KOLOMMEN
+    }
+
+    # Only the first preference is ever tried: a miss returns the truthy tuple
+    # (None, None), which short-circuits the fallback to Voorkeur_2/Voorkeur_3.
+    eerste = pd.Series(kolommen["Voorkeur_1"], dtype=object)
+    codes, keuzes = pd.factorize(eerste.where(eerste.map(lambda v: isinstance(v, str))))
+    matrix = keuze_matrix(list(keuzes), trainingen)
+
+    # Greedy first-come-first-served, resolved per training: every player picks the
+    # lowest-indexed matching training with room (a resolved preference has only one), so filling training t with the
+    # earliest eligible players that were not placed in an earlier training gives
+    # exactly the same result as walking the players one by one.
+    toewijzing = np.full(n_spelers, -1, dtype=np.int64)
+    heeft_keuze = codes >= 0
+    veilige_codes = np.where(heeft_keuze, codes, 0)
+    with np.errstate(invalid='ignore'):
+        for t in range(len(labels)):
+            if vrij[t] <= 0 or len(keuzes) == 0:
+                continue
+            kandidaten = (
+                (toewijzing < 0)
+                & heeft_keuze
+                & matrix[veilige_codes, t]
+                & (min_niveau[t] <= niveau_arr)
+                & (niveau_arr <= max_niveau[t])
+            )
+            gekozen = np.flatnonzero(kandidaten)[:vrij[t]]
+            toewijzing[gekozen] = t
+
+    laagste = trainingen["MinNiveau"].min()
+    hoogste = trainingen["MaxNiveau"].max()
+    for i in range(n_spelers):
+        niveau = niveaus[i]
+        if toewijzing[i] >= 0:
+            toegewezen_per_training[labels[toewijzing[i]]].append((namen[i], niveau))
+            continue
+
+        voorkeuren = [kolommen[col][i] for col in VOORKEUR_KOLOMMEN]
+        reden = handmatig_reden(voorkeuren, niveau, laagste, hoogste)
+        handmatig.append((namen[i], niveau if niveau is not None else "?", opgaves_tekst(voorkeuren), reden))
+
+    return toegewezen_per_training, handmatig
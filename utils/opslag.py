@@ -0,0 +1,688 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.bestanden import bestandsslot, csv_atomisch, schrijf_atomisch
+from utils.inschrijvingen_log import voeg_inschrijvingen_toe, compacteer, voltooi_compactie, verwijder_log, lees_log, lees_staart
+from utils.journaal import verschil, pas_toe
+from utils.planningformaat import VERSIE as PLANNING_VERSIE, normaliseer, denormaliseer, is_genormaliseerd, toewijzing_rijen
+from utils.leescache import gecached, bestand_identiteit, zet
+from utils.archief import lees_archief, archief_pad
+from utils.samenvatting import bereken, werk_bij, schrijf_sidecar, lees_sidecar, verwijder_sidecar
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "data"
+DB_PATH = DATA_DIR / "tennis.db"
+ARCHIEF_DIR = BASE_DIR / "archive"
+TRAININGEN_PATH = DATA_DIR / "trainings.csv"
+RONDES = (1, 2, 3)
+
+# JSON documents of the file layout, by name
+DOCUMENTEN = ("ronde_planning_status", "periode_status", "working_period", "wachtlijst")
+WACHTLIJST_DOCUMENT = "wachtlijst"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inschrijvingen (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ronde INTEGER NOT NULL,
+    telefoon TEXT,
+    naam TEXT,
+    inschrijfdatum TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_inschrijvingen_ronde_datum ON inschrijvingen (ronde, inschrijfdatum);
+CREATE INDEX IF NOT EXISTS idx_inschrijvingen_telefoon ON inschrijvingen (telefoon, ronde);
+CREATE TABLE IF NOT EXISTS trainingen (
+    positie INTEGER PRIMARY KEY,
+    dag TEXT,
+    tijd TEXT,
+    min_niveau REAL,
+    max_niveau REAL,
+    capaciteit REAL,
+    trainer TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS toewijzingen (
+    ronde INTEGER NOT NULL,
+    naam TEXT NOT NULL,
+    training TEXT NOT NULL,
+    soort TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_toewijzingen_ronde ON toewijzingen (ronde, training);
+CREATE INDEX IF NOT EXISTS idx_toewijzingen_naam ON toewijzingen (naam);
+CREATE TABLE IF NOT EXISTS periodes (
+    naam TEXT PRIMARY KEY,
+    soort TEXT NOT NULL,
+    gearchiveerd TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documenten (
+    naam TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samenvattingen (
+    ronde INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS planning_journaal (
+    nr INTEGER PRIMARY KEY,
+    tijd TEXT NOT NULL,
+    soort TEXT NOT NULL,
+    details TEXT NOT NULL,
+    wijzigingen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versies (
+    naam TEXT PRIMARY KEY,
+    versie INTEGER NOT NULL
+);
+"""
+
+_lokaal = threading.local()
+
+def sqlite_actief():
+    """Whether storage goes to data/tennis.db instead of the CSV/JSON files.
+
+    The database is used once migreer_naar_sqlite() has created it; set
+    TENNIS_OPSLAG=bestanden to force the file layout.
+    """
+    return DB_PATH.exists() and os.environ.get("TENNIS_OPSLAG") != "bestanden"
+
+def verbinding(pad=None):
+    """SQLite connection for this thread, in WAL mode"""
+    pad = str(pad or DB_PATH)
+    verbindingen = getattr(_lokaal, "verbindingen", None)
+    if verbindingen is None:
+        verbindingen = _lokaal.verbindingen = {}
+    if pad not in verbindingen:
+        os.makedirs(Path(pad).parent, exist_ok=True)
+        conn = sqlite3.connect(pad, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        verbindingen[pad] = conn
+    return verbindingen[pad]
+
+def _json_waarden(rij):
+    """Row dict with NaN replaced by None, ready for json.dumps"""
+    return {k: (None if isinstance(v, float) and pd.isna(v) else v) for k, v in rij.items()}
+
+def _df_uit_json(regels):
+    return pd.DataFrame([json.loads(r) for r in regels]) if regels else pd.DataFrame()
+
+def inschrijvingen_pad(ronde):
+    return DATA_DIR / f"training{ronde}_inschrijvingen.csv"
+
+def _identiteit(pad):
+    """Cache identity of a data file, or its version counter in the database once migrated.
+
+    File writes go through an atomic replace, so the inode changes on every write.
+    """
+    if sqlite_actief():
+        regel = verbinding().execute("SELECT versie FROM versies WHERE naam = ?", (pad.name,)).fetchone()
+        return ("sqlite", str(DB_PATH), regel[0] if regel else 0)
+    return ("bestand",) + bestand_identiteit(pad)
+
+def _verhoog_versie(conn, pad):
+    conn.execute("INSERT INTO versies (naam, versie) VALUES (?, 1) ON CONFLICT (naam) DO UPDATE SET versie = versie + 1",
+                 (pad.name,))
+
+# --- Registrations ---
+
+def _laad_inschrijvingen(ronde):
+    if sqlite_actief():
+        regels = verbinding().execute("SELECT data FROM inschrijvingen WHERE ronde = ? ORDER BY id", (ronde,)).fetchall()
+        return _df_uit_json([r[0] for r in regels])
+    pad = inschrijvingen_pad(ronde)
+    return pd.read_csv(pad) if pad.exists() else pd.DataFrame()
+
+def werkperiode_map():
+    """Archive folder the working period points at, or None when planning against the live registrations"""
+    werkperiode = lees_document("working_period")
+    if werkperiode and werkperiode.get("type") == "archive":
+        periode_dir = ARCHIEF_DIR / werkperiode["name"]
+        if periode_dir.is_dir():
+            return periode_dir
+    return None
+
+def _archief_bron(ronde, live):
+    """(cache key, identity, archive file) of a round in the working period, or None for live data"""
+    periode_dir = None if live else werkperiode_map()
+    if periode_dir is None:
+        return None
+    pad = archief_pad(periode_dir, ronde)
+    return f"{periode_dir.name}/{pad.name if pad else ronde}", ("archief",) + bestand_identiteit(pad or periode_dir), pad
+
+def lees_inschrijvingen(ronde, live=False):
+    """All registrations of a round as a DataFrame, in the order they were saved.
+
+    Reads the archive files of the working period in place when it points
+    at an archive; live=True always reads the live registrations (for
+    cleaning, archiving and exporting them). Parsed once per change of the
+    underlying file and shared by all sessions.
+    """
+    archief = _archief_bron(ronde, live)
+    if archief is not None:
+        sleutel, identiteit, pad = archief
+        if pad is None:
+            return pd.DataFrame()
+        return gecached(sleutel, identiteit, lambda: lees_archief(pad, tijden_als_tekst=True))
+    pad = inschrijvingen_pad(ronde)
+    return gecached(pad.name, _identiteit(pad), lambda: _laad_inschrijvingen(ronde))
+
+def inschrijvingen_bron(ronde, live=False):
+    """(cache key, identity) of the registrations lees_inschrijvingen reads, for values derived from them"""
+    archief = _archief_bron(ronde, live)
+    if archief is not None:
+        return archief[0], archief[1]
+    pad = inschrijvingen_pad(ronde)
+    return pad.name, _identiteit(pad)
+
+def _sla_samenvatting_op(conn, ronde, samenvatting):
+    conn.execute("INSERT OR REPLACE INTO samenvattingen (ronde, data) VALUES (?, ?)",
+                 (ronde, json.dumps(samenvatting, ensure_ascii=False)))
+
+def _samenvatting_uit_db(conn, ronde):
+    regel = conn.execute("SELECT data FROM samenvattingen WHERE ronde = ?", (ronde,)).fetchone()
+    return json.loads(regel[0]) if regel else None
+
+def lees_samenvatting(ronde, live=False):
+    """Count, unique phones, level histogram and preference demand of a round (see utils.samenvatting).
+
+    Kept up to date by every write, so reading it doesn't touch the
+    registrations; it is only rebuilt when missing or out of date. An
+    archived working period is summarised once per archive file.
+    """
+    archief = _archief_bron(ronde, live)
+    if archief is not None:
+        sleutel, identiteit, pad = archief
+        return gecached(f"{sleutel} (samenvatting)", identiteit, lambda: bereken(lees_inschrijvingen(ronde)))
+    if sqlite_actief():
+        samenvatting = _samenvatting_uit_db(verbinding(), ronde)
+        if samenvatting is None:
+            samenvatting = bereken(lees_inschrijvingen(ronde, live=True))
+            _sla_samenvatting_op(verbinding(), ronde, samenvatting)
+        return samenvatting
+    pad = inschrijvingen_pad(ronde)
+    samenvatting = lees_sidecar(pad)
+    if samenvatting is None:
+        with bestandsslot(pad):
+            samenvatting = bereken(_laad_inschrijvingen(ronde))
+            if pad.exists():
+                schrijf_sidecar(pad, samenvatting)
+    return samenvatting
+
+def aantal_inschrijvingen(ronde, live=False):
+    return lees_samenvatting(ronde, live)["aantal"]
+
+def inschrijvingen_aanwezig(ronde, live=False):
+    archief = _archief_bron(ronde, live)
+    if archief is not None:
+        return archief[2] is not None
+    if sqlite_actief():
+        return verbinding().execute("SELECT 1 FROM inschrijvingen WHERE ronde = ? LIMIT 1", (ronde,)).fetchone() is not None
+    return inschrijvingen_pad(ronde).exists()
+
+def _voeg_rijen_toe(conn, ronde, rijen):
+    conn.executemany(
+        "INSERT INTO inschrijvingen (ronde, telefoon, naam, inschrijfdatum, data) VALUES (?, ?, ?, ?, ?)",
+        [(ronde, None if rij.get("Telefoon") is None else str(rij.get("Telefoon")), rij.get("Naam"),
+          None if rij.get("Inschrijfdatum") is None else str(rij.get("Inschrijfdatum")),
+          json.dumps(_json_waarden(rij), ensure_ascii=False, default=str))
+         for rij in rijen])
+
+def _voeg_trainingen_toe(conn, df):
+    conn.executemany(
+        "INSERT INTO trainingen (positie, dag, tijd, min_niveau, max_niveau, capaciteit, trainer, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(i, rij.get("Dag"), rij.get("Tijd"), rij.get("MinNiveau"), rij.get("MaxNiveau"), rij.get("Capaciteit"),
+          rij.get("Trainer"), json.dumps(rij, ensure_ascii=False, default=str))
+         for i, rij in enumerate(_json_waarden(r) for r in df.to_dict("records"))])
+
+def sla_inschrijvingen_op(ronde, rijen, telefoon):
+    """Save a submission for a round, replacing earlier rows with the same phone; returns whether any were replaced"""
+    if not sqlite_actief():
+        return voeg_inschrijvingen_toe(inschrijvingen_pad(ronde), rijen, telefoon)
+    conn = verbinding()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        verwijderd = []
+        if telefoon:
+            verwijderd = [json.loads(r[0]) for r in conn.execute(
+                "SELECT data FROM inschrijvingen WHERE telefoon = ? AND ronde = ?", (str(telefoon), ronde))]
+            conn.execute("DELETE FROM inschrijvingen WHERE telefoon = ? AND ronde = ?", (str(telefoon), ronde))
+        _voeg_rijen_toe(conn, ronde, rijen)
+        samenvatting = _samenvatting_uit_db(conn, ronde)
+        if samenvatting is None:
+            samenvatting = bereken(_laad_inschrijvingen(ronde))
+        else:
+            telefoons_erbij = len({str(r["Telefoon"]) for r in rijen if r.get("Telefoon")}) - (1 if verwijderd else 0)
+            samenvatting = werk_bij(samenvatting, rijen, verwijderd, telefoons_erbij)
+        _sla_samenvatting_op(conn, ronde, samenvatting)
+        _verhoog_versie(conn, inschrijvingen_pad(ronde))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return bool(verwijderd)
+
+def vervang_inschrijvingen(ronde, df):
+    """Replace all registrations of a round, e.g. after cleaning duplicates or restoring an archive"""
+    if not sqlite_actief():
+        pad = inschrijvingen_pad(ronde)
+        with bestandsslot(pad):
+            # An interrupted compaction would otherwise overwrite this later
+            voltooi_compactie(pad)
+            csv_atomisch(df, pad)
+            schrijf_sidecar(pad, bereken(df))
+        return
+    conn = verbinding()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM inschrijvingen WHERE ronde = ?", (ronde,))
+        _voeg_rijen_toe(conn, ronde, df.to_dict("records"))
+        _sla_samenvatting_op(conn, ronde, bereken(df))
+        _verhoog_versie(conn, inschrijvingen_pad(ronde))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def bewerk_inschrijvingen(ronde, bewerk):
+    """Read, change and write back the registrations of a round in one locked step.
+
+    bewerk(df) returns the new DataFrame, or None to leave everything as is.
+    Returns what bewerk returned.
+    """
+    if not sqlite_actief():
+        pad = inschrijvingen_pad(ronde)
+        with bestandsslot(pad):
+            voltooi_compactie(pad)
+            nieuw = bewerk(pd.read_csv(pad) if pad.exists() else pd.DataFrame())
+            if nieuw is not None:
+                csv_atomisch(nieuw, pad)
+                schrijf_sidecar(pad, bereken(nieuw))
+        return nieuw
+    conn = verbinding()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        nieuw = bewerk(lees_inschrijvingen(ronde, live=True))
+        if nieuw is not None:
+            conn.execute("DELETE FROM inschrijvingen WHERE ronde = ?", (ronde,))
+            _voeg_rijen_toe(conn, ronde, nieuw.to_dict("records"))
+            _sla_samenvatting_op(conn, ronde, bereken(nieuw))
+            _verhoog_versie(conn, inschrijvingen_pad(ronde))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return nieuw
+
+def wis_inschrijvingen(ronde):
+    """Remove all registrations of a round; returns whether there were any"""
+    pad = inschrijvingen_pad(ronde)
+    if sqlite_actief():
+        conn = verbinding()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            gewist = conn.execute("DELETE FROM inschrijvingen WHERE ronde = ?", (ronde,)).rowcount > 0
+            conn.execute("DELETE FROM samenvattingen WHERE ronde = ?", (ronde,))
+            _verhoog_versie(conn, pad)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return gewist
+    verwijder_log(pad)
+    verwijder_sidecar(pad)
+    if pad.exists():
+        os.remove(pad)
+        return True
+    return False
+
+def exporteer_inschrijvingen(ronde, doel):
+    """Write the registrations of a round as CSV to doel; returns whether there were any"""
+    if not sqlite_actief():
+        pad = inschrijvingen_pad(ronde)
+        compacteer(pad)
+        if not pad.exists():
+            return False
+        shutil.copy2(pad, doel)
+        return True
+    if not inschrijvingen_aanwezig(ronde, live=True):
+        return False
+    lees_inschrijvingen(ronde, live=True).to_csv(doel, index=False)
+    return True
+
+def compacteer_inschrijvingen():
+    """Fold pending submissions into the registration files (nothing to do with SQLite)"""
+    if not sqlite_actief():
+        for ronde in RONDES:
+            compacteer(inschrijvingen_pad(ronde))
+
+# --- Trainings ---
+
+def trainingen_aanwezig():
+    if sqlite_actief():
+        return verbinding().execute("SELECT 1 FROM trainingen LIMIT 1").fetchone() is not None
+    return TRAININGEN_PATH.exists()
+
+def _laad_trainingen():
+    if sqlite_actief():
+        regels = verbinding().execute("SELECT data FROM trainingen ORDER BY positie").fetchall()
+        return _df_uit_json([r[0] for r in regels])
+    return pd.read_csv(TRAININGEN_PATH) if TRAININGEN_PATH.exists() else pd.DataFrame()
+
+def lees_trainingen():
+    return gecached(TRAININGEN_PATH.name, _identiteit(TRAININGEN_PATH), _laad_trainingen)
+
+def schrijf_trainingen(df):
+    if not sqlite_actief():
+        csv_atomisch(df, TRAININGEN_PATH)
+        return
+    conn = verbinding()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM trainingen")
+        _voeg_trainingen_toe(conn, df)
+        _verhoog_versie(conn, TRAININGEN_PATH)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+# --- State documents ---
+
+def lees_document(naam, standaard=None):
+    """A JSON state document (periode_status, working_period), or standaard.
+
+    The round planning status is journaled; read it with lees_planning_status().
+    """
+    if sqlite_actief():
+        regel = verbinding().execute("SELECT data FROM documenten WHERE naam = ?", (naam,)).fetchone()
+        return json.loads(regel[0]) if regel else standaard
+    pad = DATA_DIR / f"{naam}.json"
+    if pad.exists():
+        try:
+            with open(pad, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    return standaard
+
+def document_aanwezig(naam):
+    if sqlite_actief():
+        return verbinding().execute("SELECT 1 FROM documenten WHERE naam = ?", (naam,)).fetchone() is not None
+    return (DATA_DIR / f"{naam}.json").exists()
+
+def schrijf_document(naam, data):
+    if not sqlite_actief():
+        schrijf_atomisch(DATA_DIR / f"{naam}.json",
+                         lambda pad: pad.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8'))
+        return
+    conn = verbinding()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("INSERT OR REPLACE INTO documenten (naam, data) VALUES (?, ?)",
+                     (naam, json.dumps(data, ensure_ascii=False, default=str)))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def verwijder_document(naam):
+    if sqlite_actief():
+        verbinding().execute("DELETE FROM documenten WHERE naam = ?", (naam,))
+        return
+    pad = DATA_DIR / f"{naam}.json"
+    if pad.exists():
+        os.remove(pad)
+
+# --- Planning journal ---
+#
+# The round planning status is stored as a snapshot (the ronde_planning_status
+# document, with "_journaal": {"nr", "offset"} of the last event it includes)
+# plus an append-only journal of events. Every change appends one event with
+# just the operations that changed the status (see utils.journaal); every
+# SNAPSHOT_ELKE events the full status is written as a new snapshot. The
+# journal is never truncated, so it doubles as the audit trail.
+#
+# Snapshot and events are in the compact form of utils.planningformaat.
+# Files from before that format are migrated on load; the first change after
+# that writes a new snapshot, so older events never need replaying again.
+
+PLANNING_DOCUMENT = "ronde_planning_status"
+SNAPSHOT_ELKE = 100
+
+def planning_journaal_pad():
+    return DATA_DIR / "ronde_planning_journal.jsonl"
+
+def _snapshot_pad():
+    return DATA_DIR / f"{PLANNING_DOCUMENT}.json"
+
+def _gemigreerd(status, nr, offset, sinds, snapshot_actueel):
+    """The loaded planning in the compact form; a snapshot in the old form is replaced on the next write"""
+    if status is None:
+        return None, nr, offset, sinds
+    if not is_genormaliseerd(status):
+        status = normaliseer(status)
+    return status, nr, offset, sinds if snapshot_actueel else SNAPSHOT_ELKE
+
+def _laad_planning():
+    """(status in the compact form or None, last event nr, journal offset, events since the snapshot)"""
+    if sqlite_actief():
+        conn = verbinding()
+        regel = conn.execute("SELECT data FROM documenten WHERE naam = ?", (PLANNING_DOCUMENT,)).fetchone()
+        status = json.loads(regel[0]) if regel else None
+        meta = (status or {}).pop("_journaal", {"nr": 0})
+        snapshot_actueel = status is None or is_genormaliseerd(status)
+        events = [json.loads(r[0]) for r in conn.execute(
+            "SELECT wijzigingen FROM planning_journaal WHERE nr > ? ORDER BY nr", (meta["nr"],))]
+        laatste = conn.execute("SELECT MAX(nr) FROM planning_journaal").fetchone()[0] or meta["nr"]
+        for wijzigingen in events:
+            status = pas_toe(status if status is not None else {}, wijzigingen)
+        return _gemigreerd(status, laatste, 0, len(events), snapshot_actueel)
+
+    status = None
+    if _snapshot_pad().exists():
+        try:
+            with open(_snapshot_pad(), 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except ValueError:
+            pass
+    meta = (status or {}).pop("_journaal", {"nr": 0, "offset": 0})
+    snapshot_actueel = status is None or is_genormaliseerd(status)
+    nr, offset, sinds = meta["nr"], meta.get("offset", 0), 0
+    if planning_journaal_pad().exists():
+        events, offset = lees_log(planning_journaal_pad(), offset)
+        for event in events:
+            if event["nr"] <= nr:
+                continue
+            status = status if status is not None else {}
+            if event.get("versie") == PLANNING_VERSIE and not is_genormaliseerd(status):
+                # Written right after a migration whose snapshot did not make it to disk
+                status = normaliseer(status)
+            status = pas_toe(status, event["wijzigingen"])
+            nr = event["nr"]
+            sinds += 1
+    return _gemigreerd(status, nr, offset, sinds, snapshot_actueel)
+
+def _planning_identiteit():
+    if sqlite_actief():
+        return _identiteit(Path(PLANNING_DOCUMENT))
+    return ("bestand",) + bestand_identiteit(_snapshot_pad(), planning_journaal_pad())
+
+def planning_bron():
+    """(cache key, identity) of the planning status lees_planning_status reads, for values derived from it"""
+    return PLANNING_DOCUMENT, _planning_identiteit()
+
+def lees_planning_status():
+    """The round planning status, rebuilt from the latest snapshot plus the journal tail; None if there is none.
+
+    The rebuilt status is cached in the compact form until the journal or
+    snapshot changes; callers get their own expanded copy to change and pass
+    to schrijf_planning_status.
+    """
+    staat = gecached(PLANNING_DOCUMENT, _planning_identiteit(), _laad_planning)[0]
+    return denormaliseer(staat) if staat is not None else None
+
+def _toewijzingen_bijwerken(conn, oud, nieuw):
+    """Apply only the changed rows of the indexed assignment table"""
+    oude_rijen = Counter(toewijzing_rijen(oud) if oud is not None else [])
+    nieuwe_rijen = Counter(toewijzing_rijen(nieuw))
+    for rij, aantal in (oude_rijen - nieuwe_rijen).items():
+        conn.execute("DELETE FROM toewijzingen WHERE rowid IN (SELECT rowid FROM toewijzingen "
+                     "WHERE ronde = ? AND naam = ? AND training = ? AND soort = ? LIMIT ?)", rij + (aantal,))
+    conn.executemany("INSERT INTO toewijzingen (ronde, naam, training, soort) VALUES (?, ?, ?, ?)",
+                     [rij for rij, aantal in (nieuwe_rijen - oude_rijen).items() for _ in range(aantal)])
+
+def schrijf_planning_status(status, soort, details=None):
+    """Record a change of the round planning status as one journal event.
+
+    soort names the action (e.g. "handmatig_toegewezen") and details what
+    it was about; both end up in the audit trail. Only the difference with
+    the stored status is written, so the cost follows the size of the change.
+    Returns the event number, or None when nothing changed.
+    """
+    event = {"tijd": datetime.now().isoformat(), "soort": soort, "details": details or {}}
+
+    if sqlite_actief():
+        conn = verbinding()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            huidig, nr, _, sinds = gecached(PLANNING_DOCUMENT, _planning_identiteit(), _laad_planning)
+            nieuw = normaliseer(status, vorige=huidig)
+            wijzigingen = verschil(huidig if huidig is not None else {}, nieuw)
+            if not wijzigingen:
+                conn.execute("COMMIT")
+                return None
+            conn.execute("INSERT INTO planning_journaal (nr, tijd, soort, details, wijzigingen) VALUES (?, ?, ?, ?, ?)",
+                         (nr + 1, event["tijd"], soort, json.dumps(event["details"], ensure_ascii=False, default=str),
+                          json.dumps(wijzigingen, ensure_ascii=False)))
+            _toewijzingen_bijwerken(conn, huidig, nieuw)
+            if sinds + 1 >= SNAPSHOT_ELKE:
+                conn.execute("INSERT OR REPLACE INTO documenten (naam, data) VALUES (?, ?)",
+                             (PLANNING_DOCUMENT, json.dumps(dict(nieuw, _journaal={"nr": nr + 1}), ensure_ascii=False)))
+            _verhoog_versie(conn, Path(PLANNING_DOCUMENT))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        zet(PLANNING_DOCUMENT, _planning_identiteit(), (nieuw, nr + 1, 0, 0 if sinds + 1 >= SNAPSHOT_ELKE else sinds + 1))
+        return nr + 1
+
+    pad = planning_journaal_pad()
+    with bestandsslot(pad):
+        huidig, nr, offset, sinds = gecached(PLANNING_DOCUMENT, _planning_identiteit(), _laad_planning)
+        nieuw = normaliseer(status, vorige=huidig)
+        wijzigingen = verschil(huidig if huidig is not None else {}, nieuw)
+        if not wijzigingen:
+            return None
+        regel = json.dumps(dict(event, nr=nr + 1, versie=PLANNING_VERSIE, wijzigingen=wijzigingen), ensure_ascii=False) + "\n"
+        os.makedirs(pad.parent, exist_ok=True)
+        with open(pad, 'a', encoding='utf-8') as f:
+            f.write(regel)
+            f.flush()
+            os.fsync(f.fileno())
+        offset += len(regel.encode('utf-8'))
+        if sinds + 1 >= SNAPSHOT_ELKE:
+            snapshot = dict(nieuw, _journaal={"nr": nr + 1, "offset": offset})
+            schrijf_atomisch(_snapshot_pad(), lambda tijdelijk: tijdelijk.write_text(
+                json.dumps(snapshot, indent=2, ensure_ascii=False), encoding='utf-8'))
+        zet(PLANNING_DOCUMENT, _planning_identiteit(), (nieuw, nr + 1, offset, 0 if sinds + 1 >= SNAPSHOT_ELKE else sinds + 1))
+    return nr + 1
+
+def planning_journaal(aantal=50):
+    """The latest journal events, newest first: {"nr", "tijd", "soort", "details"}"""
+    if sqlite_actief():
+        regels = verbinding().execute(
+            "SELECT nr, tijd, soort, details FROM planning_journaal ORDER BY nr DESC LIMIT ?", (aantal,)).fetchall()
+        return [{"nr": nr, "tijd": tijd, "soort": soort, "details": json.loads(details)} for nr, tijd, soort, details in regels]
+    pad = planning_journaal_pad()
+    if not pad.exists():
+        return []
+    # Only the end of the journal is read, however long it has grown
+    return [{k: event[k] for k in ("nr", "tijd", "soort", "details")} for event in reversed(lees_staart(pad, aantal))]
+
+# --- Periods ---
+
+def registreer_periode(naam, soort, metadata):
+    """Record an archived period in the periods table (SQLite only; the file layout keeps metadata.json)"""
+    if sqlite_actief():
+        verbinding().execute("INSERT OR REPLACE INTO periodes (naam, soort, gearchiveerd, data) VALUES (?, ?, ?, ?)",
+                             (naam, soort, metadata.get("archived_date"), json.dumps(metadata, ensure_ascii=False, default=str)))
+
+# --- Migration ---
+
+def migreer_naar_sqlite(archief_dir=None):
+    """One-shot copy of the CSV/JSON layout into data/tennis.db.
+
+    Pending registration logs are compacted first. The files are left in
+    place, so removing tennis.db switches back to them. Returns a summary of
+    what was copied.
+    """
+    if DB_PATH.exists():
+        raise FileExistsError(f"{DB_PATH} bestaat al")
+    for ronde in RONDES:
+        compacteer(inschrijvingen_pad(ronde))
+
+    tijdelijk = DB_PATH.with_name(DB_PATH.name + ".migratie")
+    if tijdelijk.exists():
+        os.remove(tijdelijk)
+    conn = sqlite3.connect(str(tijdelijk), isolation_level=None)
+    conn.executescript(SCHEMA)
+    samenvatting = {"inschrijvingen": {}, "trainingen": 0, "documenten": [], "periodes": 0}
+
+    conn.execute("BEGIN")
+    for ronde in RONDES:
+        pad = inschrijvingen_pad(ronde)
+        if pad.exists():
+            df = pd.read_csv(pad)
+            _voeg_rijen_toe(conn, ronde, df.to_dict("records"))
+            _sla_samenvatting_op(conn, ronde, bereken(df))
+            samenvatting["inschrijvingen"][ronde] = len(df)
+    if TRAININGEN_PATH.exists():
+        df = pd.read_csv(TRAININGEN_PATH)
+        _voeg_trainingen_toe(conn, df)
+        samenvatting["trainingen"] = len(df)
+    for naam in DOCUMENTEN:
+        pad = DATA_DIR / f"{naam}.json"
+        if naam == PLANNING_DOCUMENT:
+            # The journal comes along as audit trail; the snapshot is the status it leads to
+            data, nr, _, _ = _laad_planning()
+            if data is None:
+                continue
+            if planning_journaal_pad().exists():
+                events, _ = lees_log(planning_journaal_pad())
+                conn.executemany("INSERT OR IGNORE INTO planning_journaal (nr, tijd, soort, details, wijzigingen) VALUES (?, ?, ?, ?, ?)",
+                                 [(e["nr"], e["tijd"], e["soort"], json.dumps(e["details"], ensure_ascii=False),
+                                   json.dumps(e["wijzigingen"], ensure_ascii=False)) for e in events])
+            conn.executemany("INSERT INTO toewijzingen (ronde, naam, training, soort) VALUES (?, ?, ?, ?)",
+                             toewijzing_rijen(data))
+            data = dict(data, _journaal={"nr": nr})
+        elif pad.exists():
+            with open(pad, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            continue
+        conn.execute("INSERT INTO documenten (naam, data) VALUES (?, ?)", (naam, json.dumps(data, ensure_ascii=False)))
+        samenvatting["documenten"].append(naam)
+    if archief_dir and Path(archief_dir).exists():
+        for item in Path(archief_dir).iterdir():
+            metadata_path = item / "metadata.json"
+            if item.is_dir() and metadata_path.exists():
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                conn.execute("INSERT OR REPLACE INTO periodes (naam, soort, gearchiveerd, data) VALUES (?, ?, ?, ?)",
+                             (item.name, "archive", metadata.get("archived_date"), json.dumps(metadata, ensure_ascii=False)))
+                samenvatting["periodes"] += 1
+    conn.execute("COMMIT")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    os.replace(tijdelijk, DB_PATH)
+    return samenvatting
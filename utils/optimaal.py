@@ -0,0 +1,375 @@
+import heapq
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+from utils.logic import (
+    VOORKEUR_KOLOMMEN,
+    naar_niveau,
+    training_labels,
+    vrije_plekken,
+    keuze_matrix,
+    opgaves_tekst,
+    handmatig_reden,
+)
+
+ONEINDIG = float("inf")
+
+def min_kosten_stroom(n, bron, put, kanten):
+    """Min-cost max-flow over n nodes.
+
+    kanten is a list of (van, naar, capaciteit, kosten) with non-negative
+    integer costs. Returns the flow over every edge, in the same order.
+
+    Primal-dual: a Dijkstra pass with potentials finds the current shortest
+    distance, after which a Dinic blocking flow pushes as much as possible
+    over all zero reduced-cost edges at once. Costs in the planning are tiny
+    (preference ranks), so only a handful of phases are needed.
+    """
+    naar, cap, kosten = [], [], []
+    graaf = [[] for _ in range(n)]
+    for u, v, c, k in kanten:
+        graaf[u].append(len(naar))
+        naar.append(v); cap.append(c); kosten.append(k)
+        graaf[v].append(len(naar))
+        naar.append(u); cap.append(0); kosten.append(-k)
+    van = [0] * len(naar)
+    for u in range(n):
+        for e in graaf[u]:
+            van[e] = u
+
+    pot = [0] * n
+    while True:
+        # Shortest reduced distances from the source
+        dist = [ONEINDIG] * n
+        dist[bron] = 0
+        heap = [(0, bron)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u == put:
+                break
+            for e in graaf[u]:
+                if cap[e] > 0:
+                    v = naar[e]
+                    nd = d + kosten[e] + pot[u] - pot[v]
+                    if nd < dist[v]:
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        grens = dist[put]
+        if grens == ONEINDIG:
+            break
+        for v in range(n):
+            pot[v] += min(dist[v], grens)
+
+        # Blocking flows over the admissible (zero reduced cost) subgraph
+        while True:
+            niveau = [-1] * n
+            niveau[bron] = 0
+            wachtrij = deque([bron])
+            while wachtrij:
+                u = wachtrij.popleft()
+                for e in graaf[u]:
+                    v = naar[e]
+                    if cap[e] > 0 and niveau[v] < 0 and kosten[e] + pot[u] - pot[v] == 0:
+                        niveau[v] = niveau[u] + 1
+                        wachtrij.append(v)
+            if niveau[put] < 0:
+                break
+
+            iter_pos = [0] * n
+            pad = []
+            u = bron
+            while True:
+                if u == put:
+                    f = min(cap[e] for e in pad)
+                    for e in pad:
+                        cap[e] -= f
+                        cap[e ^ 1] += f
+                    pad = []
+                    u = bron
+                    continue
+                verder = False
+                while iter_pos[u] < len(graaf[u]):
+                    e = graaf[u][iter_pos[u]]
+                    v = naar[e]
+                    if cap[e] > 0 and niveau[v] == niveau[u] + 1 and kosten[e] + pot[u] - pot[v] == 0:
+                        pad.append(e)
+                        u = v
+                        verder = True
+                        break
+                    iter_pos[u] += 1
+                if verder:
+                    continue
+                if u == bron:
+                    break
+                # Dead end: retreat one edge and skip it from now on
+                niveau[u] = -1
+                e = pad.pop()
+                u = van[e]
+                iter_pos[u] += 1
+
+    return [cap[2 * i + 1] for i in range(len(kanten))]
+
+def _ronde_gegevens(inschrijvingen):
+    """Registrations of one round, sorted by registration date, as plain lists"""
+    inschrijvingen = inschrijvingen.copy()
+    inschrijvingen["Inschrijfdatum"] = pd.to_datetime(inschrijvingen["Inschrijfdatum"], errors='coerce')
+    inschrijvingen = inschrijvingen.sort_values("Inschrijfdatum", kind="stable")
+    n_spelers = len(inschrijvingen)
+    return {
+        "n": n_spelers,
+        "namen": inschrijvingen["Naam"].tolist(),
+        "niveaus": [naar_niveau(nv) for nv in inschrijvingen["Niveau"].tolist()],
+        "kolommen": {
+            col: inschrijvingen[col].tolist() if col in inschrijvingen.columns else [None] * n_spelers
+            for col in VOORKEUR_KOLOMMEN
+        },
+    }
+
+def _optie_sleutels(trainingen):
+    """Return (rijen, sleutel) where sleutel(gegevens, i) describes the options of a player.
+
+    Every distinct preference string and level is resolved once; strings or
+    levels that end up with the same trainings share a row id, so players
+    with the same sleutel are interchangeable. None means: no options at all.
+    """
+    min_niveau = trainingen["MinNiveau"].to_numpy(dtype=float)
+    max_niveau = trainingen["MaxNiveau"].to_numpy(dtype=float)
+    rijen, rij_ids, keuze_rij, niveau_rij = [], {}, {}, {}
+
+    def rij_id(rij):
+        sleutel = rij.tobytes()
+        if sleutel not in rij_ids:
+            rij_ids[sleutel] = len(rijen)
+            rijen.append(rij)
+        return rij_ids[sleutel]
+
+    def sleutel(gegevens, i):
+        nv = gegevens["niveaus"][i]
+        if nv is None or nv != nv:
+            return None
+        if nv not in niveau_rij:
+            niveau_rij[nv] = rij_id((min_niveau <= nv) & (nv <= max_niveau))
+        keuzes = []
+        for col in VOORKEUR_KOLOMMEN:
+            keuze = gegevens["kolommen"][col][i]
+            if not isinstance(keuze, str):
+                keuzes.append(None)
+                continue
+            if keuze not in keuze_rij:
+                keuze_rij[keuze] = rij_id(keuze_matrix([keuze], trainingen)[0])
+            keuzes.append(keuze_rij[keuze])
+        return (niveau_rij[nv],) + tuple(keuzes)
+
+    return rijen, sleutel
+
+def _opties(rijen, sleutel):
+    """(training, rank) pairs for a player sleutel, best rank first, no duplicates"""
+    opties, gezien = [], set()
+    niveau_rij = rijen[sleutel[0]]
+    for rang, keuze in enumerate(sleutel[1:]):
+        if keuze is None:
+            continue
+        for t in np.flatnonzero(rijen[keuze] & niveau_rij):
+            t = int(t)
+            if t not in gezien:
+                gezien.add(t)
+                opties.append((t, rang))
+    return opties
+
+def _uitkomst(gegevens, toewijzing, labels, trainingen):
+    """Turn a per-player training index (-1 = none) into (toegewezen_per_training, handmatig)"""
+    toegewezen_per_training = defaultdict(list)
+    handmatig = []
+    laagste = trainingen["MinNiveau"].min()
+    hoogste = trainingen["MaxNiveau"].max()
+    for i in range(gegevens["n"]):
+        naam, niveau = gegevens["namen"][i], gegevens["niveaus"][i]
+        if toewijzing[i] >= 0:
+            toegewezen_per_training[labels[toewijzing[i]]].append((naam, niveau))
+            continue
+
+        voorkeuren = [gegevens["kolommen"][col][i] for col in VOORKEUR_KOLOMMEN]
+        reden = handmatig_reden(voorkeuren, niveau, laagste, hoogste)
+        handmatig.append((naam, niveau if niveau is not None else "?", opgaves_tekst(voorkeuren), reden))
+    return toegewezen_per_training, handmatig
+
+def plan_spelers_optimaal(inschrijvingen, trainingen):
+    """Globally optimal alternative to plan_spelers with the same return contract.
+
+    Places as many players as possible and, among those solutions, prefers
+    higher-ranked preferences (Voorkeur_1 over Voorkeur_2 over Voorkeur_3).
+    Players with identical options are merged into one flow node, so the
+    network stays small even for thousands of registrations. Within such a
+    group the earliest registrations get the best-ranked spots.
+    """
+    gegevens = _ronde_gegevens(inschrijvingen)
+    if gegevens["n"] == 0:
+        return defaultdict(list), []
+
+    labels = training_labels(trainingen)
+    vrij = vrije_plekken(trainingen)
+    rijen, sleutel_van = _optie_sleutels(trainingen)
+
+    # Group players with exactly the same options into one class
+    klassen = {}
+    klasse_spelers = []
+    for i in range(gegevens["n"]):
+        sleutel = sleutel_van(gegevens, i)
+        if sleutel is None:
+            continue
+        if sleutel not in klassen:
+            klassen[sleutel] = len(klassen)
+            klasse_spelers.append([])
+        klasse_spelers[klassen[sleutel]].append(i)
+
+    bron, put = 0, 1
+    eerste_klasse = 2
+    eerste_training = eerste_klasse + len(klassen)
+    kanten = []
+    klasse_kanten = []  # (kant index, training, rang) per class
+    for sleutel, k in klassen.items():
+        aantal = len(klasse_spelers[k])
+        kanten.append((bron, eerste_klasse + k, aantal, 0))
+        opties = []
+        for t, rang in _opties(rijen, sleutel):
+            opties.append((len(kanten), t, rang))
+            kanten.append((eerste_klasse + k, eerste_training + t, aantal, rang))
+        klasse_kanten.append(opties)
+    for t in range(len(labels)):
+        if vrij[t] > 0:
+            kanten.append((eerste_training + t, put, int(vrij[t]), 0))
+
+    stroom = min_kosten_stroom(eerste_training + len(labels), bron, put, kanten)
+
+    # Hand out each class' spots: earliest registrations get the best ranks
+    toewijzing = [-1] * gegevens["n"]
+    for k, opties in enumerate(klasse_kanten):
+        spelers = iter(klasse_spelers[k])
+        for kant, t, rang in opties:
+            for _ in range(stroom[kant]):
+                toewijzing[next(spelers)] = t
+
+    return _uitkomst(gegevens, toewijzing, labels, trainingen)
+
+def kleur_bipartiet(kanten):
+    """Proper edge colouring of a bipartite multigraph with max-degree colours.
+
+    kanten is a list of (links, rechts) pairs; returns a colour per edge.
+    Classic alternating-path recolouring, which by König's theorem never
+    needs more colours than the highest vertex degree.
+    """
+    bij = defaultdict(dict)  # vertex -> colour -> (edge index, other vertex)
+    kleuren = [None] * len(kanten)
+
+    def vrije_kleur(x):
+        c = 0
+        while c in bij[x]:
+            c += 1
+        return c
+
+    for idx, (links, rechts) in enumerate(kanten):
+        u, v = ("L", links), ("R", rechts)
+        a, b = vrije_kleur(u), vrije_kleur(v)
+        if a in bij[v]:
+            # Swap colours a and b along the alternating path that starts at v
+            pad, x, c = [], v, a
+            while c in bij[x]:
+                e, y = bij[x][c]
+                pad.append(e)
+                x, c = y, (b if c == a else a)
+            for e in pad:
+                l, r = ("L", kanten[e][0]), ("R", kanten[e][1])
+                del bij[l][kleuren[e]]
+                del bij[r][kleuren[e]]
+            for e in pad:
+                kleuren[e] = b if kleuren[e] == a else a
+                l, r = ("L", kanten[e][0]), ("R", kanten[e][1])
+                bij[l][kleuren[e]] = (e, r)
+                bij[r][kleuren[e]] = (e, l)
+        kleuren[idx] = a
+        bij[u][a] = (idx, v)
+        bij[v][a] = (idx, u)
+    return kleuren
+
+def plan_rondes_optimaal(rondes, trainingen):
+    """Plan all rounds together in one min-cost-flow solve.
+
+    rondes maps round number -> registrations DataFrame of that round. All
+    rounds share the training capacities and a person (matched on Naam, as
+    in the rest of the planning) is never placed twice in the same training.
+    Returns round number -> (toegewezen_per_training, handmatig).
+    """
+    labels = training_labels(trainingen)
+    vrij = vrije_plekken(trainingen)
+    rijen, sleutel_van = _optie_sleutels(trainingen)
+    ronde_nummers = sorted(rondes)
+    gegevens = {r: _ronde_gegevens(rondes[r]) for r in ronde_nummers}
+
+    # Collect persons and what they can do in every round
+    personen = {}  # person id -> {round: player index}
+    for r in ronde_nummers:
+        for i, naam in enumerate(gegevens[r]["namen"]):
+            pid, n = naam, 1
+            while pid in personen and r in personen[pid]:
+                n += 1
+                pid = (naam, n)
+            personen.setdefault(pid, {})[r] = i
+
+    klassen = {}
+    klasse_personen = []
+    for pid, per_ronde in personen.items():
+        sleutel = tuple(
+            sleutel_van(gegevens[r], per_ronde[r]) if r in per_ronde else None for r in ronde_nummers
+        )
+        if all(s is None for s in sleutel):
+            continue
+        if sleutel not in klassen:
+            klassen[sleutel] = len(klassen)
+            klasse_personen.append([])
+        klasse_personen[klassen[sleutel]].append(pid)
+
+    # Source -> (class, round) -> (class, training) -> training -> sink
+    bron, put = 0, 1
+    n_knopen = 2 + len(labels)
+    kanten = []
+    klasse_kanten = []  # (kant index, round, training) per class
+    for sleutel, k in klassen.items():
+        aantal = len(klasse_personen[k])
+        klasse_training = {}
+        opties = []
+        for r, ronde_sleutel in zip(ronde_nummers, sleutel):
+            if ronde_sleutel is None:
+                continue
+            ronde_knoop = n_knopen
+            n_knopen += 1
+            kanten.append((bron, ronde_knoop, aantal, 0))
+            for t, rang in _opties(rijen, ronde_sleutel):
+                if t not in klasse_training:
+                    klasse_training[t] = n_knopen
+                    n_knopen += 1
+                    kanten.append((klasse_training[t], 2 + t, aantal, 0))
+                opties.append((len(kanten), r, t))
+                kanten.append((ronde_knoop, klasse_training[t], aantal, rang))
+        klasse_kanten.append(opties)
+    for t in range(len(labels)):
+        if vrij[t] > 0:
+            kanten.append((2 + t, put, int(vrij[t]), 0))
+
+    stroom = min_kosten_stroom(n_knopen, bron, put, kanten)
+
+    # Split each class' flow over its persons: one training per round and
+    # never the same training twice per person
+    toewijzing = {r: [-1] * gegevens[r]["n"] for r in ronde_nummers}
+    for k, opties in enumerate(klasse_kanten):
+        paren = []
+        for kant, r, t in opties:
+            paren.extend([(r, t)] * stroom[kant])
+        for (r, t), kleur in zip(paren, kleur_bipartiet(paren)):
+            pid = klasse_personen[k][kleur]
+            toewijzing[r][personen[pid][r]] = t
+
+    return {r: _uitkomst(gegevens[r], toewijzing[r], labels, trainingen) for r in ronde_nummers}
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from utils.leescache import gecached
+from utils.logic import VOORKEUR_KOLOMMEN
+from utils.opslag import RONDES, inschrijvingen_bron, lees_inschrijvingen
+from utils.resolver import is_geen_keuze
+
+# Registrations prepared for the overview pages: dates parsed, levels
+# numeric and a rank per sort order, computed once per change of the
+# registrations. Filtering and paging then only work on these columns, and
+# only the visible page goes to the browser. Filter options and totals are
+# kept in DataFrame.attrs, so a rerun doesn't scan the rows for them.
+PRIORITEITEN = {1: "Eerste keuze", 2: "Tweede keuze", 3: "Derde keuze"}
+PRIORITEIT_ICONEN = {1: "🥇", 2: "🥈", 3: "🥉"}
+ONBEKEND = "Onbekend"
+# label -> (rank column, ascending)
+SORTERINGEN = {
+    "Nieuwste eerst": ("_rang_datum", False),
+    "Oudste eerst": ("_rang_datum", True),
+    "Naam (A-Z)": ("_rang_naam", True),
+    "Niveau (hoog-laag)": ("_rang_niveau", False),
+    "Niveau (laag-hoog)": ("_rang_niveau", True),
+}
+
+def _niveau_label(niveau):
+    # Same labels as the registration summaries: whole levels without the .0
+    label = niveau.map(lambda n: str(int(n)) if n == int(n) else str(n), na_action="ignore")
+    return label.fillna(ONBEKEND)
+
+def _rang(waarden):
+    """Position of every row in the order of waarden, ties in row order"""
+    volgorde = np.argsort(waarden.to_numpy(dtype=object if waarden.dtype == "string" else None), kind="stable")
+    rang = np.empty(len(volgorde), dtype=np.int64)
+    rang[volgorde] = np.arange(len(volgorde))
+    return rang
+
+def _rangen(df):
+    # Unknown dates and levels count as the lowest, so they end up last when sorting newest or highest first
+    df["_rang_datum"] = _rang(df["_datum"].fillna(pd.Timestamp.min))
+    df["_rang_naam"] = _rang(df["_naam"])
+    df["_rang_niveau"] = _rang(df["_niveau"].fillna(-np.inf))
+    return df
+
+def _opties(reeks):
+    return sorted({w for w in reeks.dropna().unique()}, key=str)
+
+def _zet_attrs(df):
+    voorkeuren = set()
+    for col in VOORKEUR_KOLOMMEN:
+        if col in df.columns:
+            voorkeuren.update(k for k in df[col].dropna().unique() if not is_geen_keuze(k))
+    niveaus = df.drop_duplicates("_niveau_label").sort_values("_niveau", na_position="last")["_niveau_label"]
+    df.attrs = {
+        "niveaus": list(niveaus),
+        "voorkeuren": sorted(voorkeuren),
+        "frequenties": _opties(df["_frequentie"]),
+        "eerste_datum": df["_datum"].min(),
+        "laatste_datum": df["_datum"].max(),
+        "gemiddeld_niveau": float(df["_niveau"].mean()) if df["_niveau"].notna().any() else 0.0,
+        "unieke_namen": int(df["Naam"].nunique()) if "Naam" in df.columns else 0,
+        "met_toestemming": int((df["Toestemming_hoger_niveau"] == "Ja").sum()) if "Toestemming_hoger_niveau" in df.columns else 0,
+    }
+    return df
+
+def bereid_voor(df):
+    """A registration DataFrame with the precomputed overview columns (all prefixed with _)"""
+    df = df.copy()
+    leeg = pd.Series(np.nan, index=df.index, dtype=object)
+    df["_datum"] = pd.to_datetime(df.get("Inschrijfdatum", leeg), format="ISO8601", errors="coerce")
+    niveau = df.get("Niveau", leeg).astype("string").str.replace(",", ".", regex=False)
+    df["_niveau"] = pd.to_numeric(niveau, errors="coerce").astype(float)
+    df["_niveau_label"] = _niveau_label(df["_niveau"])
+    df["_frequentie"] = df.get("Trainingen_per_week", leeg).fillna(ONBEKEND).astype(str)
+    df["_naam"] = df.get("Naam", leeg).fillna("").astype(str).str.lower()
+    return _zet_attrs(_rangen(df))
+
+def voorbereid(ronde, live=False):
+    """The prepared registrations of a round, cached until they change"""
+    sleutel, identiteit = inschrijvingen_bron(ronde, live)
+    return gecached(f"{sleutel} (overzicht)", identiteit, lambda: bereid_voor(lees_inschrijvingen(ronde, live)))
+
+def gecombineerd(live=False):
+    """The prepared registrations of all rounds, with Prioriteit (1-3) per row"""
+    bronnen = [inschrijvingen_bron(ronde, live) for ronde in RONDES]
+
+    def laad():
+        delen = [lees_inschrijvingen(ronde, live).assign(Prioriteit=ronde) for ronde in RONDES]
+        return bereid_voor(pd.concat([d for d in delen if len(d)] or [pd.DataFrame()], ignore_index=True))
+
+    return gecached("/".join(b[0] for b in bronnen) + " (overzicht)", tuple(b[1] for b in bronnen), laad)
+
+def filter_rijen(df, niveaus=None, voorkeuren=None, frequenties=None, vanaf=None, tot=None, prioriteiten=None):
+    """Rows matching every given filter; a preference matches any of the three choices, tot is inclusive"""
+    masker = np.ones(len(df), dtype=bool)
+    if niveaus:
+        masker &= df["_niveau_label"].isin(niveaus).to_numpy()
+    if voorkeuren:
+        kolommen = [col for col in VOORKEUR_KOLOMMEN if col in df.columns]
+        masker &= df[kolommen].isin(voorkeuren).any(axis=1).to_numpy()
+    if frequenties:
+        masker &= df["_frequentie"].isin(frequenties).to_numpy()
+    if vanaf is not None:
+        masker &= (df["_datum"] >= pd.Timestamp(vanaf)).to_numpy()
+    if tot is not None:
+        masker &= (df["_datum"] < pd.Timestamp(tot) + pd.Timedelta(days=1)).to_numpy()
+    if prioriteiten and "Prioriteit" in df.columns:
+        masker &= df["Prioriteit"].isin(prioriteiten).to_numpy()
+    return df[masker]
+
+def pagina(df, sortering, nummer, per_pagina):
+    """Rows of page nummer (from 1) in one of SORTERINGEN"""
+    kolom, oplopend = SORTERINGEN[sortering]
+    rangen = df[kolom].to_numpy()
+    volgorde = np.argsort(rangen if oplopend else -rangen, kind="stable")
+    begin = (nummer - 1) * per_pagina
+    rijen = df.iloc[volgorde[begin:begin + per_pagina]]
+    # Streamlit would send the attrs along with the page
+    rijen.attrs = {}
+    return rijen
+
+def aantal_paginas(aantal, per_pagina):
+    return max(1, -(-aantal // per_pagina))
+
+def vandaag(df):
+    """Registrations of today"""
+    return int((df["_datum"] >= pd.Timestamp.today().normalize()).sum())
+
+def zonder_hulpkolommen(df):
+    return df[[k for k in df.columns if not str(k).startswith("_")]]
@@ -0,0 +1,153 @@
+import json
+
+# Stored form of the round planning status. The status the pages work with
+# keeps every assignment twice (assigned_by_training and assigned) and names
+# players and trainings by their full text in every place they occur. The
+# stored form keeps each assignment once and refers to players and
+# trainings by their index in a table:
+#   {"versie": 2,
+#    "spelers": [naam, ...], "trainingen": [label, ...],
+#    "current_round": 1, "rounds_completed": [...], "uitgesloten": [speler, ...],
+#    "rondes": {"1": {"toewijzingen": [[speler, training, niveau], ...],
+#                     "volgorde": [i, ...],
+#                     "handmatig_nodig": [[speler, niveau, opgaves, reden], ...],
+#                     "timestamp": ..., "methode": ..., ...}},
+#    "handmatig": {"1": [[speler, training, timestamp(, extra)], ...]}}
+# toewijzingen are in the order of assigned_by_training; volgorde gives the
+# order of assigned as indexes into them and is left out when it is the same.
+# extra holds the other fields of a manual assignment (e.g. its level) and
+# is left out when there are none. Other keys of a round or of the status
+# are kept as they are.
+VERSIE = 2
+
+_BEKENDE_SLEUTELS = {"current_round", "rounds_completed", "manual_assignments", "excluded_people", "planning_history"}
+_RONDE_SLEUTELS = {"round", "assigned_by_training", "assigned", "manual_needed"}
+_HANDMATIG_SLEUTELS = {"name", "training", "timestamp"}
+
+def is_genormaliseerd(staat):
+    return isinstance(staat, dict) and staat.get("versie") == VERSIE
+
+class _Tabel:
+    """Index of names, reusing the indexes of an earlier table so unchanged entries keep their number"""
+
+    def __init__(self, namen=()):
+        self.namen = list(namen)
+        self.index = {naam: i for i, naam in enumerate(self.namen)}
+        self.gebruikt = set()
+
+    def id(self, naam):
+        i = self.index.get(naam)
+        if i is None:
+            i = self.index[naam] = len(self.namen)
+            self.namen.append(naam)
+        self.gebruikt.add(i)
+        return i
+
+def _handmatig(assignment, spelers, trainingen):
+    entry = [spelers.id(assignment["name"]), trainingen.id(assignment["training"]), assignment.get("timestamp")]
+    extra = {k: v for k, v in assignment.items()
+             if k not in _HANDMATIG_SLEUTELS and not (k == "assigned_by" and v == "manual")}
+    return entry + [extra] if extra else entry
+
+def _volgorde(round_data, toewijzingen, spelers, trainingen):
+    """Indexes into toewijzingen in the order of assigned, or None when that order is the same or assigned doesn't match"""
+    posities = {}
+    for i, (speler, training, _) in enumerate(toewijzingen):
+        posities.setdefault((speler, training), []).append(i)
+    volgorde = []
+    for a in round_data.get("assigned", []):
+        sleutel = (spelers.index.get(a.get("name")), trainingen.index.get(a.get("training")))
+        if not posities.get(sleutel):
+            return None
+        volgorde.append(posities[sleutel].pop(0))
+    if len(volgorde) != len(toewijzingen) or volgorde == list(range(len(volgorde))):
+        return None
+    return volgorde
+
+def _normaliseer(status, spelers, trainingen):
+    rondes = {}
+    for round_data in status.get("planning_history", []):
+        sleutel = str(round_data.get("round"))
+        eerder = rondes.get(sleutel)
+        # A round is in the history once; of duplicates from older files the latest one counts
+        if eerder is not None and round_data.get("timestamp", "") <= eerder.get("timestamp", ""):
+            continue
+        ronde = {k: v for k, v in round_data.items() if k not in _RONDE_SLEUTELS}
+        ronde["toewijzingen"] = [[spelers.id(persoon[0]), trainingen.id(training), persoon[1]]
+                                 for training, people in round_data.get("assigned_by_training", {}).items()
+                                 for persoon in people]
+        volgorde = _volgorde(round_data, ronde["toewijzingen"], spelers, trainingen)
+        if volgorde is not None:
+            ronde["volgorde"] = volgorde
+        ronde["handmatig_nodig"] = [[spelers.id(entry[0])] + list(entry[1:]) for entry in round_data.get("manual_needed", [])]
+        rondes[sleutel] = ronde
+    staat = {k: v for k, v in status.items() if k not in _BEKENDE_SLEUTELS}
+    staat.update({
+        "versie": VERSIE,
+        "current_round": status.get("current_round", 1),
+        "rounds_completed": list(status.get("rounds_completed", [])),
+        "uitgesloten": [spelers.id(naam) for naam in status.get("excluded_people", [])],
+        "rondes": rondes,
+        "handmatig": {ronde: [_handmatig(a, spelers, trainingen) for a in assignments]
+                      for ronde, assignments in status.get("manual_assignments", {}).items()},
+    })
+    return staat
+
+def normaliseer(status, vorige=None):
+    """The stored form of a planning status, also the migrator for statuses in the old format.
+
+    With vorige (the stored form it replaces) players and trainings keep
+    their numbers, so a change only touches the entries that changed. The
+    tables start over once less than half of their entries is still used.
+    """
+    status = json.loads(json.dumps(status, ensure_ascii=False, default=str))  # tuples from the planners become lists
+    if is_genormaliseerd(vorige):
+        spelers, trainingen = _Tabel(vorige["spelers"]), _Tabel(vorige["trainingen"])
+        staat = _normaliseer(status, spelers, trainingen)
+        if 2 * len(spelers.gebruikt) >= len(spelers.namen) and 2 * len(trainingen.gebruikt) >= len(trainingen.namen):
+            staat["spelers"], staat["trainingen"] = spelers.namen, trainingen.namen
+            return staat
+    spelers, trainingen = _Tabel(), _Tabel()
+    staat = _normaliseer(status, spelers, trainingen)
+    staat["spelers"], staat["trainingen"] = spelers.namen, trainingen.namen
+    return staat
+
+def denormaliseer(staat):
+    """The planning status as the pages use it, built in one pass over the stored form"""
+    spelers, trainingen = staat["spelers"], staat["trainingen"]
+    history = []
+    for sleutel, ronde in staat["rondes"].items():
+        round_data = {"round": int(sleutel)}
+        round_data.update((k, v) for k, v in ronde.items() if k not in ("toewijzingen", "volgorde", "handmatig_nodig"))
+        by_training = {}
+        for speler, training, niveau in ronde["toewijzingen"]:
+            by_training.setdefault(trainingen[training], []).append([spelers[speler], niveau])
+        toewijzingen = ronde["toewijzingen"]
+        if "volgorde" in ronde:
+            toewijzingen = [toewijzingen[i] for i in ronde["volgorde"]]
+        round_data["assigned_by_training"] = by_training
+        round_data["assigned"] = [{"name": spelers[speler], "level": niveau, "training": trainingen[training]}
+                                  for speler, training, niveau in toewijzingen]
+        round_data["manual_needed"] = [[spelers[entry[0]]] + entry[1:] for entry in ronde["handmatig_nodig"]]
+        history.append(round_data)
+    status = {k: v for k, v in staat.items() if k not in ("versie", "spelers", "trainingen", "uitgesloten", "rondes", "handmatig")}
+    status.update({
+        "rounds_completed": list(staat["rounds_completed"]),
+        "manual_assignments": {ronde: [dict({"name": spelers[s], "training": trainingen[t], "assigned_by": "manual", "timestamp": tijd},
+                                            **(extra[0] if extra else {}))
+                                       for s, t, tijd, *extra in assignments]
+                               for ronde, assignments in staat["handmatig"].items()},
+        "excluded_people": [spelers[s] for s in staat["uitgesloten"]],
+        "planning_history": history,
+    })
+    return status
+
+def toewijzing_rijen(staat):
+    """(round, name, training, kind) for every automatic and manual assignment in the stored form"""
+    spelers, trainingen = staat["spelers"], staat["trainingen"]
+    rijen = []
+    for sleutel, ronde in staat["rondes"].items():
+        rijen.extend((int(sleutel), spelers[s], trainingen[t], "automatisch") for s, t, _ in ronde["toewijzingen"])
+    for sleutel, assignments in staat["handmatig"].items():
+        rijen.extend((int(sleutel), spelers[s], trainingen[t], "handmatig") for s, t, *_ in assignments)
+    return rijen
@@ -0,0 +1,91 @@
+import pandas as pd
+
+from utils.export import KOLOMMEN, per_training as export_per_training
+from utils.leescache import gecached
+from utils.opslag import planning_bron, lees_planning_status
+
+# What the planning page and the Complete Planning page show of the round
+# planning: the roster of every training, counts per training and per round,
+# and the people still waiting for a manual assignment. Computed in one pass
+# over the planning once per journal event and shared by both pages, so a
+# rerun or opening the overview is a cache hit. The views are shared: copy a
+# roster before changing it.
+#   {"rondes": [round, ...],
+#    "trainingen": [training, ...],                      (sorted, as in the export)
+#    "roosters": {training: DataFrame[KOLOMMEN]},        (sorted by name)
+#    "per_training": {training: {"totaal", "automatisch", "handmatig"}},
+#    "per_ronde": {round: {"automatisch", "handmatig", "open"}},
+#    "open": {round: [manual_needed entry, ...]},       (not manually assigned yet)
+#    "bezetting": {training: automatic placements over all rounds},
+#    "per_speler": {name: [(round, training), ...]},     (automatic and manual)
+#    "tellingen": {"totaal", "automatisch", "handmatig", "deelnemers", "trainingen", "open"}}
+
+def openstaand(status, round_data):
+    """Entries of a round's manual_needed whose person has no manual assignment yet"""
+    toegewezen = {a["name"] for a in status.get("manual_assignments", {}).get(str(round_data["round"]), [])}
+    return [entry for entry in round_data.get("manual_needed", []) if entry and entry[0] not in toegewezen]
+
+def bereken(status):
+    """All views of a planning status (None for no planning)"""
+    status = status or {}
+    history = status.get("planning_history", [])
+    per_ronde = {rd["round"]: {"automatisch": 0, "handmatig": 0, "open": 0} for rd in history}
+    roosters = export_per_training(status)
+    per_training = {}
+    namen = set()
+    for training, rijen in roosters.items():
+        telling = per_training[training] = {"totaal": len(rijen), "automatisch": 0, "handmatig": 0}
+        for rij in rijen:
+            soort = "automatisch" if rij["Type"] == "Automatisch" else "handmatig"
+            telling[soort] += 1
+            per_ronde[int(rij["Ronde"])][soort] += 1
+            namen.add(rij["Naam"])
+
+    per_speler = {}
+    for rijen in roosters.values():
+        for rij in rijen:
+            per_speler.setdefault(rij["Naam"], []).append((int(rij["Ronde"]), rij["Training"]))
+    # Manual placements are in assigned_by_training too, so they take a spot like the automatic ones
+    bezetting = {}
+    for round_data in history:
+        for training, people in round_data.get("assigned_by_training", {}).items():
+            bezetting[training] = bezetting.get(training, 0) + len(people)
+
+    openstaande = {rd["round"]: openstaand(status, rd) for rd in history}
+    for ronde, entries in openstaande.items():
+        per_ronde[ronde]["open"] = len(entries)
+
+    trainingen = list(roosters)
+    return {
+        "rondes": [rd["round"] for rd in history],
+        "trainingen": trainingen,
+        "roosters": {t: pd.DataFrame(rijen, columns=KOLOMMEN) for t, rijen in roosters.items()},
+        "per_training": per_training,
+        "per_ronde": per_ronde,
+        "open": openstaande,
+        "bezetting": bezetting,
+        "per_speler": per_speler,
+        "tellingen": {
+            "totaal": sum(t["totaal"] for t in per_training.values()),
+            "automatisch": sum(t["automatisch"] for t in per_training.values()),
+            "handmatig": sum(t["handmatig"] for t in per_training.values()),
+            "deelnemers": len(namen),
+            "trainingen": len(trainingen),
+            "open": sum(len(entries) for entries in openstaande.values()),
+        },
+    }
+
+def weergave():
+    """The views of the stored planning status, computed once per change"""
+    sleutel, identiteit = planning_bron()
+    return gecached(f"{sleutel} (weergave)", identiteit, lambda: bereken(lees_planning_status()))
+
+def voorbeeld(weergave, aantal):
+    """The first export rows, in export order"""
+    delen = []
+    for training in weergave["trainingen"]:
+        if aantal <= 0:
+            break
+        delen.append(weergave["roosters"][training].head(aantal))
+        aantal -= len(delen[-1])
+    return pd.concat(delen, ignore_index=True) if delen else pd.DataFrame(columns=KOLOMMEN)
@@ -0,0 +1,139 @@
+import re
+import pandas as pd
+
+from utils.logic import training_label
+
+# Placeholder answers of the registration form that mean "no training"
+GEEN_KEUZE = {"", "-", "geen derde keuze", "no third choice", "selecteer een training...", "select a training..."}
+
+_DASHES = re.compile(r"\s*[–—�−-]\s*")
+_SPACES = re.compile(r"\s+")
+_LEGACY = re.compile(r"^(?P<dag>[a-z]+)\s+(?P<start>\d{1,2}[:.]\d{2})(?:\s*-\s*\d{1,2}[:.]\d{2})?(?P<rest>.*)$")
+_NIVEAU = re.compile(r"niveau\s+(\d+)(?:\s*[-/]\s*(\d+))?")
+
+_resolver_cache = {}
+
+def normaliseer(tekst):
+    """Lowercase, unify dashes (including mangled en-dashes) and collapse whitespace"""
+    tekst = _DASHES.sub(" - ", str(tekst).strip().lower())
+    return _SPACES.sub(" ", tekst).strip()
+
+def optie_tekst(rij):
+    """The option string load_available_trainings shows for a training row"""
+    if rij['MinNiveau'] == rij['MaxNiveau']:
+        level_text = f"Niveau {rij['MinNiveau']}"
+    else:
+        level_text = f"Niveau {rij['MinNiveau']}-{rij['MaxNiveau']}"
+    trainer_text = f" - {rij['Trainer']}" if pd.notna(rij['Trainer']) and str(rij['Trainer']).strip() else ""
+    return f"{rij['Dag']} {rij['Tijd']}{trainer_text} ({level_text})"
+
+def _starttijd(tijd):
+    match = re.match(r"\s*(\d{1,2})[:.](\d{2})", str(tijd))
+    return f"{int(match.group(1))}:{match.group(2)}" if match else None
+
+def bouw_resolver(trainingen):
+    """Build the lookup tables that map preference strings to training rows.
+
+    Every option string produced by load_available_trainings and every
+    planning label is indexed exactly (after normalisation). Other strings,
+    such as legacy exports ("Dinsdag 14:00 – 15:15 Niveau 8 Robin Baan 1-4"),
+    are parsed once on first lookup and matched on day and start time, using
+    level and trainer to break ties. Results are memoised, so every distinct
+    string costs one dict lookup after the first time.
+    """
+    labels = []
+    exact = {}
+    per_dag_tijd = {}
+    niveaus = []
+    trainers = []
+    for positie, (_, rij) in enumerate(trainingen.iterrows()):
+        label = training_label(rij)
+        labels.append(label)
+        for tekst in (optie_tekst(rij), label):
+            # Two identical trainings can't be told apart: leave them to the fallback
+            sleutel = normaliseer(tekst)
+            exact[sleutel] = positie if sleutel not in exact or exact[sleutel] == positie else None
+        dag_tijd = (normaliseer(rij['Dag']), _starttijd(rij['Tijd']))
+        per_dag_tijd.setdefault(dag_tijd, []).append(positie)
+        niveaus.append((rij['MinNiveau'], rij['MaxNiveau']))
+        trainers.append(normaliseer(rij['Trainer']) if pd.notna(rij['Trainer']) else "")
+
+    return {
+        "labels": labels,
+        "exact": {k: v for k, v in exact.items() if v is not None},
+        "per_dag_tijd": per_dag_tijd,
+        "niveaus": niveaus,
+        "trainers": trainers,
+        "cache": {},
+        "onopgelost": {},
+    }
+
+def get_resolver(trainingen):
+    """Resolver for this trainings table, built once per distinct table content"""
+    versie = int(pd.util.hash_pandas_object(trainingen.astype(str), index=False).sum())
+    if versie not in _resolver_cache:
+        _resolver_cache.clear()
+        _resolver_cache[versie] = bouw_resolver(trainingen)
+    return _resolver_cache[versie]
+
+def _parse_legacy(resolver, sleutel):
+    match = _LEGACY.match(sleutel)
+    if not match:
+        return None, "Onbekend formaat"
+    kandidaten = resolver["per_dag_tijd"].get((match.group("dag"), _starttijd(match.group("start"))), [])
+    if not kandidaten:
+        return None, "Geen training op deze dag en tijd"
+
+    rest = match.group("rest")
+    niveau = _NIVEAU.search(rest)
+    if len(kandidaten) > 1 and niveau:
+        laag = int(niveau.group(1))
+        hoog = int(niveau.group(2)) if niveau.group(2) else laag
+        passend = [t for t in kandidaten if resolver["niveaus"][t][0] <= laag and hoog <= resolver["niveaus"][t][1]]
+        kandidaten = passend or kandidaten
+    if len(kandidaten) > 1:
+        passend = [t for t in kandidaten if resolver["trainers"][t] and resolver["trainers"][t] in rest]
+        kandidaten = passend or kandidaten
+    if len(kandidaten) > 1:
+        return None, "Meerdere trainingen op deze dag en tijd"
+    return kandidaten[0], None
+
+def resolve_keuze(resolver, keuze):
+    """Training row position for a preference string, or None.
+
+    Placeholders such as "Geen derde keuze" resolve to None silently; other
+    strings that can't be matched are recorded in resolver["onopgelost"].
+    """
+    if not isinstance(keuze, str):
+        return None
+    cache = resolver["cache"]
+    if keuze in cache:
+        return cache[keuze]
+
+    sleutel = normaliseer(keuze)
+    if sleutel in GEEN_KEUZE:
+        positie = None
+    elif sleutel in resolver["exact"]:
+        positie = resolver["exact"][sleutel]
+    else:
+        positie, reden = _parse_legacy(resolver, sleutel)
+        if positie is None:
+            resolver["onopgelost"][keuze] = reden
+    cache[keuze] = positie
+    return positie
+
+def is_geen_keuze(keuze):
+    return not isinstance(keuze, str) or normaliseer(keuze) in GEEN_KEUZE
+
+def onopgeloste_voorkeuren(inschrijvingen, trainingen, kolommen=("Voorkeur_1", "Voorkeur_2", "Voorkeur_3")):
+    """Report of preference strings in these registrations that match no training: {tekst: (reden, aantal)}"""
+    resolver = get_resolver(trainingen)
+    rapport = {}
+    for col in kolommen:
+        if col not in inschrijvingen.columns:
+            continue
+        for keuze, aantal in inschrijvingen[col].value_counts().items():
+            if resolve_keuze(resolver, keuze) is None and not is_geen_keuze(keuze):
+                _, eerder = rapport.get(keuze, (None, 0))
+                rapport[keuze] = (resolver["onopgelost"].get(keuze, "Onbekend"), eerder + aantal)
+    return rapport
@@ -0,0 +1,95 @@
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.bestanden import schrijf_atomisch
+from utils.leescache import bestand_identiteit
+from utils.logic import VOORKEUR_KOLOMMEN, naar_niveau
+
+# Constant-size summary of one registration file, kept up to date on every write:
+# {"aantal": rows, "telefoons": unique phones, "niveaus": {niveau: rows},
+#  "voorkeuren": {Voorkeur_n: {training: rows}}, "gewijzigd": iso time}
+
+def _niveau_sleutel(waarde):
+    niveau = naar_niveau(waarde)
+    if niveau is None or pd.isna(niveau):
+        return "onbekend"
+    return str(int(niveau)) if niveau == int(niveau) else str(niveau)
+
+def _telefoon(rij):
+    telefoon = rij.get("Telefoon")
+    if telefoon is None or (isinstance(telefoon, float) and pd.isna(telefoon)) or str(telefoon) == "":
+        return None
+    return str(telefoon)
+
+def _tel(rijen):
+    niveaus = Counter(_niveau_sleutel(rij.get("Niveau")) for rij in rijen)
+    voorkeuren = {col: Counter(rij.get(col) for rij in rijen if isinstance(rij.get(col), str)) for col in VOORKEUR_KOLOMMEN}
+    return niveaus, voorkeuren
+
+def bereken(df):
+    """Summary of a whole registration DataFrame"""
+    rijen = df.to_dict("records")
+    niveaus, voorkeuren = _tel(rijen)
+    return {
+        "aantal": len(rijen),
+        "telefoons": len({t for t in map(_telefoon, rijen) if t is not None}),
+        "niveaus": dict(niveaus),
+        "voorkeuren": {col: dict(telling) for col, telling in voorkeuren.items()},
+        "gewijzigd": datetime.now().isoformat(),
+    }
+
+def werk_bij(samenvatting, toegevoegd, verwijderd, telefoons_erbij):
+    """Summary after adding and removing some rows, without looking at the others.
+
+    telefoons_erbij is the change in unique phones, which only the caller can know.
+    """
+    nieuw_niveaus, nieuw_voorkeuren = _tel(toegevoegd)
+    oud_niveaus, oud_voorkeuren = _tel(verwijderd)
+    niveaus = Counter(samenvatting["niveaus"])
+    niveaus.update(nieuw_niveaus)
+    niveaus.subtract(oud_niveaus)
+    voorkeuren = {}
+    for col in VOORKEUR_KOLOMMEN:
+        telling = Counter(samenvatting["voorkeuren"].get(col, {}))
+        telling.update(nieuw_voorkeuren[col])
+        telling.subtract(oud_voorkeuren[col])
+        voorkeuren[col] = {k: v for k, v in telling.items() if v > 0}
+    return {
+        "aantal": samenvatting["aantal"] + len(toegevoegd) - len(verwijderd),
+        "telefoons": samenvatting["telefoons"] + telefoons_erbij,
+        "niveaus": {k: v for k, v in niveaus.items() if v > 0},
+        "voorkeuren": voorkeuren,
+        "gewijzigd": datetime.now().isoformat(),
+    }
+
+# --- Sidecar next to a registration CSV ---
+
+def sidecar_pad(csv_pad):
+    csv_pad = Path(csv_pad)
+    return csv_pad.with_name(f"{csv_pad.stem}.summary.json")
+
+def schrijf_sidecar(csv_pad, samenvatting):
+    """Store the summary of a CSV that was just written, tied to that version of the file"""
+    data = dict(samenvatting, bron=str(bestand_identiteit(csv_pad)))
+    schrijf_atomisch(sidecar_pad(csv_pad),
+                     lambda pad: pad.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8'))
+
+def lees_sidecar(csv_pad):
+    """The summary of a CSV, or None when missing or written for another version of the file"""
+    try:
+        with open(sidecar_pad(csv_pad), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if data.pop("bron", None) != str(bestand_identiteit(csv_pad)):
+        return None
+    return data
+
+def verwijder_sidecar(csv_pad):
+    if sidecar_pad(csv_pad).exists():
+        os.remove(sidecar_pad(csv_pad))
@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils.logic import vrije_plekken
+from utils.strategieen import score_planning
+
+def standaard_scenarios(trainingen_df):
+    """The current capacities, +1 and +2 per training, and an extra group on each training day"""
+    scenarios = [
+        {"naam": "Huidige capaciteit"},
+        {"naam": "+1 per training", "plus": 1},
+        {"naam": "+2 per training", "plus": 2},
+    ]
+    for dag in trainingen_df["Dag"].dropna().unique():
+        scenarios.append({"naam": f"Extra groep op {dag}", "extra_groep": dag})
+    return scenarios
+
+def pas_scenario_toe(trainingen_df, scenario):
+    """Copy of the trainings with the capacities of a scenario.
+
+    "plus" adds spots to every training; "extra_groep" runs a second group
+    next to every training on that day, doubling its capacity.
+    """
+    trainingen = trainingen_df.copy()
+    capaciteit = pd.Series(vrije_plekken(trainingen), index=trainingen.index)
+    capaciteit += scenario.get("plus", 0)
+    if scenario.get("extra_groep"):
+        op_dag = trainingen["Dag"] == scenario["extra_groep"]
+        capaciteit[op_dag] *= 2
+    trainingen["Capaciteit"] = capaciteit.clip(lower=0)
+    return trainingen
+
+def _simuleer_scenario(scenario, rondes, trainingen_df, methode):
+    """Worker: plan every round with the capacities of one scenario and score the result"""
+    from components.ronde_planning import apply_previous_round_capacity, plan_single_round
+    trainingen = pas_scenario_toe(trainingen_df, scenario)
+    status = {"planning_history": [], "manual_assignments": {}}
+    totaal = {"geplaatst": 0, "eerste_keuze": 0, "handmatig": 0}
+
+    for round_num in sorted(rondes):
+        trainingen_ronde = apply_previous_round_capacity(trainingen, status, round_num)
+        planning, handmatig = plan_single_round(rondes[round_num].copy(), trainingen_ronde, round_num, status, methode)
+        planning = {training: list(people) for training, people in planning.items()}
+        status["planning_history"].append({"round": round_num, "assigned_by_training": planning})
+        score = score_planning(rondes[round_num], trainingen, planning, handmatig)
+        for sleutel in totaal:
+            totaal[sleutel] += score[sleutel]
+
+    geplaatst_of_handmatig = totaal["geplaatst"] + totaal["handmatig"]
+    return {
+        "scenario": scenario["naam"],
+        "extra_plekken": int(vrije_plekken(trainingen).sum() - vrije_plekken(trainingen_df).sum()),
+        "geplaatst": totaal["geplaatst"],
+        "handmatig": totaal["handmatig"],
+        "eerste_keuze_pct": round(100 * totaal["eerste_keuze"] / geplaatst_of_handmatig, 1) if geplaatst_of_handmatig else 0.0,
+    }
+
+def simuleer_capaciteit(rondes, trainingen_df, scenarios=None, methode="greedy", max_workers=None):
+    """Plan the registrations of every round against a batch of capacity scenarios.
+
+    rondes is {round: people_df} as used by plan_all_rounds. Scenarios run in
+    parallel processes and come back in the given order, each with the number
+    of manual cases and the first-choice rate. Falls back to running
+    in-process if no worker pool can be started.
+    """
+    scenarios = list(scenarios or standaard_scenarios(trainingen_df))
+    taken = [(scenario, rondes, trainingen_df, methode) for scenario in scenarios]
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_simuleer_scenario, *zip(*taken)))
+    except (OSError, BrokenProcessPool):
+        return [_simuleer_scenario(*taak) for taak in taken]
@@ -0,0 +1,106 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from utils.logic import VOORKEUR_KOLOMMEN, naar_niveau, training_labels, keuze_matrix
+
+# Strategy key -> description shown in the comparison table
+STRATEGIEEN = {
+    "inschrijfdatum": "Op inschrijfdatum (wie het eerst komt)",
+    "loting_1": "Loting (seed 1)",
+    "loting_2": "Loting (seed 2)",
+    "loting_3": "Loting (seed 3)",
+    "laagste_niveau": "Laagste niveau eerst",
+    "meest_beperkt": "Minste opties eerst",
+    "optimaal": "Optimaal (min-cost flow)",
+}
+
+def aantal_opties(people_df, trainingen_df):
+    """Number of distinct trainings each person could be placed in, over all preferences"""
+    labels = training_labels(trainingen_df)
+    opties = np.zeros((len(people_df), len(labels)), dtype=bool)
+    for col in VOORKEUR_KOLOMMEN:
+        if col not in people_df.columns:
+            continue
+        codes, keuzes = pd.factorize(people_df[col].where(people_df[col].map(lambda v: isinstance(v, str))))
+        if len(keuzes) == 0:
+            continue
+        matrix = keuze_matrix(list(keuzes), trainingen_df)
+        opties |= np.where((codes >= 0)[:, None], matrix[np.maximum(codes, 0)], False)
+    niveaus = np.array([naar_niveau(nv) for nv in people_df["Niveau"]], dtype=float)
+    with np.errstate(invalid='ignore'):
+        past = (trainingen_df["MinNiveau"].to_numpy(dtype=float)[None, :] <= niveaus[:, None]) & \
+               (niveaus[:, None] <= trainingen_df["MaxNiveau"].to_numpy(dtype=float)[None, :])
+    return (opties & past).sum(axis=1)
+
+def orden_volgens_strategie(people_df, trainingen_df, strategie):
+    """Reorder people for a strategy by rewriting Inschrijfdatum, which the planners sort on"""
+    people = people_df.copy().reset_index(drop=True)
+    datums = pd.to_datetime(people["Inschrijfdatum"], errors='coerce')
+    datum_volgorde = datums.rank(method="first", na_option="bottom").to_numpy()
+
+    if strategie.startswith("loting_"):
+        rng = np.random.default_rng(int(strategie.split("_", 1)[1]))
+        volgorde = rng.permutation(len(people))
+    elif strategie == "laagste_niveau":
+        niveaus = np.array([naar_niveau(nv) for nv in people["Niveau"]], dtype=float)
+        volgorde = np.lexsort((datum_volgorde, np.nan_to_num(niveaus, nan=np.inf)))
+    elif strategie == "meest_beperkt":
+        volgorde = np.lexsort((datum_volgorde, aantal_opties(people, trainingen_df)))
+    else:
+        return people
+
+    nieuwe_datums = pd.Timestamp("2000-01-01") + pd.to_timedelta(np.arange(len(people)), unit="s")
+    people.loc[volgorde, "Inschrijfdatum"] = nieuwe_datums.strftime("%Y-%m-%d %H:%M:%S").tolist()
+    return people
+
+def score_planning(people_df, trainingen_df, planning, handmatig):
+    """Placed players, share placed in their first choice and number of manual cases"""
+    labels = training_labels(trainingen_df)
+    eerste = people_df.drop_duplicates("Naam").set_index("Naam")["Voorkeur_1"] if "Voorkeur_1" in people_df.columns else pd.Series(dtype=object)
+    keuzes = [k for k in eerste.dropna().unique() if isinstance(k, str)]
+    matrix = keuze_matrix(keuzes, trainingen_df) if keuzes else None
+    eerste_labels = {k: {labels[t] for t in np.flatnonzero(matrix[i])} for i, k in enumerate(keuzes)}
+
+    geplaatst = 0
+    eerste_keuze = 0
+    for training, people in planning.items():
+        for name, level in people:
+            geplaatst += 1
+            if training in eerste_labels.get(eerste.get(name), ()):
+                eerste_keuze += 1
+    totaal = geplaatst + len(handmatig)
+    return {
+        "geplaatst": geplaatst,
+        "eerste_keuze": eerste_keuze,
+        "eerste_keuze_pct": round(100 * eerste_keuze / totaal, 1) if totaal else 0.0,
+        "handmatig": len(handmatig),
+    }
+
+def _voer_strategie_uit(strategie, people_df, trainingen_df, round_num, status):
+    """Worker: plan one strategy with the same inputs plan_single_round receives"""
+    from components.ronde_planning import plan_single_round
+    methode = "optimaal" if strategie == "optimaal" else "greedy"
+    people = orden_volgens_strategie(people_df, trainingen_df, strategie)
+    planning, handmatig = plan_single_round(people, trainingen_df, round_num, status, methode)
+    planning = {training: list(people) for training, people in planning.items()}
+    resultaat = {"strategie": strategie, "methode": methode, "omschrijving": STRATEGIEEN.get(strategie, strategie),
+                 "planning": planning, "manual_needed": handmatig}
+    resultaat.update(score_planning(people_df, trainingen_df, planning, handmatig))
+    return resultaat
+
+def vergelijk_strategieen(people_df, trainingen_df, round_num, status, strategieen=None, max_workers=None):
+    """Run several planning strategies in parallel processes and return their scored results.
+
+    Results come back in the order of strategieen, best first is left to the
+    caller. Falls back to running in-process if no worker pool can be started.
+    """
+    strategieen = list(strategieen or STRATEGIEEN)
+    taken = [(s, people_df, trainingen_df, round_num, status) for s in strategieen]
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_voer_strategie_uit, *zip(*taken)))
+    except (OSError, BrokenProcessPool):
+        return [_voer_strategie_uit(*taak) for taak in taken]
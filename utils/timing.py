@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TIMING_LOG_PATH = BASE_DIR / "data" / "planning_timings.jsonl"
+MAX_RUNS = 20
+
+# Off unless switched on by an admin or with PLANNING_TIMING=1
+_actief = os.environ.get("PLANNING_TIMING") == "1"
+_runs = deque(maxlen=MAX_RUNS)
+# Streamlit runs every session's script in its own thread: the open run and its stage stack are per thread
+_lokaal = threading.local()
+_niets = nullcontext()
+
+def zet_timing(actief):
+    global _actief
+    _actief = bool(actief)
+
+def timing_actief():
+    return _actief
+
+def recente_runs():
+    """Runs measured in this process, newest first"""
+    return list(reversed(_runs))
+
+def _huidige_run():
+    return getattr(_lokaal, "run", None)
+
+def run_info(**info):
+    """Attach extra fields (round, method, ...) to the run being measured"""
+    run = _huidige_run()
+    if run is not None:
+        run.update(info)
+
+def _bewaar(run):
+    try:
+        os.makedirs(TIMING_LOG_PATH.parent, exist_ok=True)
+        with open(TIMING_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+@contextmanager
+def planning_run(naam, **info):
+    """Measure one run of the planning pipeline.
+
+    Stages entered with stap() while the run is open are recorded in order.
+    The finished run goes into the in-memory buffer and is appended to
+    data/planning_timings.jsonl. Does nothing when timing is switched off or a
+    run is already open.
+    """
+    if not _actief or _huidige_run() is not None:
+        yield
+        return
+
+    run = {"run": naam, "start": datetime.now().isoformat(), "stappen": []}
+    run.update(info)
+    _lokaal.run = run
+    _lokaal.stapel = []
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["totaal_s"] = round(time.perf_counter() - begin, 5)
+        _lokaal.run = None
+        _lokaal.stapel = []
+        _runs.append(run)
+        _bewaar(run)
+
+@contextmanager
+def _meet_stap(run, naam):
+    stapel = _lokaal.stapel
+    stapel.append(naam)
+    pad = "/".join(stapel)
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        duur = time.perf_counter() - begin
+        stapel.pop()
+        run["stappen"].append({"stap": pad, "s": round(duur, 5)})
+
+def stap(naam):
+    """Context manager timing one stage; a shared no-op when no run is being measured"""
+    run = _huidige_run()
+    if run is None:
+        return _niets
+    return _meet_stap(run, naam)
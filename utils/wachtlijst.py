@@ -0,0 +1,82 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from utils.logic import VOORKEUR_KOLOMMEN, naar_niveau, training_labels, keuze_matrix
+
+# Only people who missed out on capacity wait for a spot; other reasons need the admin
+WACHTLIJST_REDEN = "Alle voorkeuren zaten vol of geen match"
+
+def bouw_wachtlijst(people_df, trainingen_df, handmatig, people_training_map=None):
+    """Waitlist for one round: a priority queue per training of the people who couldn't be placed.
+
+    Every person whose manual reason is WACHTLIJST_REDEN is queued at each
+    training of their preferences that fits their level and that they don't
+    already have in another round. Queues are heaps ordered by registration
+    time, then preference rank, stored as plain lists so they survive JSON:
+    {"wachtrijen": {training: [[datum, rang, volgnummer, naam, niveau], ...]}, "afgehandeld": {naam: training or None}}
+    """
+    people_training_map = people_training_map or {}
+    wachtende_namen = {entry[0] for entry in handmatig if len(entry) == 4 and entry[3] == WACHTLIJST_REDEN}
+    wachtlijst = {"wachtrijen": {}, "afgehandeld": {}}
+    if not wachtende_namen or len(people_df) == 0:
+        return wachtlijst
+
+    people = people_df[people_df["Naam"].isin(wachtende_namen)].drop_duplicates("Naam")
+    labels = training_labels(trainingen_df)
+    min_niveau = trainingen_df["MinNiveau"].to_numpy(dtype=float)
+    max_niveau = trainingen_df["MaxNiveau"].to_numpy(dtype=float)
+    datums = pd.to_datetime(people["Inschrijfdatum"], errors='coerce')
+    datums = datums.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("9999-12-31 23:59:59").tolist()
+
+    keuzes = sorted({k for col in VOORKEUR_KOLOMMEN if col in people.columns for k in people[col] if isinstance(k, str)})
+    matrix = keuze_matrix(keuzes, trainingen_df) if keuzes else None
+    keuze_rij = {k: i for i, k in enumerate(keuzes)}
+
+    volgnummer = 0
+    for (_, person), datum in zip(people.iterrows(), datums):
+        niveau = naar_niveau(person["Niveau"])
+        if niveau is None:
+            continue
+        past = (min_niveau <= niveau) & (niveau <= max_niveau)
+        al_gehad = people_training_map.get(person["Naam"], [])
+        gezien = set()
+        for rang, col in enumerate(VOORKEUR_KOLOMMEN, start=1):
+            keuze = person.get(col)
+            if keuze not in keuze_rij:
+                continue
+            for t in np.flatnonzero(matrix[keuze_rij[keuze]] & past):
+                training = labels[t]
+                if training in gezien or training in al_gehad:
+                    continue
+                gezien.add(training)
+                wachtlijst["wachtrijen"].setdefault(training, []).append([datum, rang, volgnummer, person["Naam"], niveau])
+                volgnummer += 1
+
+    for rij in wachtlijst["wachtrijen"].values():
+        heapq.heapify(rij)
+    return wachtlijst
+
+def niet_meer_wachtend(wachtlijst, naam, training=None):
+    """Someone got a spot or left the round; their queue entries are skipped from now on"""
+    wachtlijst["afgehandeld"][naam] = training
+
+def promoveer(wachtlijst, training):
+    """Pop the next waiting person for a freed spot in training: (naam, niveau) or None.
+
+    Entries of people handled meanwhile are discarded lazily as they surface,
+    so each promotion costs O(log n) amortised.
+    """
+    rij = wachtlijst["wachtrijen"].get(training)
+    while rij:
+        datum, rang, volgnummer, naam, niveau = heapq.heappop(rij)
+        if naam not in wachtlijst["afgehandeld"]:
+            niet_meer_wachtend(wachtlijst, naam, training)
+            return naam, niveau
+    return None
+
+def wachtenden(wachtlijst, training):
+    """People still waiting for a training, in promotion order"""
+    return [(naam, niveau, rang) for datum, rang, volgnummer, naam, niveau in sorted(wachtlijst["wachtrijen"].get(training, []))
+            if naam not in wachtlijst["afgehandeld"]]